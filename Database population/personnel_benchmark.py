@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# personnel_benchmark.py
+# Benchmarks personnel_generator.py at several scales and compares against a stored baseline.
+#
+# For every scale (default 10k, 100k and 1M employees) a fresh process runs:
+#   - each stage on its own: employees (rows incl. manager assignment), manager
+#     assignment alone (OrgChart), org paths, payroll, licenses, shifts, and writing
+#     (formatting + file I/O of one sample per table file, cycled to the scale's
+#     employee count)
+#   - generate_files end to end, with the output size of every table file
+# and records wall time, rows/sec and peak RSS (process high-water mark at the end of
+# the stage). Results are printed and can be saved as JSON (--out); with --baseline
+# every stage's rows/sec is compared against the baseline and the script exits with
+# status 1 when one is more than --tolerance slower. Scales and stages the baseline
+# has no entry for are listed, so a new stage is not silently left unchecked. A
+# baseline recorded with another seed, format or backend is not compared at all.
+#
+#   python personnel_benchmark.py --scales 10000 100000 --out bench.json
+#   python personnel_benchmark.py --update-baseline        # after an intended change
+
+import os
+import sys
+import time
+import json
+import random
+import argparse
+import platform
+import datetime
+import tempfile
+import resource
+import multiprocessing
+
+import personnel_generator as gen
+
+DEFAULT_SCALES = [10000, 100000, 1000000]
+DEFAULT_SEED = 12345
+BASELINE_DEFAULT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+DEFAULT_TOLERANCE = 0.25    # allowed rows/sec drop before a stage counts as a regression
+
+STAGES = ['employees', 'managers', 'org_paths', 'payroll', 'licenses', 'shifts', 'writing']
+# run settings that must match the baseline's for rows/sec to be comparable
+COMPARED_META = ['seed', 'format', 'backend']
+
+
+def peak_rss_kb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss   # bytes on macOS, KiB elsewhere
+
+def timed(rows_fn):
+    """Run rows_fn() (returns a row count) and measure it."""
+    start = time.perf_counter()
+    rows = rows_fn()
+    seconds = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'seconds': round(seconds, 4),
+        'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else None,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+def consume(rows):
+    n = 0
+    for _ in rows:
+        n += 1
+    return n
+
+def assign_managers(num_employees, org_policy):
+    chart = gen.OrgChart(org_policy)
+    n_depts = len(gen.DEPARTMENTS)
+    for i in range(num_employees):
+        chart.add(i + 1, random.randint(1, n_depts))
+    return num_employees
+
+def write_sample(out_dir, num_rows, samples, fmt):
+    """Format and write num_rows rows per table, cycling through a CHUNK_SIZE sample."""
+    total = 0
+    for table, cols, sample in samples:
+        def rows():
+            for i in range(num_rows):
+                yield sample[i % len(sample)]
+        path = gen.table_file_path(out_dir, table)
+        total += gen.write_table_file(path, table, table, cols, rows(), fmt=fmt)
+    return total
+
+def run_scale(num_employees, seed, fmt, backend, org_policy=gen.DEFAULT_ORG_POLICY):
+    """Benchmark one scale; meant to run in a fresh process so peak RSS is per scale."""
+    stages = {}
+    random.seed(seed)
+    rng = gen.np_rng() if backend == 'numpy' else None
+    employees = gen.EmployeeStore()
+    emp_rows = gen.gen_employee_rows(num_employees, employees, org_policy=org_policy, rng=rng)
+    stages['employees'] = timed(lambda: consume(emp_rows))
+    stages['managers'] = timed(lambda: assign_managers(num_employees, org_policy))
+    stages['org_paths'] = timed(lambda: consume(gen.gen_org_path_rows(employees)))
+    num_license_emps = gen.license_employee_count(num_employees)
+    stages['payroll'] = timed(lambda: consume(gen.gen_payroll_rows(employees, rng=rng)))
+    stages['licenses'] = timed(lambda: consume(gen.gen_license_rows(employees, num_license_emps, rng=rng)))
+    stages['shifts'] = timed(lambda: consume(gen.gen_shift_rows(employees)))
+
+    random.seed(seed)
+    sample_store = gen.EmployeeStore()
+    samples = [
+        ('employee', gen.COLS_EMP, list(gen.gen_employee_rows(gen.CHUNK_SIZE, sample_store))),
+        ('employee_org_path', gen.COLS_ORG, list(gen.gen_org_path_rows(sample_store))),
+        ('payroll', gen.COLS_PAY, list(gen.gen_payroll_rows(sample_store))),
+        ('employee_license', gen.COLS_LIC,
+         list(gen.gen_license_rows(sample_store, gen.license_employee_count(gen.CHUNK_SIZE)))),
+        ('oncall_shift', gen.COLS_SHIFT, list(gen.gen_shift_rows(sample_store))),
+    ]
+    with tempfile.TemporaryDirectory(prefix='personnel_bench_') as tmp:
+        stages['writing'] = timed(lambda: write_sample(tmp, num_employees, samples, fmt))
+
+    with tempfile.TemporaryDirectory(prefix='personnel_bench_') as tmp:
+        result = {}
+        def full():
+            paths, counts = gen.generate_files(num_employees, tmp, seed=seed, fmt=fmt, backend=backend)
+            result['bytes'] = {table: os.path.getsize(path) for table, path in paths.items()}
+            return sum(counts.values())
+        total = timed(full)
+        total['bytes'] = result['bytes']
+    return {'stages': stages, 'generate_files': total}
+
+def run_benchmarks(scales, seed=DEFAULT_SEED, fmt='insert', backend='python'):
+    results = {}
+    for n in scales:
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(1) as pool:
+            results[str(n)] = pool.apply(run_scale, (n, seed, fmt, backend))
+        print_scale(n, results[str(n)])
+    return {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': seed,
+            'format': fmt,
+            'backend': backend,
+        },
+        'results': results,
+    }
+
+def print_scale(n, res):
+    print('%d employees:' % n)
+    for name in STAGES + ['generate_files']:
+        r = res['stages'][name] if name in res['stages'] else res[name]
+        print('  %-15s %10d rows %9.3f s %12.0f rows/s  peak %8d KiB'
+              % (name, r['rows'], r['seconds'], r['rows_per_sec'] or 0, r['peak_rss_kb']))
+    for table, size in res['generate_files']['bytes'].items():
+        print('    %-17s %12d bytes' % (table, size))
+
+def meta_mismatches(current, baseline):
+    """(setting, baseline value, current value) for every COMPARED_META setting that differs."""
+    base = baseline.get('meta', {})
+    return [(key, base.get(key), current['meta'][key])
+            for key in COMPARED_META if base.get(key) != current['meta'][key]]
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare rows/sec per (scale, stage) with the baseline. Returns (regressions,
+    unchecked): regressions as (scale, stage, baseline rows/sec, current rows/sec),
+    unchecked as (scale, stage) for measured stages the baseline has no rows/sec for
+    (stage None: the whole scale is missing).
+    """
+    regressions, unchecked = [], []
+    for scale, res in current['results'].items():
+        base = baseline.get('results', {}).get(scale)
+        if base is None:
+            print('  %8s no baseline entry for this scale' % scale)
+            unchecked.append((scale, None))
+            continue
+        pairs = [(name, res['stages'].get(name), base['stages'].get(name)) for name in STAGES]
+        pairs.append(('generate_files', res['generate_files'], base.get('generate_files')))
+        for name, cur, old in pairs:
+            if not cur or not cur['rows_per_sec']:
+                continue
+            if not old or not old['rows_per_sec']:
+                print('  %8s %-15s %12s -> %12.0f rows/s NO BASELINE' % (scale, name, '-', cur['rows_per_sec']))
+                unchecked.append((scale, name))
+                continue
+            ratio = cur['rows_per_sec'] / old['rows_per_sec']
+            flag = 'REGRESSION' if ratio < 1 - tolerance else ''
+            print('  %8s %-15s %12.0f -> %12.0f rows/s (%+.1f%%) %s'
+                  % (scale, name, old['rows_per_sec'], cur['rows_per_sec'], (ratio - 1) * 100, flag))
+            if flag:
+                regressions.append((scale, name, old['rows_per_sec'], cur['rows_per_sec']))
+    return regressions, unchecked
+
+def parse_args():
+    p = argparse.ArgumentParser(description='Benchmark the personnel data generator.')
+    p.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                   help='Employee counts to benchmark (default %(default)s).')
+    p.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Seed for every run (default %(default)s).')
+    p.add_argument('--format', dest='fmt', choices=gen.OUTPUT_FORMATS, default='insert')
+    p.add_argument('--backend', choices=('python', 'numpy'), default='python')
+    p.add_argument('--out', default=None, help='Write the results as JSON to this file.')
+    p.add_argument('--baseline', default=BASELINE_DEFAULT, help='Baseline JSON to compare against (default %(default)s).')
+    p.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                   help='Allowed rows/sec drop vs the baseline, as a fraction (default %(default)s).')
+    p.add_argument('--update-baseline', action='store_true', help='Write the results to --baseline instead of comparing.')
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    if args.backend == 'numpy':
+        gen.require_numpy()
+    current = run_benchmarks(args.scales, args.seed, args.fmt, args.backend)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print('Results written to %s' % args.out)
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print('Baseline written to %s' % args.baseline)
+        return
+    if not os.path.exists(args.baseline):
+        print('No baseline at %s (run with --update-baseline to create one).' % args.baseline)
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    mismatches = meta_mismatches(current, baseline)
+    if mismatches:
+        sys.exit('Not compared with %s, which was recorded with other settings: %s '
+                 '(rerun with the baseline\'s settings or use another --baseline).'
+                 % (args.baseline, ', '.join('%s %s (now %s)' % m for m in mismatches)))
+    print('Compared with %s (%s):' % (args.baseline, baseline.get('meta', {}).get('date')))
+    regressions, unchecked = compare(current, baseline, args.tolerance)
+    if unchecked:
+        print('%d stage(s) not checked: no baseline entry (run with --update-baseline to record them).'
+              % len(unchecked))
+    if regressions:
+        print('%d stage(s) slower than the baseline by more than %d%%.' % (len(regressions), args.tolerance * 100))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# personnel_delta.py
+# Incremental generation on top of an earlier run (personnel_generator.py --append),
+# instead of regenerating every table:
+#
+#   python personnel_generator.py -n 1000000 --seed 1 --manifest --through 2028-12 -o base
+#   python personnel_generator.py --append base -n 5000 --seed 2 -o delta1
+#   python personnel_generator.py --append delta1 -n 5000 --seed 3 -o delta2
+#
+# A run with --manifest (and every --append run) leaves a manifest/ directory next to
+# its SQL files:
+#   manifest.json            row counts, the month the data runs up to ("period"), the
+#                            license renewal watermark, the highest payroll / license /
+#                            shift id and the next free email suffix per name@domain
+#   employees.<column>.bin   per employee, in generation order: id, hire ordinal,
+#                            department, active flag, manager position (-1 for a root)
+#   licenses.<column>.bin    per license line: employee id, LICENSES index, level, expiry
+# (array.array columns in native byte order, read back with array.fromfile).
+#
+# An --append run reads the manifest and writes only the rows of the next month:
+#   - N new hires (employee and oncall_shift rows) hired during the month, with IDs
+#     outside the existing set, emails past every issued suffix and managers drawn by
+#     an OrgChart rebuilt from the manifest
+#   - one payroll row, dated the last day of the month, for every active employee
+#   - a renewal for every license line of an active employee that expires between the
+#     renewal watermark and the end of the month
+# Every date of a delta falls in its month or earlier, except renewal expiries, which
+# are clipped to DATE_LIMIT. A month past DATE_LIMIT is rejected, so the base run
+# needs --through (its dates then end with that month) to leave room for the deltas.
+# Child-table IDs continue from the high-water marks. Load the delta files after the
+# earlier ones: employee.sql, then payroll.sql, employee_license.sql and
+# oncall_shift.sql, then set_sequences.sql, which moves the sequences past them.
+# There is no employee_org_path.sql: in a database with ../org_hierarchy.sql (which
+# --load always installs) trg_employee_org_path_ins builds the new hires' paths while
+# employee.sql loads. Without it, apply org_hierarchy.sql and run
+# SELECT employee_org_path_rebuild(); after the last delta.
+
+import os
+import json
+import array
+import random
+import datetime
+import time
+import itertools
+import collections
+
+import personnel_generator as gen
+
+MANIFEST_DIR = 'manifest'
+EMPLOYEE_COLUMNS = [('ids', 'i'), ('hire', 'i'), ('dept', 'B'), ('active', 'B'), ('managers', 'i')]
+LICENSE_COLUMNS = [('employee', 'i'), ('kind', 'B'), ('level', 'B'), ('expiry', 'i')]
+# child tables whose highest id is kept as a high-water mark
+ID_TABLES = ('payroll', 'employee_license', 'oncall_shift')
+
+_ACTIVE = gen.COLS_EMP.index('active')
+_EMAIL = gen.COLS_EMP.index('email')
+_LIC_EMPLOYEE = gen.COLS_LIC.index('employee_id')
+_LIC_NAME = gen.COLS_LIC.index('license_name')
+_LIC_LEVEL = gen.COLS_LIC.index('license_level')
+_LIC_EXPIRY = gen.COLS_LIC.index('expiry_date')
+_LICENSE_KIND = dict((lic['name'], i) for i, lic in enumerate(gen.LICENSES))
+
+# new hires of an --append run, for gen_employee_rows(append=...)
+AppendPlan = collections.namedtuple('AppendPlan', 'eids emails org hire_start hire_end')
+
+
+# --------------------------- Manifest ---------------------------
+
+def month_bounds(period):
+    """First and last day of a 'YYYY-MM' period."""
+    year, month = map(int, period.split('-'))
+    first = datetime.date(year, month, 1)
+    following = datetime.date(year + month // 12, month % 12 + 1, 1)
+    return first, following - datetime.timedelta(days=1)
+
+def next_period(period):
+    return (month_bounds(period)[1] + datetime.timedelta(days=1)).strftime('%Y-%m')
+
+class ManifestRecorder:
+    """
+    Collects what an --append run needs while rows are generated: tap() passes one
+    table's rows through and records the active flag and email suffix of every
+    employee, the employee / kind / level / expiry of every license, and the highest
+    id of the child tables. The EmployeeStore supplies the other employee columns.
+    """
+
+    def __init__(self):
+        self.active = array.array('B')
+        self.licenses = dict((name, array.array(code)) for name, code in LICENSE_COLUMNS)
+        self.max_ids = dict.fromkeys(ID_TABLES, 0)
+        self.email_next = {}          # 'base@domain' -> lowest suffix not issued yet
+
+    @classmethod
+    def resume(cls, manifest):
+        """Continue recording on top of a manifest read with read_manifest()."""
+        recorder = cls()
+        recorder.active = manifest.active
+        recorder.licenses = manifest.licenses
+        recorder.max_ids.update(manifest.meta['max_ids'])
+        recorder.email_next = dict(manifest.meta['email_next'])
+        return recorder
+
+    def tap(self, table, rows):
+        if table == 'employee':
+            return self._employees(rows)
+        if table == 'employee_license':
+            return self._licenses(rows)
+        if table in self.max_ids:
+            return self.high_water(table, rows)
+        return rows
+
+    def _employees(self, rows):
+        active, email_next = self.active, self.email_next
+        for row in rows:
+            active.append(1 if row[_ACTIVE] else 0)
+            local, domain = row[_EMAIL].split('@')
+            base = local.rstrip('0123456789')      # names never end in a digit
+            key = base + '@' + domain
+            n = int(local[len(base):] or 0) + 1
+            if n > email_next.get(key, 0):
+                email_next[key] = n
+            yield row
+
+    def _licenses(self, rows):
+        employee, kind, level, expiry = (self.licenses[name] for name, _ in LICENSE_COLUMNS)
+        top = self.max_ids['employee_license']
+        for row in rows:
+            employee.append(row[_LIC_EMPLOYEE])
+            kind.append(_LICENSE_KIND[row[_LIC_NAME].rsplit(' (Level ', 1)[0]])
+            level.append(row[_LIC_LEVEL])
+            expiry.append(datetime.date.fromisoformat(row[_LIC_EXPIRY]).toordinal())
+            top = max(top, row[0])
+            yield row
+        self.max_ids['employee_license'] = top
+
+    def high_water(self, table, rows):
+        """Pass rows through, only raising the table's highest id."""
+        top = self.max_ids[table]
+        for row in rows:
+            top = max(top, row[0])
+            yield row
+        self.max_ids[table] = top
+
+    def save(self, out_dir, employees, period, renewed_through=None):
+        """
+        Write the manifest for the rows recorded so far (and `employees`, the run's
+        EmployeeStore) into out_dir/manifest. `period` is the 'YYYY-MM' the data runs up
+        to: DATE_MAX's month (the --through month) for a full run, which renews licenses
+        expiring from the start of that month on.
+        Returns the path of manifest.json.
+        """
+        if renewed_through is None:
+            renewed_through = month_bounds(period)[0]
+        path = os.path.join(out_dir, MANIFEST_DIR)
+        os.makedirs(path, exist_ok=True)
+        columns = dict((name, getattr(employees, name)) for name, _ in EMPLOYEE_COLUMNS if name != 'active')
+        columns['active'] = self.active
+        for name, _ in EMPLOYEE_COLUMNS:
+            with open(os.path.join(path, 'employees.%s.bin' % name), 'wb') as f:
+                columns[name].tofile(f)
+        for name, _ in LICENSE_COLUMNS:
+            with open(os.path.join(path, 'licenses.%s.bin' % name), 'wb') as f:
+                self.licenses[name].tofile(f)
+        meta = {
+            'employees': len(employees),
+            'licenses': len(self.licenses['employee']),
+            'period': period,
+            'renewed_through': renewed_through.isoformat(),
+            'max_ids': self.max_ids,
+            'email_next': self.email_next,
+        }
+        with open(os.path.join(path, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=1, sort_keys=True)
+        return os.path.join(path, 'manifest.json')
+
+Manifest = collections.namedtuple('Manifest', 'meta employees active licenses')
+
+def read_manifest(run_dir):
+    """Manifest of the run whose output directory (or manifest directory) is `run_dir`."""
+    path = run_dir if os.path.exists(os.path.join(run_dir, 'manifest.json')) else os.path.join(run_dir, MANIFEST_DIR)
+    try:
+        with open(os.path.join(path, 'manifest.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        raise SystemExit('no manifest in %s (write one with --manifest)' % run_dir)
+
+    def load(prefix, name, code, count):
+        column = array.array(code)
+        with open(os.path.join(path, '%s.%s.bin' % (prefix, name)), 'rb') as f:
+            column.fromfile(f, count)
+        return column
+
+    employees = gen.EmployeeStore()
+    active = None
+    for name, code in EMPLOYEE_COLUMNS:
+        column = load('employees', name, code, meta['employees'])
+        if name == 'active':
+            active = column
+        else:
+            setattr(employees, name, column)
+    licenses = dict((name, load('licenses', name, code, meta['licenses'])) for name, code in LICENSE_COLUMNS)
+    return Manifest(meta, employees, active, licenses)
+
+def merge_manifests(out_dir, part_dirs):
+    """
+    Combine per-shard manifests (manager positions are already employee indices) in
+    shard order into out_dir/manifest. One column of one shard is in memory at a
+    time. Returns the path of manifest.json.
+    """
+    metas = []
+    for part in part_dirs:
+        with open(os.path.join(part, MANIFEST_DIR, 'manifest.json'), 'r', encoding='utf-8') as f:
+            metas.append(json.load(f))
+    path = os.path.join(out_dir, MANIFEST_DIR)
+    os.makedirs(path, exist_ok=True)
+    for prefix, columns, count_key in (('employees', EMPLOYEE_COLUMNS, 'employees'),
+                                       ('licenses', LICENSE_COLUMNS, 'licenses')):
+        for name, code in columns:
+            with open(os.path.join(path, '%s.%s.bin' % (prefix, name)), 'wb') as out:
+                for part, meta in zip(part_dirs, metas):
+                    column = array.array(code)
+                    with open(os.path.join(part, MANIFEST_DIR, '%s.%s.bin' % (prefix, name)), 'rb') as f:
+                        column.fromfile(f, meta[count_key])
+                    column.tofile(out)
+    meta = dict(metas[0])
+    meta['employees'] = sum(m['employees'] for m in metas)
+    meta['licenses'] = sum(m['licenses'] for m in metas)
+    meta['max_ids'] = dict((t, max(m['max_ids'][t] for m in metas)) for t in ID_TABLES)
+    email_next = {}
+    for m in metas:
+        for key, n in m['email_next'].items():
+            email_next[key] = max(n, email_next.get(key, 0))
+    meta['email_next'] = email_next
+    with open(os.path.join(path, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1, sort_keys=True)
+    return os.path.join(path, 'manifest.json')
+
+
+# --------------------------- Delta rows ---------------------------
+
+def new_employee_ids(existing, n):
+    """n distinct 9-digit IDs, none of them in `existing` (one pass over it per redraw)."""
+    out, seen = [], set()
+    while len(out) < n:
+        candidates = random.sample(range(gen.EID_START, gen.EID_END + 1), n - len(out))
+        clash = set(candidates).intersection(existing)
+        for eid in candidates:
+            if eid not in clash and eid not in seen:
+                seen.add(eid)
+                out.append(eid)
+    return array.array('i', out)
+
+def gen_period_payroll_rows(employees, active, pay_date, first_id):
+    """One payroll row on `pay_date` for every active employee."""
+    pid = first_id
+    for eid, is_active in zip(employees.ids, active):
+        if is_active:
+            amt = round(random.uniform(*gen.PAY_AMOUNT_RANGE), 2)
+            yield [pid, eid, amt, pay_date, random.choice(gen.NOTES), '%s %s' % (pay_date, gen.rand_time())]
+            pid += 1
+
+def gen_renewal_rows(licenses, inactive, start, end, first_id):
+    """
+    A renewed license for every line whose expiry falls in [start, end] and whose
+    employee is not in `inactive`: issued on the old expiry date, valid 1-5 years
+    (clipped to DATE_LIMIT). The line's expiry in `licenses` moves to the new one.
+    """
+    lid = first_id
+    employee, kind, level, expiry = (licenses[name] for name, _ in LICENSE_COLUMNS)
+    lo, hi = start.toordinal(), end.toordinal()
+    for i in range(len(expiry)):
+        if not lo <= expiry[i] <= hi or employee[i] in inactive:
+            continue
+        issued = datetime.date.fromordinal(expiry[i])
+        renewed = min(issued + datetime.timedelta(days=random.randint(365, 365*5)), gen.DATE_LIMIT)
+        expiry[i] = renewed.toordinal()
+        issued_iso = issued.isoformat()
+        yield [lid, employee[i], '%s (Level %d)' % (gen.LICENSES[kind[i]]['name'], level[i]), level[i],
+               issued_iso, renewed.isoformat(), random.choice(gen.NOTES), '%s %s' % (issued_iso, gen.rand_time())]
+        lid += 1
+
+def generate_delta(run_dir, new_hires, out_dir, seed=None, fmt='insert', compress='none',
+                   org_policy=gen.DEFAULT_ORG_POLICY, stats=None, progress=None, metrics=None):
+    """
+    Write the next month's delta on top of the run whose manifest is in `run_dir`
+    (see the header) into out_dir, plus set_sequences.sql and the updated manifest.
+    Same arguments and return value as generate_files(). Exits if the month ends
+    after DATE_LIMIT.
+    """
+    start = time.perf_counter()
+    manifest = read_manifest(run_dir)
+    period = next_period(manifest.meta['period'])
+    first_day, last_day = month_bounds(period)
+    if last_day > gen.DATE_LIMIT:
+        raise SystemExit('%s is past the generated date range (up to %s); generate the base run with '
+                         '--through an earlier month' % (period, gen.DATE_LIMIT))
+    previous_max = gen.set_date_max(last_day)
+    try:
+        return _generate_delta(manifest, period, start, new_hires, out_dir, seed, fmt, compress,
+                               org_policy, stats, progress, metrics)
+    finally:
+        gen.set_date_max(previous_max)
+
+def _generate_delta(manifest, period, start, new_hires, out_dir, seed, fmt, compress, org_policy,
+                    stats, progress, metrics):
+    """generate_delta() once the manifest is read and DATE_MAX is the month's last day."""
+    if seed is not None:
+        random.seed(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    employees = manifest.employees
+    existing = len(employees)
+    first_day, last_day = month_bounds(period)
+    renew_from = datetime.date.fromisoformat(manifest.meta['renewed_through'])
+    inactive = set(itertools.compress(employees.ids, (not a for a in manifest.active)))
+
+    recorder = ManifestRecorder.resume(manifest)
+    emails = gen.EmailAllocator.resume(dict((tuple(key.split('@')), n) for key, n in recorder.email_next.items()))
+    plan = AppendPlan(new_employee_ids(employees.ids, new_hires), emails,
+                      gen.OrgChart.from_store(employees, org_policy), first_day, last_day)
+    if metrics is not None:
+        metrics.add('read manifest', time.perf_counter() - start, existing)
+        progress = metrics.progress
+
+    next_id = dict((table, recorder.max_ids[table] + 1) for table in ID_TABLES)
+    tables = [
+        ('employee', 'employees', "employees (new hires %s)" % period, gen.COLS_EMP,
+         gen.gen_employee_rows(None, employees, org_policy=org_policy, append=plan)),
+        ('payroll', 'payroll', "payroll (%s)" % period, gen.COLS_PAY,
+         gen_period_payroll_rows(employees, recorder.active, last_day.isoformat(), next_id['payroll'])),
+        ('employee_license', 'licenses', "employee_license (renewals %s)" % period, gen.COLS_LIC,
+         gen_renewal_rows(recorder.licenses, inactive, renew_from, last_day, next_id['employee_license'])),
+        ('oncall_shift', 'shifts', "oncall_shift (new hires %s)" % period, gen.COLS_SHIFT,
+         gen.gen_shift_rows(employees, next_id['oncall_shift'], existing)),
+    ]
+    paths, counts, writers = {}, {}, {}
+    for table, count_key, label, cols, rows in tables:
+        # renewals update their license line in place instead of adding one
+        rows = recorder.high_water(table, rows) if table == 'employee_license' else recorder.tap(table, rows)
+        paths[table] = gen.table_file_path(out_dir, table, compress)
+        writers[count_key] = gen.start_table_file(paths[table], label, table, cols, rows, fmt, compress, progress)
+    for count_key, writer in writers.items():
+        counts[count_key] = writer.wait()
+        if metrics is not None:
+            metrics.add_writer(writer)
+
+    seq_file = os.path.join(out_dir, 'set_sequences.sql')
+    with open(seq_file, 'w', encoding='utf-8') as f:
+        f.write('-- Set sequences to the current max values (run after loading the delta)\n\n')
+        for stmt in gen.sequence_statements():
+            f.write(stmt + '\n')
+    paths['sequences'] = seq_file
+    paths['manifest'] = recorder.save(out_dir, employees, period, last_day + datetime.timedelta(days=1))
+    if stats is not None:
+        stats['employee_store_bytes'] = employees.nbytes()
+        stats['employee_store_bytes_per_employee'] = gen.EmployeeStore.bytes_per_employee()
+    return paths, counts
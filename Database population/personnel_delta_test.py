@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# personnel_delta_test.py
+# Date-range checks for --through / --append output:  python -m pytest personnel_delta_test.py
+
+import os
+import datetime
+
+import pytest
+
+import personnel_generator as gen
+import personnel_delta as delta
+
+# date (and timestamp) columns per table
+DATE_COLUMNS = {
+    'employee': ['hire_date', 'termination_date', 'created_at'],
+    'payroll': ['pay_date', 'created_at'],
+    'employee_license': ['issued_date', 'expiry_date', 'created_at'],
+    'oncall_shift': ['created_at'],
+}
+
+def copy_rows(out_dir, table):
+    """Dicts of the rows of a --format copy table file (None for \\N)."""
+    with open(os.path.join(out_dir, table + '.sql'), encoding='utf-8') as f:
+        lines = iter(f.read().splitlines())
+    for line in lines:
+        if line.startswith('COPY '):
+            cols = line[line.index('(') + 1:line.index(')')].split(', ')
+            break
+    else:
+        return
+    for line in lines:
+        if line == '\\.':
+            return
+        yield dict((col, None if value == '\\N' else value) for col, value in zip(cols, line.split('\t')))
+
+def dates(out_dir, table, column):
+    for row in copy_rows(out_dir, table):
+        if row[column] is not None:
+            yield datetime.date.fromisoformat(row[column][:10])
+
+@pytest.fixture
+def base(tmp_path):
+    """A --manifest run with --through 2029-11."""
+    out_dir = str(tmp_path / 'base')
+    previous = gen.set_date_max(datetime.date(2029, 11, 30))
+    try:
+        gen.generate_files(300, out_dir, seed=1, fmt='copy', manifest=True)
+    finally:
+        gen.set_date_max(previous)
+    return out_dir
+
+def test_through_bounds_the_full_run(base):
+    for table, columns in DATE_COLUMNS.items():
+        for column in columns:
+            assert max(dates(base, table, column)) <= datetime.date(2029, 11, 30), (table, column)
+
+def test_delta_dates_stay_inside_the_range(base, tmp_path):
+    out_dir = str(tmp_path / 'delta')
+    delta.generate_delta(base, 200, out_dir, seed=2, fmt='copy')
+    first_day, last_day = delta.month_bounds('2029-12')
+    for table, columns in DATE_COLUMNS.items():
+        for column in columns:
+            assert max(dates(out_dir, table, column)) <= gen.DATE_LIMIT, (table, column)
+    assert all(first_day <= d <= last_day for d in dates(out_dir, 'employee', 'hire_date'))
+    assert all(d <= last_day for d in dates(out_dir, 'employee', 'termination_date'))
+    assert set(dates(out_dir, 'payroll', 'pay_date')) == {last_day}
+    assert all(first_day - datetime.timedelta(days=31) <= d <= last_day
+               for d in dates(out_dir, 'employee_license', 'issued_date'))
+    assert gen.DATE_MAX == gen.DATE_LIMIT
+
+def test_append_past_the_range_is_rejected(base, tmp_path):
+    first = str(tmp_path / 'delta1')
+    delta.generate_delta(base, 10, first, seed=2, fmt='copy')
+    with pytest.raises(SystemExit):
+        delta.generate_delta(first, 10, str(tmp_path / 'delta2'), seed=3, fmt='copy')
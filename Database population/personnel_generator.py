@@ -2,22 +2,74 @@
 # generator_personnel_explicit_ids.py  (updated)
 # Changes:
 #   (1) Licenses have levels (license_level column + composed display name).
-#   (2) Manager assignment guarantees an acyclic org chart (no cycles), with
-#       defensive cycle detection.
+#   (2) Manager assignment guarantees an acyclic org chart (no cycles): managers are
+#       drawn from earlier employees by OrgChart, with optional depth / fan-out limits.
 #   (3) Shifts are generated per-employee with non-overlapping intervals per day,
 #       reasonable durations, minute precision (HH:MM), and sequential escalation_order.
+#   (4) Tables are streamed from row generators and flushed one CHUNK_SIZE block at a
+#       time instead of being built as full lists; --seed makes output reproducible.
+#   (5) --format copy writes COPY ... FROM STDIN data instead of INSERT statements,
+#       and --compress gzip|zstd compresses each table file.
+#   (6) --workers N generates employee index shards in parallel processes, each seeded
+#       from the master --seed; parts are merged in shard order.
+#   (7) --backend numpy draws employee / payroll / license columns per chunk with a
+#       numpy Generator (dates as day ordinals, formatted only when rows are built).
+#   (8) Child-table stages read from a columnar EmployeeStore (id, hire ordinal,
+#       department) instead of a 16-key dict per employee.
+#   (9) Emails come from EmailAllocator (one counter per name/domain base) instead
+#       of probing a set of every issued address.
+#  (10) --load DSN COPYs the rows straight into PostgreSQL (personnel_loader.py),
+#       with constraints, triggers and sequences applied after the data.
+#  (11) Each output file is formatted, compressed and written by its own TableWriter
+#       thread fed through a bounded queue, overlapping generation with file I/O.
+#  (12) RunMetrics times every stage (rows/sec, bytes written, progress with ETA);
+#       --profile adds cProfile output and a metrics.json next to the SQL files.
+#  (13) --partitioned writes payroll (by pay_date year) and oncall_shift (by day of
+#       week) as one file per partition of personnel_init_partitioned.sql.
+#  (14) employee_org_path.sql: every employee's manager chain (root..employee) as an
+#       int[] path, from the OrgChart's parent positions (see org_hierarchy.sql).
+#  (15) --manifest saves ID high-water marks and per-employee / per-license state;
+#       --append DIR writes only a month's delta on top of it (personnel_delta.py).
+#       --through YYYY-MM ends a full run's dates with that month, leaving room for
+#       the --append months up to DATE_LIMIT.
+#  (16) Shifts come from a ShiftLibrary of precomputed daily / weekly schedules, one
+#       week picked per employee, instead of sorting candidate shifts per day: a fixed
+#       pool of ONCALL_WEEK_TEMPLATES weeks per run (seeded from --seed), and one
+#       created_at for all of an employee's shift rows.
 
 import os
 import sys
 import random
 import datetime
+import io
+import gzip
 import json
 import argparse
+import array
+import bisect
+import itertools
+import collections
+import math
+import shutil
+import multiprocessing
+import threading
+import queue
+import time
+import cProfile
+import pstats
+
+try:
+    import numpy as np       # optional: only needed for --backend numpy
+except ImportError:
+    np = None
 
 # --------------------------- Configurable parameters ---------------------------
 DEFAULT_NUM_EMPLOYEES = 100000
 OUT_DIR_DEFAULT = os.path.join(os.getcwd(), "output_sql_explicit_ids")
 CHUNK_SIZE = 1000  # rows per INSERT statement chunk
+WRITE_QUEUE_CHUNKS = 8        # row blocks buffered per output file (TableWriter)
+WRITE_BUFFER = 1 << 20        # bytes of write buffering per uncompressed output file
+PROGRESS_SECONDS = 10         # minimum interval between progress lines (RunMetrics)
 
 PAYROLL_PER_EMP_RANGE = (1, 3)   # at least 1 payroll per employee
 
@@ -30,10 +82,18 @@ ONCALL_MAX_SHIFTS_PER_DAY = 2
 ONCALL_SHIFT_MIN_HOURS = 2
 ONCALL_SHIFT_MAX_HOURS = 6
 ONCALL_START_WINDOW = (6, 20)    # earliest, latest start hour
+ONCALL_SHIFTS_PER_DAY_WEIGHTS = None   # weight per shift count MIN..MAX (None = uniform)
+# Shifts are drawn from a fixed pool: every employee's week is one of ONCALL_WEEK_TEMPLATES
+# schedules built per run (per --seed), so at most that many distinct weeks occur in a run.
+ONCALL_DAY_TEMPLATES = 256       # daily schedules per shift count (ShiftLibrary)
+ONCALL_WEEK_TEMPLATES = 4096     # weekly schedules employees are drawn from
 
-# Date bounds used for most generated dates
+# Date bounds used for most generated dates. DATE_LIMIT is the end of the configured
+# range (the payroll partitions stop there); --through lowers DATE_MAX below it so
+# that --append months still fit (see set_date_max).
 DATE_MIN = datetime.date(2020, 1, 1)
 DATE_MAX = datetime.date(2029, 12, 31)
+DATE_LIMIT = DATE_MAX
 DT_MIN = datetime.datetime.combine(DATE_MIN, datetime.time(0, 0))
 DT_MAX = datetime.datetime.combine(DATE_MAX, datetime.time(23, 59))
 
@@ -51,6 +111,53 @@ def sql_escape(val):
         return "NULL"
     return "'" + str(val).replace("'", "''") + "'"
 
+# Row generators yield plain Python values; they are rendered only at write time,
+# either as SQL literals (INSERT format) or as COPY text fields (COPY format).
+# float values are NUMERIC(12,2) amounts; dict values are JSONB documents.
+
+def sql_literal(val):
+    if val is None:
+        return "NULL"
+    if isinstance(val, bool):
+        return "true" if val else "false"
+    if isinstance(val, int):
+        return str(val)
+    if isinstance(val, float):
+        return f"{val:.2f}"
+    if isinstance(val, dict):
+        val = json.dumps(val)
+    return sql_escape(val)
+
+def copy_escape(val):
+    """Render a value as a field of PostgreSQL's COPY text format (tab-separated, \\N = NULL)."""
+    if val is None:
+        return "\\N"
+    if isinstance(val, bool):
+        return "t" if val else "f"
+    if isinstance(val, int):
+        return str(val)
+    if isinstance(val, float):
+        return f"{val:.2f}"
+    if isinstance(val, dict):
+        val = json.dumps(val)
+    return (str(val).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+def set_date_max(end):
+    """
+    Make `end` (in DATE_MIN..DATE_LIMIT) the last day that generated dates and
+    timestamps fall on, and return the previous DATE_MAX. Worker processes get the
+    same bound through generate_sharded's pool initializer.
+    """
+    global DATE_MAX, DT_MAX, _TOTAL_MINUTES
+    if not DATE_MIN <= end <= DATE_LIMIT:
+        raise ValueError("date bound %s outside %s..%s" % (end, DATE_MIN, DATE_LIMIT))
+    previous = DATE_MAX
+    DATE_MAX = end
+    DT_MAX = datetime.datetime.combine(end, datetime.time(23, 59))
+    _TOTAL_MINUTES = int((DT_MAX - DT_MIN).total_seconds() // 60)
+    return previous
+
 def rand_date():
     delta = (DATE_MAX - DATE_MIN).days
     d = DATE_MIN + datetime.timedelta(days=random.randint(0, delta))
@@ -82,10 +189,28 @@ def rand_time(min_hour=0, max_hour=23, minute_choices=TIME_MINUTE_CHOICES):
     m = random.choice(minute_choices)
     return f"{h:02d}:{m:02d}"
 
+EID_START = 100_000_000
+EID_END = 999_999_999
+
 def generate_unique_eids(n):
-    start = 100_000_000
-    end = 999_999_999
-    return random.sample(range(start, end + 1), n)
+    return random.sample(range(EID_START, EID_END + 1), n)
+
+def eid_permutation(seed):
+    """
+    Return (a, b) for eid_at(): an affine permutation of the 9-digit ID range.
+    Used by sharded generation so any process can compute the ID of any employee
+    index without holding the full sampled list.
+    """
+    rng = random.Random(seed)
+    span = EID_END - EID_START + 1
+    a = rng.randrange(1, span)
+    while math.gcd(a, span) != 1:
+        a = rng.randrange(1, span)
+    return a, rng.randrange(span)
+
+def eid_at(idx, perm):
+    a, b = perm
+    return EID_START + (a * idx + b) % (EID_END - EID_START + 1)
 
 # --------------------------- Constraint checkers ---------------------------
 
@@ -223,93 +348,505 @@ def generate_address():
     suffix = random.choice(STREET_SUFFIXES)
     return f"{number} {name} {suffix}"
 
-# --------------------------- Manager DAG helpers ---------------------------
+# --------------------------- Org chart ---------------------------
+
+# Limits for the manager tree. max_depth counts levels (a root is level 1) and
+# max_fanout caps direct reports; None means unlimited. same_department only
+# picks managers from the employee's own department.
+OrgPolicy = collections.namedtuple("OrgPolicy", "max_depth max_fanout same_department")
+DEFAULT_ORG_POLICY = OrgPolicy(max_depth=None, max_fanout=None, same_department=False)
+
+class OrgChart:
+    """
+    Assigns managers to employees as they are created, in O(1) per employee.
+
+    Every employee who may still take reports (below max_depth, under max_fanout) sits
+    in an "open" pool; a manager is drawn uniformly from the pool and swap-removed once
+    it is full. Managers are always employees added earlier, so the chart is acyclic by
+    construction. With the default policy, the draw is the same as choosing uniformly
+    among all earlier employees.
+
+    `parents` holds, per add() call, the manager's position in add() order (-1 for
+    a root), so the whole tree can be walked from it afterwards.
+
+    A shard's chart starts at `offset`, the shard's first employee index, and its
+    positions are employee indices. With `perm` it also draws from the `offset`
+    employees of earlier shards, named by eid_at(); their departments, levels and
+    report counts are unknown here, so this is only possible with the default policy
+    (see for_shard).
+    """
+
+    def __init__(self, policy=DEFAULT_ORG_POLICY, offset=0, perm=None):
+        self.policy = policy
+        self.offset = offset
+        self.perm = perm
+        self._earlier = offset if perm is not None else 0
+        self.parents = array.array("i")
+        self._pools = {}   # pool key -> (ids, levels, report counts, add() positions), parallel lists
+
+    @classmethod
+    def for_shard(cls, shard, policy=DEFAULT_ORG_POLICY):
+        """
+        Chart for the ShardSpec `shard`. Under the default policy managers are drawn
+        from every lower employee index, as in a single-process run; depth, fan-out and
+        same-department limits need the earlier shards' state, so there managers come
+        from the shard's own employees.
+        """
+        unlimited = not policy.same_department and policy.max_depth is None and policy.max_fanout is None
+        return cls(policy, shard.lo, shard.perm if unlimited else None)
 
-def would_create_cycle(candidate_manager_id, employee_id, manager_of):
+    def add(self, eid, dept_id, wants_manager=True, u=None):
+        """
+        Register employee `eid` and return its manager's id (None for a root).
+        `u` is an optional pre-drawn uniform in [0, 1) used instead of `random`.
+        """
+        key = dept_id if self.policy.same_department else None
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = ([], [], [], [])
+        ids, levels, reports, slots = pool
+        manager, level, parent = None, 1, -1
+        n = self._earlier + len(ids)
+        if wants_manager and n:
+            i = random.randrange(n) if u is None else int(u * n)
+            if i < self._earlier:
+                # an earlier shard's employee (default policy: no level / fan-out to track)
+                manager, parent = eid_at(i, self.perm), i
+            else:
+                i -= self._earlier
+                manager, level, parent = ids[i], levels[i] + 1, slots[i]
+                reports[i] += 1
+                if self.policy.max_fanout is not None and reports[i] >= self.policy.max_fanout:
+                    for column in pool:
+                        column[i] = column[-1]
+                        column.pop()
+        if self.policy.max_depth is None or level < self.policy.max_depth:
+            ids.append(eid)
+            levels.append(level)
+            reports.append(0)
+            slots.append(self.offset + len(self.parents))
+        self.parents.append(parent)
+        return manager
+
+    @classmethod
+    def from_store(cls, employees, policy=DEFAULT_ORG_POLICY):
+        """
+        Rebuild the chart of an earlier run from an EmployeeStore (ids, departments and
+        manager positions) so further add() calls continue it; `parents` is the
+        store's `managers` array. The open pools hold the same employees as at the end
+        of that run, though not in the same order (so later draws differ).
+        """
+        org = cls(policy)
+        org.parents = employees.managers
+        n, parents = len(employees), employees.managers
+        levels = array.array("i", bytes(4 * n))
+        reports = array.array("i", bytes(4 * n))
+        if policy.max_depth is not None or policy.max_fanout is not None:
+            for i in range(n):
+                p = parents[i]
+                if p >= 0:
+                    levels[i] = levels[p] + 1
+                    reports[p] += 1
+                else:
+                    levels[i] = 1
+        if not policy.same_department and policy.max_depth is None and policy.max_fanout is None:
+            # every employee stays open: one pool in store order
+            org._pools[None] = (array.array("i", employees.ids), levels, reports, array.array("i", range(n)))
+            return org
+        for i in range(n):
+            if policy.max_depth is not None and levels[i] >= policy.max_depth:
+                continue
+            if policy.max_fanout is not None and reports[i] >= policy.max_fanout:
+                continue
+            key = employees.dept[i] if policy.same_department else None
+            pool = org._pools.get(key)
+            if pool is None:
+                pool = org._pools[key] = ([], [], [], [])
+            for column, value in zip(pool, (employees.ids[i], levels[i], reports[i], i)):
+                column.append(value)
+        return org
+
+# --------------------------- Employee store ---------------------------
+
+class EmployeeStore:
     """
-    Return True if setting candidate_manager_id as manager of employee_id would create a cycle.
-    manager_of: dict {employee_id -> manager_id or None}
+    Columnar, array-backed record of the generated employees, holding only what the
+    org path / payroll / license / shift stages need: employee_id, hire date (as a
+    date ordinal), department_id and the manager's position (-1 for a root; the
+    OrgChart's `parents`, shared; in a shard's store, an employee index that may lie
+    in an earlier shard). About 13 bytes per employee instead of a 16-key dict.
     """
-    if candidate_manager_id is None:
-        return False
-    # Walk upwards from candidate_manager_id; if we see employee_id, it's a cycle.
-    seen = set()
-    cur = candidate_manager_id
-    while cur is not None and cur not in seen:
-        if cur == employee_id:
-            return True
-        seen.add(cur)
-        cur = manager_of.get(cur)
-    return False
+
+    __slots__ = ("ids", "hire", "dept", "managers")
+
+    def __init__(self):
+        self.ids = array.array("i")     # 9-digit IDs fit in a signed 32-bit int
+        self.hire = array.array("i")
+        self.dept = array.array("B")
+        self.managers = array.array("i")
+
+    def append(self, eid, hire_ord, dept_id):
+        self.ids.append(eid)
+        self.hire.append(hire_ord)
+        self.dept.append(dept_id)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        """Yield (employee_id, hire ordinal, department_id) in generation order."""
+        return zip(self.ids, self.hire, self.dept)
+
+    def nbytes(self):
+        return sum(len(col) * col.itemsize for col in (self.ids, self.hire, self.dept, self.managers))
+
+    @staticmethod
+    def bytes_per_employee():
+        return sum(array.array(code).itemsize for code in "iiBi")
 
 # --------------------------- Core generation logic ---------------------------
 
-def write_inserts_chunked(path, table, cols, rows, chunk=CHUNK_SIZE):
-    with open(path, "a", encoding="utf-8") as f:
-        for i in range(0, len(rows), chunk):
-            chunk_rows = rows[i:i+chunk]
-            values = ",\n".join("(" + ", ".join(r) + ")" for r in chunk_rows)
-            f.write(f"INSERT INTO {table} ({', '.join(cols)}) VALUES\n{values};\n\n")
+OUTPUT_FORMATS = ("insert", "copy")
+COMPRESSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
 
-def generate_files(num_employees=DEFAULT_NUM_EMPLOYEES, out_dir=OUT_DIR_DEFAULT, write_sequences=True):
-    os.makedirs(out_dir, exist_ok=True)
-    paths = {}
+def require_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        sys.exit("--compress zstd requires the 'zstandard' package (pip install zstandard)")
+    return zstandard
+
+def open_output(path, compress="none"):
+    """Open a text file for writing, optionally through gzip or zstd (needs the zstandard package)."""
+    if compress == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    if compress == "zstd":
+        raw = open(path, "wb")
+        return io.TextIOWrapper(require_zstandard().ZstdCompressor().stream_writer(raw), encoding="utf-8")
+    return open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER)
+
+def compress_text(text, compress="none"):
+    """Encode `text` as one standalone gzip member / zstd frame (or plain UTF-8)."""
+    data = text.encode("utf-8")
+    if compress == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if compress == "zstd":
+        return require_zstandard().ZstdCompressor().compress(data)
+    return data
+
+def format_insert_chunk(table, cols, rows):
+    """One multi-row INSERT statement for a block of rows."""
+    values = ",\n".join("(" + ", ".join(map(sql_literal, r)) + ")" for r in rows)
+    return f"INSERT INTO {table} ({', '.join(cols)}) VALUES\n{values};\n\n"
+
+def format_copy_chunk(table, cols, rows):
+    """COPY text-format data lines for a block of rows (header/terminator come from table_prologue/epilogue)."""
+    return "".join("\t".join(map(copy_escape, r)) + "\n" for r in rows)
+
+CHUNK_FORMATTERS = {"insert": format_insert_chunk, "copy": format_copy_chunk}
+
+def iter_chunks(rows, chunk=CHUNK_SIZE):
+    """Pull `rows` (any iterable, typically a generator) as lists of at most `chunk` rows."""
+    it = iter(rows)
+    while True:
+        block = list(itertools.islice(it, chunk))
+        if not block:
+            return
+        yield block
+
+def table_prologue(label, table, cols, fmt="insert"):
+    text = f"-- {label}\nBEGIN;\n\n"
+    if fmt == "copy":
+        # psql reads the data lines that follow, up to the terminating \\.
+        text += f"COPY {table} ({', '.join(cols)}) FROM STDIN;\n"
+    return text
+
+def table_epilogue(fmt="insert"):
+    return ("\\.\n\n" if fmt == "copy" else "") + "COMMIT;\n"
+
+def table_file_path(out_dir, name, compress="none"):
+    return os.path.join(out_dir, name + ".sql" + COMPRESSIONS[compress])
+
+class TableWriter(threading.Thread):
+    """
+    Writes one output file on its own thread. The generating thread put()s blocks of
+    raw rows into a bounded queue; the writer formats them (INSERT or COPY text),
+    compresses and writes them, so generation overlaps with formatting and file I/O.
+    `head` / `tail` are written before / after the rows. If `progress` is given it is
+    called as progress(table, rows_written, done) after every block and at the end.
+    wait() finishes the file, re-raises a write error and returns the row count.
+    busy_seconds is the writer's own formatting / writing time; feed_seconds and
+    blocked_seconds are the producer's time in feed() and the part spent on a full queue.
+    """
 
-    # Department
-    dept_file = os.path.join(out_dir, "department.sql")
-    cols_dept = ["department_id", "name", "description", "created_at"]
-    dept_rows = []
+    def __init__(self, path, table, cols, fmt="insert", compress="none", head="", tail="", progress=None):
+        super().__init__(name="write-%s" % table, daemon=True)
+        self.path = path
+        self.table = table
+        self.cols = cols
+        self.format_chunk = CHUNK_FORMATTERS[fmt]
+        self.compress = compress
+        self.head = head
+        self.tail = tail
+        self.progress = progress
+        self.blocks = queue.Queue(maxsize=WRITE_QUEUE_CHUNKS)
+        self.rows = 0
+        self.error = None
+        self.busy_seconds = 0.0
+        self.feed_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    def run(self):
+        try:
+            start = time.perf_counter()
+            with open_output(self.path, self.compress) as f:
+                f.write(self.head)
+                while True:
+                    t = time.perf_counter()
+                    block = self.blocks.get()
+                    self.busy_seconds -= time.perf_counter() - t   # waiting is not busy time
+                    if block is None:
+                        break
+                    f.write(self.format_chunk(self.table, self.cols, block))
+                    self.rows += len(block)
+                    if self.progress:
+                        self.progress(self.table, self.rows, False)
+                f.write(self.tail)
+            self.busy_seconds += time.perf_counter() - start
+            if self.progress:
+                self.progress(self.table, self.rows, True)
+        except BaseException as e:
+            self.error = e
+            # keep draining so the producer never blocks on a full queue
+            while self.blocks.get() is not None:
+                pass
+
+    def put(self, block):
+        """Queue one block of rows, blocking while the queue is full."""
+        t = time.perf_counter()
+        self.blocks.put(block)
+        self.blocked_seconds += time.perf_counter() - t
+
+    def feed(self, rows):
+        """Queue `rows` in CHUNK_SIZE blocks (runs on the calling thread), then end the file."""
+        start = time.perf_counter()
+        try:
+            for block in iter_chunks(rows):
+                self.put(block)
+        finally:
+            self.blocks.put(None)
+            self.feed_seconds = time.perf_counter() - start
+        return self
+
+    def wait(self):
+        self.join()
+        if self.error is not None:
+            raise self.error
+        return self.rows
+
+class PartitionedWriter:
+    """
+    Writes one --partitioned table as one file per partition (PARTITIONS[table]): a
+    TableWriter per partition, with the rows routed by PARTITION_OF[table] and
+    queued in CHUNK_SIZE blocks per partition. Same start() / feed() / wait() and
+    timing attributes as TableWriter; `writers` maps partition -> TableWriter.
+    `path_of(partition)` names the files; without a `label` they get no header /
+    COMMIT (shard part files).
+    """
+
+    def __init__(self, path_of, table, cols, fmt="insert", compress="none", label=None, progress=None):
+        self.table = table
+        self.partition_of = PARTITION_OF[table]
+        self.writers = collections.OrderedDict()
+        for name, name_label in output_tables(table, label, True):
+            head, tail = (table_prologue(name_label, name, cols, fmt), table_epilogue(fmt)) if label else ("", "")
+            self.writers[name] = TableWriter(path_of(name), name, cols, fmt, compress, head, tail, progress)
+        self.paths = collections.OrderedDict((name, w.path) for name, w in self.writers.items())
+        self.rows = 0
+        self.feed_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    @property
+    def busy_seconds(self):
+        return sum(w.busy_seconds for w in self.writers.values())
+
+    def start(self):
+        for writer in self.writers.values():
+            writer.start()
+
+    def feed(self, rows):
+        """Route `rows` to the partition writers (runs on the calling thread), then end every file."""
+        start = time.perf_counter()
+        buffers = dict((name, []) for name in self.writers)
+        try:
+            for row in rows:
+                name = self.partition_of(row)
+                buf = buffers[name]
+                buf.append(row)
+                if len(buf) == CHUNK_SIZE:
+                    self.writers[name].put(buf)
+                    buffers[name] = []
+            for name, buf in buffers.items():
+                if buf:
+                    self.writers[name].put(buf)
+        finally:
+            for writer in self.writers.values():
+                writer.blocks.put(None)
+            self.blocked_seconds = sum(w.blocked_seconds for w in self.writers.values())
+            self.feed_seconds = time.perf_counter() - start
+        return self
+
+    def wait(self):
+        self.rows = sum([writer.wait() for writer in self.writers.values()])
+        return self.rows
+
+def start_table_file(path, label, table, cols, rows, fmt="insert", compress="none", progress=None):
+    """
+    Generate one table's psql script (header, chunked INSERTs or one COPY block,
+    COMMIT) into a TableWriter. Returns once every row has been generated and queued;
+    the caller wait()s on the returned writer for the row count.
+    """
+    writer = TableWriter(path, table, cols, fmt, compress,
+                         table_prologue(label, table, cols, fmt), table_epilogue(fmt), progress)
+    writer.start()
+    return writer.feed(rows)
+
+def write_table_file(path, label, table, cols, rows, fmt="insert", compress="none"):
+    """Synchronous start_table_file(): returns the row count."""
+    return start_table_file(path, label, table, cols, rows, fmt, compress).wait()
+
+def start_partitioned_files(out_dir, label, table, cols, rows, fmt="insert", compress="none", progress=None):
+    """start_table_file() for a --partitioned table: one psql script per partition in out_dir."""
+    writer = PartitionedWriter(lambda name: table_file_path(out_dir, name, compress),
+                               table, cols, fmt, compress, label, progress)
+    writer.start()
+    return writer.feed(rows)
+
+COLS_DEPT = ["department_id", "name", "description", "created_at"]
+COLS_POS = ["position_id", "title", "department_id", "description", "created_at"]
+COLS_EMP = [
+    "employee_id","first_name","last_name","email","phone","address","birth_date",
+    "hire_date","termination_date","active","department_id","position_id","manager_id",
+    "emergency_contacts","notes","created_at"
+]
+COLS_ORG = ["employee_id","depth","path"]
+COLS_PAY = ["payroll_id","employee_id","amount","pay_date","notes","created_at"]
+# (1) Added license_level column
+COLS_LIC = ["license_id","employee_id","license_name","license_level","issued_date","expiry_date","notes","created_at"]
+COLS_SHIFT = ["shift_id","employee_id","day_of_week","start_time","end_time","escalation_order","created_at"]
+
+# --partitioned: payroll is range-partitioned by pay_date year and oncall_shift is
+# list-partitioned by day_of_week (personnel_init_partitioned.sql); each partition
+# gets its own output file, named after the partition table, so partitions can be
+# loaded in parallel.
+PARTITIONS = {
+    'payroll': ["payroll_y%d" % y for y in range(DATE_MIN.year, DATE_MAX.year + 1)],
+    'oncall_shift': ["oncall_shift_d%d" % d for d in range(1, 8)],
+}
+_PAY_DATE = COLS_PAY.index("pay_date")
+_DAY_OF_WEEK = COLS_SHIFT.index("day_of_week")
+PARTITION_OF = {
+    'payroll': lambda row: "payroll_y" + row[_PAY_DATE][:4],
+    'oncall_shift': lambda row: "oncall_shift_d%d" % row[_DAY_OF_WEEK],
+}
+
+def output_tables(table, label, partitioned=False):
+    """(table written to, file label) for each output file of `table`."""
+    if partitioned and table in PARTITIONS:
+        return [(name, "%s (%s)" % (label, name)) for name in PARTITIONS[table]]
+    return [(table, label)]
+
+# Each gen_*_rows function is a generator yielding one formatted row at a time, so the
+# writer only ever holds a single CHUNK_SIZE block. The order of random draws is the
+# same as when the tables were built as full lists, so output is unchanged for a seed.
+
+def gen_department_rows():
     for idx, (name, desc) in enumerate(DEPARTMENTS, start=1):
-        dept_rows.append([str(idx), sql_escape(name), sql_escape(desc), sql_escape(rand_datetime_minute())])
-    with open(dept_file, "w", encoding="utf-8") as f:
-        f.write("-- departments\nBEGIN;\n\n")
-    write_inserts_chunked(dept_file, "department", cols_dept, dept_rows)
-    with open(dept_file, "a", encoding="utf-8") as f:
-        f.write("COMMIT;\n")
-    paths['department'] = dept_file
-
-    # Position
-    pos_file = os.path.join(out_dir, "position.sql")
-    cols_pos = ["position_id", "title", "department_id", "description", "created_at"]
-    pos_rows = []
+        yield [idx, name, desc, rand_datetime_minute()]
+
+def gen_position_rows():
     for idx, (title, dept_idx, desc) in enumerate(POSITIONS, start=1):
-        pos_rows.append([str(idx), sql_escape(title), str(dept_idx), sql_escape(desc), sql_escape(rand_datetime_minute())])
-    with open(pos_file, "w", encoding="utf-8") as f:
-        f.write("-- positions\nBEGIN;\n\n")
-    write_inserts_chunked(pos_file, "position", cols_pos, pos_rows)
-    with open(pos_file, "a", encoding="utf-8") as f:
-        f.write("COMMIT;\n")
-    paths['position'] = pos_file
-
-    # Employees
-    emp_file = os.path.join(out_dir, "employee.sql")
-    cols_emp = [
-        "employee_id","first_name","last_name","email","phone","address","birth_date",
-        "hire_date","termination_date","active","department_id","position_id","manager_id",
-        "emergency_contacts","notes","created_at"
-    ]
-    eids = generate_unique_eids(num_employees)
-    used_emails = set()
-    employees = []               # keep dicts for later
-    manager_of = {}              # employee_id -> manager_id (for cycle detection)
-
-    emp_rows = []
-    for idx in range(num_employees):
-        eid = eids[idx]
+        yield [idx, title, dept_idx, desc, rand_datetime_minute()]
+
+class EmailAllocator:
+    """
+    Hands out unique "first.last[N]@domain" addresses in O(1) with one counter per
+    (base, domain) instead of a set of every issued email.
+
+    A base never ends in a digit (names have none), so base + suffix can only clash
+    with the same base, and the addresses issued for a base are always the next
+    suffix in its sequence: plain, 1, 2, ... With shards, shard k only hands out
+    suffixes congruent to k modulo the shard count (and only shard 0 uses the bare
+    address), so shards never collide either.
+    """
+
+    def __init__(self, shard_index=0, shard_count=1):
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self._issued = {}   # (base, domain) -> number of addresses issued so far
+
+    @classmethod
+    def resume(cls, next_suffixes):
+        """
+        Single allocator that continues after earlier runs: `next_suffixes` maps
+        (base, domain) to the lowest suffix above every address already issued.
+        """
+        emails = cls()
+        emails._issued = dict(next_suffixes)
+        return emails
+
+    def issue(self, base, domain):
+        key = (base, domain)
+        n = self._issued.get(key, 0)
+        self._issued[key] = n + 1
+        suffix = self.shard_index + n * self.shard_count
+        return f"{base}{suffix}@{domain}" if suffix else f"{base}@{domain}"
+
+def gen_employee_rows(num_employees, employees, shard=None, org_policy=DEFAULT_ORG_POLICY, rng=None, append=None):
+    """
+    Yield employee rows. Records each employee in `employees` (an EmployeeStore),
+    which the payroll / license / shift stages read afterwards.
+
+    With `shard` (a ShardSpec) only indices shard.lo..shard.hi-1 are generated; IDs
+    come from eid_at() and email suffixes are partitioned by shard (see EmailAllocator).
+    Managers may come from earlier shards (see OrgChart.for_shard).
+    With `rng` (a numpy Generator) the vectorized backend is used instead.
+    With `append` (a personnel_delta.AppendPlan) the new hires of an --append run are
+    added after the employees already in `employees`: IDs, email allocator and org
+    chart come from the plan, hire dates from its hire_start..hire_end window.
+    """
+    if rng is not None:
+        yield from gen_employee_rows_np(num_employees, employees, rng, shard, org_policy)
+        return
+    hire_date = rand_date
+    if append is not None:
+        eids, emails, org = append.eids, append.emails, append.org
+        lo = len(employees)
+        hi = lo + len(eids)
+        hire_date = lambda: rand_date_between(append.hire_start, append.hire_end)
+    elif shard is None:
+        eids = array.array("i", generate_unique_eids(num_employees))
+        lo, hi = 0, num_employees
+        emails = EmailAllocator()
+        org = OrgChart(org_policy)
+    else:
+        eids = None
+        lo, hi = shard.lo, shard.hi
+        emails = EmailAllocator(shard.index, shard.count)
+        org = OrgChart.for_shard(shard, org_policy)
+    employees.managers = org.parents    # one add() per employee, in store order
+
+    for idx in range(lo, hi):
+        eid = eids[idx - lo] if eids is not None else eid_at(idx, shard.perm)
         first = random.choice(FIRST_NAMES)
         last = random.choice(LAST_NAMES)
         base = f"{first.lower()}.{last.lower()}"
         domain = random.choice(EMAIL_DOMAINS)
-        email = f"{base}@{domain}"
-        suffix = 1
-        while email in used_emails:
-            email = f"{base}{suffix}@{domain}"
-            suffix += 1
-        used_emails.add(email)
+        email = emails.issue(base, domain)
         phone = f"+1{random.randint(2000000000, 9999999999)}"[:15]
         address = generate_address()
 
-        hire_iso = rand_date()
+        hire_iso = hire_date()
         hire_date_obj = datetime.date.fromisoformat(hire_iso)
         birth_latest = hire_date_obj - datetime.timedelta(days=18*365 + 4)
         birth_earliest = hire_date_obj - datetime.timedelta(days=65*365 + 16)
@@ -325,27 +862,18 @@ def generate_files(num_employees=DEFAULT_NUM_EMPLOYEES, out_dir=OUT_DIR_DEFAULT,
         if random.random() < 0.02:
             term_iso = rand_date_between(hire_iso, DATE_MAX.isoformat())
             if not hire_before_termination(hire_iso, term_iso):
-                term_iso = (hire_date_obj + datetime.timedelta(days=30)).isoformat()
-            termination_iso = term_iso
-            active = False
+                term_iso = min(hire_date_obj + datetime.timedelta(days=30), DATE_MAX).isoformat()
+            if hire_before_termination(hire_iso, term_iso):     # a hire on DATE_MAX stays active
+                termination_iso = term_iso
+                active = False
 
         dept_id = random.randint(1, len(DEPARTMENTS))
         valid_positions = [i+1 for i,(_,d,_) in enumerate(POSITIONS) if d == dept_id]
         pos_id = random.choice(valid_positions) if valid_positions else random.randint(1, len(POSITIONS))
 
-        # (2) Manager assignment — acyclic by construction + defensive cycle check
-        manager = None
-        if idx >= ROOT_COUNT_APPROX and random.random() > ALLOW_NULL_MANAGER_PROB:
-            # choose a manager only among already-created employees (guarantees DAG)
-            candidates = eids[:idx]
-            # try a few times to avoid cycles (defensive)
-            for _ in range(5):
-                candidate = random.choice(candidates)
-                if not would_create_cycle(candidate, eid, manager_of):
-                    manager = candidate
-                    break
-            # if after attempts it would still cycle (very unlikely), leave as root
-        manager_of[eid] = manager
+        # (2) Manager assignment — acyclic by construction (see OrgChart)
+        wants_manager = idx >= ROOT_COUNT_APPROX and random.random() > ALLOW_NULL_MANAGER_PROB
+        manager = org.add(eid, dept_id, wants_manager)
 
         ec = {"contacts":[{"name": random.choice(FIRST_NAMES) + " " + random.choice(LAST_NAMES),
                            "phone": f"+1{random.randint(2000000000, 9999999999)}"}]}
@@ -355,151 +883,729 @@ def generate_files(num_employees=DEFAULT_NUM_EMPLOYEES, out_dir=OUT_DIR_DEFAULT,
         if not birth_within_age_range(hire_iso, birth_iso):
             birth_iso = (hire_date_obj - datetime.timedelta(days=30*365)).isoformat()
 
-        emp = {
-            "employee_id": eid,
-            "first": first,
-            "last": last,
-            "email": email,
-            "phone": phone,
-            "address": address,
-            "birth": birth_iso,
-            "hire": hire_iso,
-            "termination": termination_iso,
-            "active": active,
-            "department_id": dept_id,
-            "position_id": pos_id,
-            "manager": manager,
-            "emergency_contacts": ec,
-            "notes": notes,
-            "created_at": created_at
-        }
-        employees.append(emp)
-
-        emp_row = [
-            str(eid), sql_escape(first), sql_escape(last), sql_escape(email), sql_escape(phone), sql_escape(address),
-            sql_escape(birth_iso), sql_escape(hire_iso),
-            sql_escape(termination_iso) if termination_iso else "NULL",
-            "true" if active else "false", str(dept_id), str(pos_id),
-            str(manager) if manager else "NULL",
-            sql_escape(json.dumps(ec)), sql_escape(notes), sql_escape(created_at)
+        employees.append(eid, hire_date_obj.toordinal(), dept_id)
+
+        yield [
+            eid, first, last, email, phone, address, birth_iso, hire_iso, termination_iso,
+            active, dept_id, pos_id, manager, ec, notes, created_at
         ]
-        emp_rows.append(emp_row)
-
-    with open(emp_file, "w", encoding="utf-8") as f:
-        f.write("-- employees\nBEGIN;\n\n")
-    write_inserts_chunked(emp_file, "employee", cols_emp, emp_rows)
-    with open(emp_file, "a", encoding="utf-8") as f:
-        f.write("COMMIT;\n")
-    paths['employee'] = emp_file
-
-    # Payroll
-    payroll_file = os.path.join(out_dir, "payroll.sql")
-    cols_pay = ["payroll_id","employee_id","amount","pay_date","notes","created_at"]
-    pay_rows, pid = [], 1
-    for emp in employees:
+
+def gen_org_path_rows(employees):
+    """
+    (employee_id, depth, path) per employee: `path` is the manager chain from the root
+    down to the employee as an int[] literal, walked up the store's manager positions.
+    Draws no random numbers.
+    """
+    ids, managers = employees.ids, employees.managers
+    for i, eid in enumerate(ids):
+        chain = [eid]
+        j = managers[i]
+        while j >= 0:
+            chain.append(ids[j])
+            j = managers[j]
+        chain.reverse()
+        yield [eid, len(chain), "{" + ",".join(map(str, chain)) + "}"]
+
+def gen_payroll_rows(employees, first_id=1, rng=None):
+    if rng is not None:
+        yield from gen_payroll_rows_np(employees, rng, first_id)
+        return
+    pid = first_id
+    for eid, hire_ord, _ in employees:
+        hire = datetime.date.fromordinal(hire_ord)
         num = random.randint(*PAYROLL_PER_EMP_RANGE)
         for _ in range(num):
-            pay_date = rand_date_between(emp["hire"], DATE_MAX.isoformat())
-            if not hire_before_pay(emp["hire"], pay_date):
-                pay_date = emp["hire"]
+            pay_date = rand_date_between(hire, DATE_MAX.isoformat())
+            if not hire_before_pay(hire, pay_date):
+                pay_date = hire.isoformat()
             amt = round(random.uniform(800, 15000), 2)
             notes = random.choice(NOTES)
             created_at = rand_datetime_minute()
-            pay_rows.append([str(pid), str(emp["employee_id"]), f"{amt:.2f}", sql_escape(pay_date), sql_escape(notes), sql_escape(created_at)])
+            yield [pid, eid, amt, pay_date, notes, created_at]
             pid += 1
-    with open(payroll_file, "w", encoding="utf-8") as f:
-        f.write("-- payroll\nBEGIN;\n\n")
-    write_inserts_chunked(payroll_file, "payroll", cols_pay, pay_rows)
-    with open(payroll_file, "a", encoding="utf-8") as f:
-        f.write("COMMIT;\n")
-    paths['payroll'] = payroll_file
-
-    # (1) Employee licenses with levels
-    lic_file = os.path.join(out_dir, "employee_license.sql")
-    # Added license_level column
-    cols_lic = ["license_id","employee_id","license_name","license_level","issued_date","expiry_date","notes","created_at"]
-    lic_rows, lid = [], 1
-    num_license_emps = max(10, int(num_employees * LICENSE_RATIO))
-    sample_emps = random.sample(employees, num_license_emps)
-    for emp in sample_emps:
+
+def license_employee_count(num_employees):
+    """Employees that get license rows in a run of num_employees (sharded or not)."""
+    return max(10, int(num_employees * LICENSE_RATIO))
+
+def gen_license_rows(employees, num_license_emps, first_id=1, rng=None):
+    """(1) Employee licenses with levels."""
+    if rng is not None:
+        yield from gen_license_rows_np(employees, num_license_emps, rng, first_id)
+        return
+    lid = first_id
+    # sampling positions draws exactly as sampling the records themselves would
+    sample_emps = random.sample(range(len(employees)), num_license_emps)
+    for i in sample_emps:
+        eid, hire = employees.ids[i], datetime.date.fromordinal(employees.hire[i])
         for _ in range(random.randint(*LICENSE_PER_EMP_RANGE)):
             lic = random.choice(LICENSES)
             level = random.randint(1, lic["max_level"])
             disp_name = f"{lic['name']} (Level {level})"
-            issued = rand_date_between(emp["hire"], DATE_MAX.isoformat())
+            issued = rand_date_between(hire, DATE_MAX.isoformat())
             issued_dt = datetime.date.fromisoformat(issued)
             expiry_dt = issued_dt + datetime.timedelta(days=random.randint(365, 365*5))
             if expiry_dt > DATE_MAX:
                 expiry_dt = DATE_MAX
             notes = random.choice(NOTES)
             created_at = rand_datetime_minute()
-            lic_rows.append([
-                str(lid), str(emp["employee_id"]),
-                sql_escape(disp_name), str(level),
-                sql_escape(issued), sql_escape(expiry_dt.isoformat()),
-                sql_escape(notes), sql_escape(created_at)
-            ])
+            yield [lid, eid, disp_name, level, issued, expiry_dt.isoformat(), notes, created_at]
             lid += 1
-    with open(lic_file, "w", encoding="utf-8") as f:
-        f.write("-- employee_license\nBEGIN;\n\n")
-    write_inserts_chunked(lic_file, "employee_license", cols_lic, lic_rows)
-    with open(lic_file, "a", encoding="utf-8") as f:
-        f.write("COMMIT;\n")
-    paths['employee_license'] = lic_file
-
-    # (3) On-call shifts — non-overlapping per day, sequential escalation_order
-    shift_file = os.path.join(out_dir, "oncall_shift.sql")
-    cols_shift = ["shift_id","employee_id","day_of_week","start_time","end_time","escalation_order","created_at"]
-    shift_rows, sid = [], 1
-
-    def gen_day_shifts():
-        """Generate a non-overlapping set of (start_hour, start_min, end_hour, end_min) for a single day."""
-        count = random.randint(ONCALL_MIN_SHIFTS_PER_DAY, ONCALL_MAX_SHIFTS_PER_DAY)
-        if count == 0:
-            return []
-        # sample start times, then expand with duration and prune overlaps
-        candidates = []
-        for _ in range(count * 2):  # extra candidates in case of pruning
-            sh = random.randint(ONCALL_START_WINDOW[0], ONCALL_START_WINDOW[1])
-            sm = random.choice(TIME_MINUTE_CHOICES)
-            dur = random.randint(ONCALL_SHIFT_MIN_HOURS, ONCALL_SHIFT_MAX_HOURS)
-            eh = min(23, sh + dur)
-            em = sm
-            if eh == sh and dur == 0:  # guard (shouldn't happen)
-                eh = min(23, sh + 1)
-            candidates.append((sh, sm, eh, em))
-        # sort by start, then select greedily non-overlapping
-        candidates.sort()
-        selected = []
-        cur_end = (-1, -1)
-        for sh, sm, eh, em in candidates:
-            if (sh, sm) >= cur_end:
-                selected.append((sh, sm, eh, em))
-                cur_end = (eh, em)
-                if len(selected) >= count:
+
+class ShiftLibrary:
+    """
+    Precomputed on-call schedules. The daily library holds up to ONCALL_DAY_TEMPLATES
+    schedules per shift count (ONCALL_MIN..MAX_SHIFTS_PER_DAY): shifts start in
+    ONCALL_START_WINDOW on a TIME_MINUTE_CHOICES minute, last ONCALL_SHIFT_MIN..MAX_HOURS
+    (capped at 23:xx) and each starts no earlier than the previous one ends. The weekly
+    library holds ONCALL_WEEK_TEMPLATES weeks of daily schedules, the count of each day
+    drawn with ONCALL_SHIFTS_PER_DAY_WEIGHTS, already laid out as (day_of_week, start,
+    end, escalation_order) rows. Both are built from their own Random(seed); the seed
+    comes from the run (see gen_shift_rows), so another --seed gives another library.
+    """
+
+    def __init__(self, seed=0):
+        rng = random.Random(seed)
+        counts = range(ONCALL_MIN_SHIFTS_PER_DAY, ONCALL_MAX_SHIFTS_PER_DAY + 1)
+        weights = ONCALL_SHIFTS_PER_DAY_WEIGHTS or [1] * len(counts)
+        shifts = sorted(set(
+            ((sh, sm), (min(23, sh + dur), sm))
+            for sh in range(ONCALL_START_WINDOW[0], ONCALL_START_WINDOW[1] + 1)
+            for sm in TIME_MINUTE_CHOICES
+            for dur in range(ONCALL_SHIFT_MIN_HOURS, ONCALL_SHIFT_MAX_HOURS + 1)
+            if (min(23, sh + dur), sm) > (sh, sm)))
+        self.days = {k: self._day_templates(rng, shifts, k) for k in counts}
+        counts, weights = zip(*[(k, w) for k, w in zip(counts, weights) if self.days[k] and w > 0])
+        self.weeks = []
+        for _ in range(ONCALL_WEEK_TEMPLATES):
+            week = []
+            for dow, k in enumerate(rng.choices(counts, weights, k=7), start=1):
+                for order, (start, end) in enumerate(rng.choice(self.days[k]), start=1):
+                    week.append((dow, start, end, order))
+            self.weeks.append(tuple(week))
+
+    @staticmethod
+    def _day_templates(rng, shifts, count):
+        """Up to ONCALL_DAY_TEMPLATES distinct non-overlapping days of `count` shifts ('HH:MM' pairs)."""
+        starts = [start for start, _ in shifts]
+        found = set()
+        for _ in range(ONCALL_DAY_TEMPLATES * 4):
+            day, free = [], (0, 0)
+            for _ in range(count):
+                lo = bisect.bisect_left(starts, free)
+                if lo == len(shifts):
+                    break
+                start, end = shifts[rng.randrange(lo, len(shifts))]
+                day.append(start + end)
+                free = end
+            if len(day) == count:
+                found.add(tuple(day))
+                if len(found) >= ONCALL_DAY_TEMPLATES:
                     break
-        return selected
-
-    for emp in employees:
-        for dow in range(1, 8):  # 1=Mon..7=Sun
-            day_shifts = gen_day_shifts()
-            # assign escalation_order sequentially
-            for order, (sh, sm, eh, em) in enumerate(day_shifts, start=1):
-                start = f"{sh:02d}:{sm:02d}"
-                end = f"{eh:02d}:{em:02d}"
-                created_at = rand_datetime_minute()
-                shift_rows.append([
-                    str(sid), str(emp["employee_id"]), str(dow),
-                    sql_escape(start), sql_escape(end), str(order), sql_escape(created_at)
-                ])
-                sid += 1
-
-    with open(shift_file, "w", encoding="utf-8") as f:
-        f.write("-- oncall_shift\nBEGIN;\n\n")
-    write_inserts_chunked(shift_file, "oncall_shift", cols_shift, shift_rows)
-    with open(shift_file, "a", encoding="utf-8") as f:
-        f.write("COMMIT;\n")
-    paths['oncall_shift'] = shift_file
+        return [tuple(("%02d:%02d" % (sh, sm), "%02d:%02d" % (eh, em)) for sh, sm, eh, em in day)
+                for day in sorted(found)]
+
+_SHIFT_LIBRARY = None
+
+def shift_library(seed):
+    """The ShiftLibrary for `seed` (the last one built is kept)."""
+    global _SHIFT_LIBRARY
+    if _SHIFT_LIBRARY is None or _SHIFT_LIBRARY[0] != seed:
+        _SHIFT_LIBRARY = (seed, ShiftLibrary(seed))
+    return _SHIFT_LIBRARY[1]
+
+def gen_shift_rows(employees, first_id=1, start=0, library_seed=None):
+    """
+    (3) On-call shifts — non-overlapping per day, sequential escalation_order (from store
+    position `start` on): each employee gets one week from the ShiftLibrary, drawn by
+    index, and one created_at for all of its rows. The library is seeded with
+    `library_seed` (sharded runs pass one per run), else with a draw from the run's stream.
+    """
+    if library_seed is None:
+        library_seed = random.getrandbits(64)
+    weeks = shift_library(library_seed).weeks
+    pick = random.randrange
+    sid = first_id
+    for eid in itertools.islice(employees.ids, start, None):
+        m = pick(_TOTAL_MINUTES + 1)     # the rand_datetime_minute() draw, through the lookup tables
+        created_at = _DAY_ISO[_DT_MIN_DAY + m // 1440] + " " + _HHMM[m % 1440]
+        for dow, start_time, end_time, order in weeks[pick(len(weeks))]:
+            yield [sid, eid, dow, start_time, end_time, order, created_at]
+            sid += 1
+
+# --------------------------- Vectorized (NumPy) backend ---------------------------
+# --backend numpy draws whole columns per CHUNK_SIZE block from a numpy Generator.
+# Dates are day ordinals and timestamps are minutes since DT_MIN; they are turned
+# into strings through lookup tables only when the rows are built. Email
+# uniqueness and manager assignment stay per-row (they depend on earlier rows),
+# and so do the row lists, emergency-contact dicts and string columns. Those
+# per-row steps bound the employee stage: it gains ~2x over the python backend
+# (EmailAllocator.issue + OrgChart.add alone cap it near 6x), payroll ~6x and
+# licenses ~5x - short of 10x.
+# The same constraints hold as in the per-row backend: age at hire 18..65,
+# termination after hire, pay/issue dates on or after hire, expiry <= DATE_MAX.
+
+BIRTH_MIN_DAYS = 18*365 + 4      # hire - birth bounds, as in the per-row backend
+BIRTH_MAX_DAYS = 65*365 + 16
+TERMINATION_PROB = 0.02
+EMPLOYEE_NOTES_PROB = 0.35
+PAY_AMOUNT_RANGE = (800, 15000)
+
+# ISO strings for every day a generated date can fall on (oldest birth date to
+# hire + 30 days), indexed by ordinal - _DAY_BASE
+_DAY_BASE = DATE_MIN.toordinal() - BIRTH_MAX_DAYS - 1
+_DAY_ISO = [datetime.date.fromordinal(o).isoformat()
+            for o in range(_DAY_BASE, DATE_MAX.toordinal() + 32)]
+_HHMM = [f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)]
+_TOTAL_MINUTES = int((DT_MAX - DT_MIN).total_seconds() // 60)
+_DT_MIN_DAY = DATE_MIN.toordinal() - _DAY_BASE
+
+def require_numpy():
+    if np is None:
+        sys.exit("--backend numpy requires the 'numpy' package (pip install numpy)")
+    return np
+
+def np_rng(seed=None):
+    """numpy Generator for the vectorized backend, derived from the `random` module state."""
+    return require_numpy().random.default_rng(random.getrandbits(64) if seed is None else seed)
+
+def np_store_columns(employees):
+    """int64 arrays of an EmployeeStore's id and hire-ordinal columns."""
+    return (np.frombuffer(employees.ids, dtype=np.intc).astype(np.int64),
+            np.frombuffer(employees.hire, dtype=np.intc).astype(np.int64))
+
+def np_day_iso(ordinals):
+    return [_DAY_ISO[o - _DAY_BASE] for o in ordinals.tolist()]
+
+def np_minute_iso(rng, n):
+    """n random 'YYYY-MM-DD HH:MM' strings in [DT_MIN, DT_MAX] (like rand_datetime_minute)."""
+    mins = rng.integers(0, _TOTAL_MINUTES, n, endpoint=True).tolist()
+    return [_DAY_ISO[_DT_MIN_DAY + m // 1440] + " " + _HHMM[m % 1440] for m in mins]
+
+def np_between(rng, start_ord, end_ord):
+    """Uniform day ordinal in [start, end] per element (like rand_date_between)."""
+    return start_ord + rng.integers(0, np.maximum(end_ord - start_ord, 0), endpoint=True)
+
+_day_parts = None
+
+def np_age_years(hire_ord, birth_ord):
+    """Completed years between birth and hire, element-wise (as birth_within_age_range)."""
+    global _day_parts
+    if _day_parts is None:
+        # (year, month*100 + day) for every ordinal in the _DAY_ISO table
+        _day_parts = (np.array([int(iso[:4]) for iso in _DAY_ISO]),
+                      np.array([int(iso[5:7]) * 100 + int(iso[8:10]) for iso in _DAY_ISO]))
+    year, month_day = _day_parts
+    h, b = hire_ord - _DAY_BASE, birth_ord - _DAY_BASE
+    return year[h] - year[b] - (month_day[h] < month_day[b])
+
+def _positions_by_department():
+    by_dept = [[i + 1 for i, (_, d, _) in enumerate(POSITIONS) if d == dept]
+               for dept in range(1, len(DEPARTMENTS) + 1)]
+    width = max(len(p) for p in by_dept)
+    table = np.array([p + [0] * (width - len(p)) for p in by_dept])
+    return table, np.array([len(p) for p in by_dept])
+
+def gen_employee_rows_np(num_employees, employees, rng, shard=None, org_policy=DEFAULT_ORG_POLICY):
+    """Vectorized gen_employee_rows: same columns, constraints and shard handling."""
+    if shard is None:
+        eids = array.array("i", generate_unique_eids(num_employees))
+        lo, hi, shard_index, shard_count = 0, num_employees, 0, 1
+    else:
+        eids = None
+        lo, hi, shard_index, shard_count = shard.lo, shard.hi, shard.index, shard.count
+    emails = EmailAllocator(shard_index, shard_count)
+    org = OrgChart(org_policy) if shard is None else OrgChart.for_shard(shard, org_policy)
+    employees.managers = org.parents    # one add() per employee, in store order
+    pos_table, pos_counts = _positions_by_department()
+    date_min, date_max = DATE_MIN.toordinal(), DATE_MAX.toordinal()
+
+    for start in range(lo, hi, CHUNK_SIZE):
+        idxs = np.arange(start, min(start + CHUNK_SIZE, hi))
+        n = len(idxs)
+        firsts = rng.integers(0, len(FIRST_NAMES), n).tolist()
+        lasts = rng.integers(0, len(LAST_NAMES), n).tolist()
+        domains = rng.integers(0, len(EMAIL_DOMAINS), n).tolist()
+        phones = rng.integers(2000000000, 9999999999, n, endpoint=True).tolist()
+        addr_nums = rng.integers(1, 9999, n, endpoint=True).tolist()
+        addr_names = rng.integers(0, len(STREET_NAMES), n).tolist()
+        addr_sfx = rng.integers(0, len(STREET_SUFFIXES), n).tolist()
+
+        hire = rng.integers(date_min, date_max, n, endpoint=True)
+        birth = np_between(rng, hire - BIRTH_MAX_DAYS, hire - BIRTH_MIN_DAYS)
+        age = np_age_years(hire, birth)
+        birth = np.where((age >= 18) & (age <= 65), birth, hire - 30*365)
+
+        terminated = rng.random(n) < TERMINATION_PROB
+        term = np_between(rng, hire, np.full(n, date_max))
+        term = np.where(term > hire, term, np.minimum(hire + 30, date_max))     # hire_before_termination
+        terminated &= term > hire                         # a hire on date_max stays active
+
+        dept = rng.integers(1, len(DEPARTMENTS), n, endpoint=True)
+        pos = pos_table[dept - 1, (rng.random(n) * pos_counts[dept - 1]).astype(np.int64)]
+        wants_manager = ((idxs >= ROOT_COUNT_APPROX) & (rng.random(n) > ALLOW_NULL_MANAGER_PROB)).tolist()
+        manager_u = rng.random(n).tolist()
+
+        ec_firsts = rng.integers(0, len(FIRST_NAMES), n).tolist()
+        ec_lasts = rng.integers(0, len(LAST_NAMES), n).tolist()
+        ec_phones = rng.integers(2000000000, 9999999999, n, endpoint=True).tolist()
+        note_idx = np.where(rng.random(n) < EMPLOYEE_NOTES_PROB, rng.integers(0, len(NOTES), n), -1).tolist()
+        created = np_minute_iso(rng, n)
+
+        hire_iso, birth_iso, term_iso = np_day_iso(hire), np_day_iso(birth), np_day_iso(term)
+        hire, dept, pos, terminated = hire.tolist(), dept.tolist(), pos.tolist(), terminated.tolist()
+        for j, idx in enumerate(idxs.tolist()):
+            eid = eids[idx] if eids is not None else eid_at(idx, shard.perm)
+            first, last = FIRST_NAMES[firsts[j]], LAST_NAMES[lasts[j]]
+            email = emails.issue(f"{first.lower()}.{last.lower()}", EMAIL_DOMAINS[domains[j]])
+            phone = f"+1{phones[j]}"
+            address = f"{addr_nums[j]} {STREET_NAMES[addr_names[j]]} {STREET_SUFFIXES[addr_sfx[j]]}"
+            termination_iso = term_iso[j] if terminated[j] else None
+            manager = org.add(eid, dept[j], wants_manager[j], manager_u[j])
+            ec = {"contacts": [{"name": FIRST_NAMES[ec_firsts[j]] + " " + LAST_NAMES[ec_lasts[j]],
+                                "phone": f"+1{ec_phones[j]}"}]}
+            notes = NOTES[note_idx[j]] if note_idx[j] >= 0 else ""
+            employees.append(eid, hire[j], dept[j])
+            yield [
+                eid, first, last, email, phone, address, birth_iso[j], hire_iso[j], termination_iso,
+                not terminated[j], dept[j], pos[j], manager, ec, notes, created[j]
+            ]
+
+def gen_payroll_rows_np(employees, rng, first_id=1):
+    """Vectorized gen_payroll_rows: pay_date in [hire, DATE_MAX], so never before hire."""
+    pid = first_id
+    date_max = DATE_MAX.toordinal()
+    all_ids, all_hire = np_store_columns(employees)
+    for start in range(0, len(employees), CHUNK_SIZE):
+        emp_ids, hire = all_ids[start:start + CHUNK_SIZE], all_hire[start:start + CHUNK_SIZE]
+        per_emp = rng.integers(PAYROLL_PER_EMP_RANGE[0], PAYROLL_PER_EMP_RANGE[1], len(emp_ids), endpoint=True)
+        emp_ids, hire = np.repeat(emp_ids, per_emp), np.repeat(hire, per_emp)
+        n = len(emp_ids)
+        pay = np.maximum(np_between(rng, hire, np.full(n, date_max)), hire)     # hire_before_pay
+        amounts = np.round(rng.uniform(*PAY_AMOUNT_RANGE, n), 2).tolist()
+        notes = rng.integers(0, len(NOTES), n).tolist()
+        created = np_minute_iso(rng, n)
+        for j, (eid, pay_iso) in enumerate(zip(emp_ids.tolist(), np_day_iso(pay))):
+            yield [pid, eid, amounts[j], pay_iso, NOTES[notes[j]], created[j]]
+            pid += 1
+
+def gen_license_rows_np(employees, num_license_emps, rng, first_id=1):
+    """Vectorized gen_license_rows: issued in [hire, DATE_MAX], expiry clipped to DATE_MAX."""
+    lid = first_id
+    date_max = DATE_MAX.toordinal()
+    max_level = np.array([lic["max_level"] for lic in LICENSES])
+    all_ids, all_hire = np_store_columns(employees)
+    picked = rng.choice(len(employees), num_license_emps, replace=False)
+    for start in range(0, len(picked), CHUNK_SIZE):
+        block = picked[start:start + CHUNK_SIZE]
+        emp_ids, hire = all_ids[block], all_hire[block]
+        per_emp = rng.integers(LICENSE_PER_EMP_RANGE[0], LICENSE_PER_EMP_RANGE[1], len(block), endpoint=True)
+        emp_ids, hire = np.repeat(emp_ids, per_emp), np.repeat(hire, per_emp)
+        n = len(emp_ids)
+        lic = rng.integers(0, len(LICENSES), n)
+        level = (1 + rng.random(n) * max_level[lic]).astype(np.int64)
+        issued = np_between(rng, hire, np.full(n, date_max))
+        expiry = np.minimum(issued + rng.integers(365, 365*5, n, endpoint=True), date_max)
+        notes = rng.integers(0, len(NOTES), n).tolist()
+        created = np_minute_iso(rng, n)
+        lic, level = lic.tolist(), level.tolist()
+        for j, (eid, issued_iso, expiry_iso) in enumerate(zip(emp_ids.tolist(), np_day_iso(issued), np_day_iso(expiry))):
+            yield [lid, eid, f"{LICENSES[lic[j]]['name']} (Level {level[j]})", level[j],
+                   issued_iso, expiry_iso, NOTES[notes[j]], created[j]]
+            lid += 1
+
+# --------------------------- Sharded generation ---------------------------
+
+# One shard = a contiguous employee index range [lo, hi) generated in its own process.
+# `licenses` is the shard's share of the run's license_employee_count(); every shard
+# builds the same ShiftLibrary from `shift_seed`.
+ShardSpec = collections.namedtuple("ShardSpec", "index count lo hi perm seed org_policy licenses shift_seed")
+
+# Upper bounds on child rows per employee. Shard k numbers its child rows from
+# lo * stride + 1, so IDs never collide across shards (gaps are left between shards).
+PAYROLL_ID_STRIDE = PAYROLL_PER_EMP_RANGE[1]
+LICENSE_ID_STRIDE = LICENSE_PER_EMP_RANGE[1]
+SHIFT_ID_STRIDE = 7 * ONCALL_MAX_SHIFTS_PER_DAY
+
+# (table, counts key, file label, columns) for the tables that are generated per shard
+SHARDED_TABLES = [
+    ('employee', 'employees', "employees", COLS_EMP),
+    ('payroll', 'payroll', "payroll", COLS_PAY),
+    ('employee_license', 'licenses', "employee_license", COLS_LIC),
+    ('oncall_shift', 'shifts', "oncall_shift", COLS_SHIFT),
+]
+# A manager may sit in an earlier shard, so paths are walked by the parent process
+# over all shards' ids and manager positions (chart parts, 8 bytes per employee).
+ORG_PATH_TABLE = ('employee_org_path', 'org_paths', "employee_org_path", COLS_ORG)
+
+def chart_part_path(parts_dir, index):
+    """Shard `index`'s employee ids followed by its manager positions (raw int32 arrays)."""
+    return os.path.join(parts_dir, "chart.part%04d.bin" % index)
+
+def plan_shards(num_employees, workers, seed, org_policy=DEFAULT_ORG_POLICY):
+    """
+    Split the employee index range into `workers` shards with seeds derived from `seed`.
+    The run's license employees are split in proportion to the shard sizes, so the
+    total is the same as with one process.
+    """
+    perm = eid_permutation(f"{seed}/eids")
+    licenses = license_employee_count(num_employees)
+    step, extra = divmod(num_employees, workers)
+    shards, lo = [], 0
+    for k in range(workers):
+        hi = lo + step + (1 if k < extra else 0)
+        share = licenses * hi // num_employees - licenses * lo // num_employees
+        shards.append(ShardSpec(k, workers, lo, hi, perm, f"{seed}/shard{k}", org_policy, share, f"{seed}/shifts"))
+        lo = hi
+    return shards
+
+def generate_shard(shard, parts_dir, fmt="insert", compress="none", backend="python", partitioned=False,
+                   manifest=False):
+    """
+    Worker entry point: generate one shard's employees and their payroll, licenses and
+    shifts into part files (rows only, no header/COMMIT), one per partition if `partitioned`,
+    and its chart part (chart_part_path) for the org paths.
+    With `manifest`, the shard's manifest goes into its own directory under parts_dir.
+    Returns (part paths by output table, counts, employee store bytes, manifest directory or None).
+    """
+    random.seed(shard.seed)
+    rng = np_rng() if backend == "numpy" else None
+    employees = EmployeeStore()
+    stages = {
+        'employee': gen_employee_rows(None, employees, shard, shard.org_policy, rng=rng),
+        'payroll': gen_payroll_rows(employees, shard.lo * PAYROLL_ID_STRIDE + 1, rng=rng),
+        'employee_license': gen_license_rows(employees, shard.licenses, shard.lo * LICENSE_ID_STRIDE + 1, rng=rng),
+        'oncall_shift': gen_shift_rows(employees, shard.lo * SHIFT_ID_STRIDE + 1, library_seed=shard.shift_seed),
+    }
+    recorder = None
+    if manifest:
+        from personnel_delta import ManifestRecorder
+        recorder = ManifestRecorder()
+        stages = {table: recorder.tap(table, rows) for table, rows in stages.items()}
+    part_path = lambda name: os.path.join(parts_dir, "%s.part%04d.sql%s" % (name, shard.index, COMPRESSIONS[compress]))
+    parts, writers = {}, {}
+    for table, count_key, _, cols in SHARDED_TABLES:
+        if partitioned and table in PARTITIONS:
+            writers[count_key] = PartitionedWriter(part_path, table, cols, fmt, compress)
+            parts.update(writers[count_key].paths)
+        else:
+            parts[table] = part_path(table)
+            writers[count_key] = TableWriter(parts[table], table, cols, fmt, compress)
+        writers[count_key].start()
+        writers[count_key].feed(stages[table])
+    counts = {count_key: writer.wait() for count_key, writer in writers.items()}
+    with open(chart_part_path(parts_dir, shard.index), "wb") as f:
+        employees.ids.tofile(f)
+        employees.managers.tofile(f)
+    manifest_dir = None
+    if recorder is not None:
+        manifest_dir = os.path.join(parts_dir, "manifest.part%04d" % shard.index)
+        recorder.save(manifest_dir, employees, DATE_MAX.strftime("%Y-%m"))
+    return parts, counts, employees.nbytes(), manifest_dir
+
+def merge_parts(path, label, table, cols, part_paths, fmt="insert", compress="none"):
+    """
+    Concatenate shard part files, in shard order, between the table's header and COMMIT.
+    gzip members and zstd frames may be concatenated, so parts are copied byte-for-byte.
+    """
+    with open(path, "wb") as out:
+        out.write(compress_text(table_prologue(label, table, cols, fmt), compress))
+        for part in part_paths:
+            with open(part, "rb") as f:
+                shutil.copyfileobj(f, out, 1 << 20)
+            os.remove(part)
+        out.write(compress_text(table_epilogue(fmt), compress))
+
+def generate_sharded(num_employees, out_dir, workers, seed, paths, counts, fmt="insert", compress="none",
+                     org_policy=DEFAULT_ORG_POLICY, backend="python", partitioned=False, manifest=False):
+    """
+    Generate employee, payroll, employee_license and oncall_shift with one process per
+    shard and merge the parts in shard order (managers always precede their reports);
+    employee_org_path is then walked over all shards' charts.
+    With `manifest`, the shards' manifests are merged into out_dir/manifest too.
+    Returns the total size of the shards' employee stores in bytes.
+    """
+    shards = plan_shards(num_employees, workers, seed, org_policy)
+    parts_dir = os.path.join(out_dir, "parts")
+    os.makedirs(parts_dir, exist_ok=True)
+    with multiprocessing.Pool(len(shards), set_date_max, (DATE_MAX,)) as pool:
+        results = pool.starmap(generate_shard, [(shard, parts_dir, fmt, compress, backend, partitioned, manifest)
+                                                for shard in shards])
+    for table, count_key, label, cols in SHARDED_TABLES:
+        for name, name_label in output_tables(table, label, partitioned):
+            paths[name] = table_file_path(out_dir, name, compress)
+            merge_parts(paths[name], name_label, name, cols, [parts[name] for parts, _, _, _ in results], fmt, compress)
+        counts[count_key] = sum(shard_counts[count_key] for _, shard_counts, _, _ in results)
+    chart = EmployeeStore()     # ids and managers only
+    for shard in shards:
+        with open(chart_part_path(parts_dir, shard.index), "rb") as f:
+            chart.ids.fromfile(f, shard.hi - shard.lo)
+            chart.managers.fromfile(f, shard.hi - shard.lo)
+        os.remove(chart_part_path(parts_dir, shard.index))
+    table, count_key, label, cols = ORG_PATH_TABLE
+    paths[table] = table_file_path(out_dir, table, compress)
+    counts[count_key] = write_table_file(paths[table], label, table, cols, gen_org_path_rows(chart), fmt, compress)
+    if manifest:
+        from personnel_delta import merge_manifests
+        part_dirs = [manifest_dir for _, _, _, manifest_dir in results]
+        paths['manifest'] = merge_manifests(out_dir, part_dirs)
+        for part in part_dirs:
+            shutil.rmtree(part)
+    os.rmdir(parts_dir)
+    return sum(store_bytes for _, _, store_bytes, _ in results)
+
+# --------------------------- Instrumentation ---------------------------
+
+def expected_rows(num_employees):
+    """Rough row count per table (means of the per-employee ranges), for progress ETAs."""
+    mean = lambda lo_hi: (lo_hi[0] + lo_hi[1]) / 2.0
+    return {
+        'department': len(DEPARTMENTS),
+        'position': len(POSITIONS),
+        'employee': num_employees,
+        'employee_org_path': num_employees,
+        'payroll': int(num_employees * mean(PAYROLL_PER_EMP_RANGE)),
+        'employee_license': int(license_employee_count(num_employees) * mean(LICENSE_PER_EMP_RANGE)),
+        'oncall_shift': int(num_employees * 7 * mean((ONCALL_MIN_SHIFTS_PER_DAY, ONCALL_MAX_SHIFTS_PER_DAY))),
+    }
+
+class RunMetrics:
+    """
+    Instrumentation for one generate_files run: wall time, rows and rows/sec per stage,
+    bytes per output file, and, if `report` is given, progress lines with an ETA
+    (against `expected` rows per table) at most every `interval` seconds.
+    progress() is the TableWriter callback and may be called from several threads.
+    """
+
+    def __init__(self, expected=None, report=None, interval=PROGRESS_SECONDS):
+        self.expected = expected or {}
+        self.report = report
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.finished = None
+        self.stages = collections.OrderedDict()   # name -> {'seconds', 'rows'}
+        self.bytes = {}
+        self._rows = {}                           # table -> rows written so far
+        self._last_report = self.started
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, rows=0):
+        entry = self.stages.setdefault(name, {'seconds': 0.0, 'rows': 0})
+        entry['seconds'] += seconds
+        entry['rows'] += rows
+
+    def add_writer(self, writer):
+        """
+        Record a finished TableWriter / PartitionedWriter: generation time on the feeding
+        thread, then writing (summed over the partition writers).
+        """
+        self.add('generate ' + writer.table, writer.feed_seconds - writer.blocked_seconds, writer.rows)
+        self.add('write ' + writer.table, writer.busy_seconds, writer.rows)
+        for w in getattr(writer, 'writers', {writer.table: writer}).values():
+            self.bytes[w.table] = os.path.getsize(w.path)
+
+    def progress(self, table, rows, done):
+        with self._lock:
+            self._rows[table] = rows
+            now = time.perf_counter()
+            if self.report is None or (not done and now - self._last_report < self.interval):
+                return
+            self._last_report = now
+            line = '  %s: %d rows%s' % (table, rows, ' (done)' if done else '')
+            total, expected = sum(self._rows.values()), sum(self.expected.values())
+            elapsed = now - self.started
+            if total and expected > total:
+                eta = elapsed * (expected - total) / total
+                line += ' | ~%d%% of all rows, %.0f rows/s, ETA %s' % (
+                    100 * total // expected, total / elapsed, datetime.timedelta(seconds=int(eta)))
+        self.report(line)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def as_dict(self):
+        end = self.finished or time.perf_counter()
+        stages = collections.OrderedDict()
+        for name, entry in self.stages.items():
+            stages[name] = {
+                'seconds': round(entry['seconds'], 4),
+                'rows': entry['rows'],
+                'rows_per_sec': round(entry['rows'] / entry['seconds'], 1) if entry['rows'] and entry['seconds'] > 0 else None,
+            }
+        return {'total_seconds': round(end - self.started, 4), 'stages': stages, 'bytes': dict(self.bytes)}
+
+    def summary_lines(self):
+        data = self.as_dict()
+        lines = ['%-26s %10s %10s %12s' % ('stage', 'seconds', 'rows', 'rows/s')]
+        for name, st in data['stages'].items():
+            lines.append('%-26s %10.3f %10d %12s' % (name, st['seconds'], st['rows'],
+                                                     '%.0f' % st['rows_per_sec'] if st['rows_per_sec'] else '-'))
+        lines.append('%-26s %10.3f' % ('total (wall)', data['total_seconds']))
+        lines.append('bytes written: %d' % sum(data['bytes'].values()))
+        return lines
+
+# functions whose cumulative time goes into the --profile metrics as "hotspots"
+PROFILE_HOTSPOTS = [
+    ('OrgChart.add', 'manager assignment'),
+    ('EmailAllocator.issue', 'email allocation'),
+    ('gen_employee_rows', 'employee rows'),
+    ('gen_org_path_rows', 'org paths'),
+    ('gen_payroll_rows', 'payroll rows'),
+    ('gen_license_rows', 'license rows'),
+    ('gen_shift_rows', 'shift rows'),
+    ('ShiftLibrary.__init__', 'shift library'),
+]
+
+def profile_hotspots(profiler):
+    """Cumulative seconds and call counts of PROFILE_HOTSPOTS in a finished cProfile.Profile."""
+    stats = pstats.Stats(profiler).stats
+    found = {}
+    for qualname, label in PROFILE_HOTSPOTS:
+        obj = globals()[qualname.split('.')[0]]
+        for attr in qualname.split('.')[1:]:
+            obj = getattr(obj, attr)
+        code = obj.__code__
+        entry = stats.get((code.co_filename, code.co_firstlineno, code.co_name))
+        if entry is not None:
+            found[label] = {'function': qualname, 'calls': entry[1], 'cumulative_seconds': round(entry[3], 4)}
+    return found
+
+def write_profile(profiler, metrics, out_dir, extra=None):
+    """
+    Write profile.pstats (load with pstats / snakeviz), profile.txt (top functions by
+    cumulative time) and metrics.json (RunMetrics plus the profile hotspots) into out_dir.
+    Only the main (generating) thread is profiled, not the TableWriter threads.
+    """
+    paths = {
+        'profile': os.path.join(out_dir, 'profile.pstats'),
+        'profile_text': os.path.join(out_dir, 'profile.txt'),
+        'metrics': os.path.join(out_dir, 'metrics.json'),
+    }
+    profiler.dump_stats(paths['profile'])
+    with open(paths['profile_text'], 'w', encoding='utf-8') as f:
+        pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(40)
+    data = metrics.as_dict()
+    data['hotspots'] = profile_hotspots(profiler)
+    data.update(extra or {})
+    with open(paths['metrics'], 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    return paths
+
+# --------------------------- Entry point ---------------------------
+
+# (sequence, table, id column) for every SERIAL id the generator fills explicitly
+SEQUENCES = [
+    ('department_department_id_seq', 'department', 'department_id'),
+    ('position_position_id_seq', 'position', 'position_id'),
+    ('employee_employee_id_seq', 'employee', 'employee_id'),
+    ('payroll_payroll_id_seq', 'payroll', 'payroll_id'),
+    ('employee_license_license_id_seq', 'employee_license', 'license_id'),
+    ('oncall_shift_shift_id_seq', 'oncall_shift', 'shift_id'),
+]
+
+def sequence_statements():
+    """setval() statements that move each sequence past the explicitly inserted ids."""
+    return ["SELECT setval('%s', (SELECT COALESCE(MAX(%s),0) FROM %s), true);" % (seq_name, col, table)
+            for seq_name, table, col in SEQUENCES]
+
+def table_sources(num_employees, employees, org_policy=DEFAULT_ORG_POLICY, rng=None):
+    """
+    (table, counts key, file label, columns, row generator) for all seven tables, in
+    load order. The generators are lazy and share `employees`, so they must be
+    consumed in this order.
+    """
+    return [
+        ('department', 'departments', "departments", COLS_DEPT, gen_department_rows()),
+        ('position', 'positions', "positions", COLS_POS, gen_position_rows()),
+        ('employee', 'employees', "employees", COLS_EMP,
+         gen_employee_rows(num_employees, employees, org_policy=org_policy, rng=rng)),
+        ('employee_org_path', 'org_paths', "employee_org_path", COLS_ORG, gen_org_path_rows(employees)),
+        ('payroll', 'payroll', "payroll", COLS_PAY, gen_payroll_rows(employees, rng=rng)),
+        ('employee_license', 'licenses', "employee_license", COLS_LIC,
+         gen_license_rows(employees, license_employee_count(num_employees), rng=rng)),
+        ('oncall_shift', 'shifts', "oncall_shift", COLS_SHIFT, gen_shift_rows(employees)),
+    ]
+
+def generate_files(num_employees=DEFAULT_NUM_EMPLOYEES, out_dir=OUT_DIR_DEFAULT, write_sequences=True, seed=None,
+                   fmt="insert", compress="none", workers=1, org_policy=DEFAULT_ORG_POLICY, backend="python",
+                   stats=None, progress=None, metrics=None, partitioned=False, manifest=False):
+    """
+    Write one SQL file per table into out_dir. Rows are streamed straight from the
+    gen_*_rows generators into the files, so peak memory is one chunk per table plus
+    the per-employee state the child tables need. Pass `seed` for reproducible output.
+    fmt="copy" writes COPY ... FROM STDIN data instead of INSERT statements, and
+    compress ("gzip" / "zstd") compresses each table file.
+
+    workers > 1 generates the employee-dependent tables in that many processes (see
+    generate_sharded); output is reproducible for a given seed and worker count, but
+    differs from the single-process output for the same seed.
+    org_policy (an OrgPolicy) limits the depth / fan-out of the manager tree.
+    backend="numpy" draws employee, payroll and license columns per chunk with numpy
+    (different random stream, same constraints).
+    If `stats` is a dict it is filled with the employee store's memory footprint.
+    Each table file is written by its own TableWriter thread; `progress` is passed to
+    them (see TableWriter). If `metrics` (a RunMetrics) is given it records every stage
+    and receives the writers' progress instead.
+    partitioned=True writes payroll and oncall_shift as one file per partition
+    (PARTITIONS; load them into personnel_init_partitioned.sql's tables). The rows are
+    the same as without it, only split across files.
+    manifest=True also writes out_dir/manifest (personnel_delta.py), the starting point
+    of later --append runs.
+    """
+    workers = max(1, min(workers, num_employees))
+    if workers > 1 and seed is None:
+        seed = random.getrandbits(64)
+    if seed is not None:
+        random.seed(seed)
+    if backend == "numpy":
+        require_numpy()
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {}
+    counts = {}
+    employees = EmployeeStore()  # id / hire / department for the child tables
+
+    rng = np_rng() if backend == "numpy" and workers == 1 else None
+    tables = table_sources(num_employees, employees, org_policy, rng)
+    if workers > 1:
+        tables = tables[:2]      # the rest comes from generate_sharded
+    recorder = None
+    if manifest and workers == 1:
+        from personnel_delta import ManifestRecorder
+        recorder = ManifestRecorder()
+        tables = [(table, count_key, label, cols, recorder.tap(table, rows))
+                  for table, count_key, label, cols, rows in tables]
+    # generators are lazy, so each table is fully generated before the next one starts;
+    # its writer thread may still be formatting / writing meanwhile
+    if metrics is not None:
+        progress = metrics.progress
+    writers = {}
+    for table, count_key, label, cols, rows in tables:
+        if partitioned and table in PARTITIONS:
+            writers[count_key] = start_partitioned_files(out_dir, label, table, cols, rows, fmt, compress, progress)
+            paths.update(writers[count_key].paths)
+        else:
+            paths[table] = table_file_path(out_dir, table, compress)
+            writers[count_key] = start_table_file(paths[table], label, table, cols, rows, fmt, compress, progress)
+    for count_key, writer in writers.items():
+        counts[count_key] = writer.wait()
+        if metrics is not None:
+            metrics.add_writer(writer)
+    store_bytes = employees.nbytes()
+    if workers > 1:
+        start = time.perf_counter()
+        store_bytes = generate_sharded(num_employees, out_dir, workers, seed, paths, counts, fmt, compress,
+                                       org_policy, backend, partitioned, manifest)
+        if metrics is not None:
+            metrics.add('sharded generate + merge', time.perf_counter() - start,
+                        sum(counts[count_key] for _, count_key, _, _ in SHARDED_TABLES + [ORG_PATH_TABLE]))
+            for table, _, label, _ in SHARDED_TABLES + [ORG_PATH_TABLE]:
+                for name, _ in output_tables(table, label, partitioned):
+                    metrics.bytes[name] = os.path.getsize(paths[name])
+    if recorder is not None:
+        paths['manifest'] = recorder.save(out_dir, employees, DATE_MAX.strftime("%Y-%m"))
+    if stats is not None:
+        stats['employee_store_bytes'] = store_bytes
+        stats['employee_store_bytes_per_employee'] = EmployeeStore.bytes_per_employee()
 
     # Optional sequences bump
     seq_file = None
@@ -507,43 +1613,124 @@ def generate_files(num_employees=DEFAULT_NUM_EMPLOYEES, out_dir=OUT_DIR_DEFAULT,
         seq_file = os.path.join(out_dir, "set_sequences.sql")
         with open(seq_file, "w", encoding="utf-8") as f:
             f.write("-- Set sequences to the current max values (use if your DDL used SERIAL for ids)\n\n")
-            def write_seq(seq_name, table, col):
-                f.write("SELECT setval('%s', (SELECT COALESCE(MAX(%s),0) FROM %s), true);\n" % (seq_name, col, table))
-            write_seq('department_department_id_seq', 'department', 'department_id')
-            write_seq('position_position_id_seq', 'position', 'position_id')
-            write_seq('employee_employee_id_seq', 'employee', 'employee_id')
-            write_seq('payroll_payroll_id_seq', 'payroll', 'payroll_id')
-            write_seq('employee_license_license_id_seq', 'employee_license', 'license_id')
-            write_seq('oncall_shift_shift_id_seq', 'oncall_shift', 'shift_id')
+            for stmt in sequence_statements():
+                f.write(stmt + "\n")
         paths['sequences'] = seq_file
 
-    counts = {
-        'departments': len(dept_rows),
-        'positions': len(pos_rows),
-        'employees': len(emp_rows),
-        'payroll': len(pay_rows),
-        'licenses': len(lic_rows),
-        'shifts': len(shift_rows)
-    }
     return paths, counts
 
 # --------------------------- CLI ---------------------------
 
+def print_progress(line):
+    sys.stderr.write(line + '\n')
+
 def parse_args():
     p = argparse.ArgumentParser(description='Generate personnel SQL files with explicit IDs (no cycles / leveled licenses / improved shifts).')
     p.add_argument('--employees', '-n', type=int, default=DEFAULT_NUM_EMPLOYEES, help='Number of employees to generate (default %(default)s).')
     p.add_argument('--outdir', '-o', default=OUT_DIR_DEFAULT, help='Output directory for SQL files.')
     p.add_argument('--no-sequences', action='store_true', help='Do not write the set_sequences.sql file.')
-    return p.parse_args()
+    p.add_argument('--seed', type=int, default=None, help='Seed the random generator for reproducible output.')
+    p.add_argument('--format', dest='fmt', choices=OUTPUT_FORMATS, default='insert',
+                   help='Row format: multi-row INSERT statements or COPY FROM STDIN data (default %(default)s).')
+    p.add_argument('--compress', choices=sorted(COMPRESSIONS), default='none',
+                   help='Compress each table file with gzip or zstd (default %(default)s).')
+    p.add_argument('--workers', '-j', type=int, default=1,
+                   help='Generate employees and their child tables in N processes (default %(default)s).')
+    p.add_argument('--backend', choices=('python', 'numpy'), default='python',
+                   help='Row generation backend; numpy draws whole columns per chunk (default %(default)s).')
+    p.add_argument('--max-depth', type=int, default=None, help='Maximum number of levels in the org chart.')
+    p.add_argument('--max-fanout', type=int, default=None, help='Maximum direct reports per manager.')
+    p.add_argument('--same-dept-managers', action='store_true', help='Only pick managers from the same department.')
+    p.add_argument('--progress', action='store_true',
+                   help='Report per-table row counts, overall rows/s and an ETA on stderr while writing.')
+    p.add_argument('--profile', action='store_true',
+                   help='Run under cProfile and write profile.pstats, profile.txt and metrics.json into --outdir.')
+    p.add_argument('--load', metavar='DSN', default=None,
+                   help='COPY the data straight into this PostgreSQL database instead of writing files '
+                        '(recreates the tables; see personnel_loader.py).')
+    p.add_argument('--load-connections', type=int, default=3,
+                   help='Connections used to load payroll / licenses / shifts in parallel with --load (default %(default)s).')
+    p.add_argument('--partitioned', action='store_true',
+                   help='Write payroll / oncall_shift as one file per partition (year / day of week) for '
+                        'personnel_init_partitioned.sql; with --load, load into that schema.')
+    p.add_argument('--manifest', action='store_true',
+                   help='Also write manifest/ (ID high-water marks, employee and license state) for later --append runs.')
+    p.add_argument('--append', metavar='DIR', default=None,
+                   help='Write only the next month on top of the run (or --append run) in DIR: -n new hires, '
+                        'a payroll for every active employee and due license renewals (see personnel_delta.py).')
+    p.add_argument('--through', metavar='YYYY-MM', default=None,
+                   help='End the generated dates with this month instead of %s, so that later --append '
+                        'months stay inside the date range.' % DATE_LIMIT.strftime('%Y-%m'))
+    args = p.parse_args()
+    if args.through:
+        from personnel_delta import month_bounds
+        try:
+            args.through = month_bounds(args.through)[1]
+        except ValueError:
+            p.error('--through takes a month as YYYY-MM')
+        if not DATE_MIN <= args.through <= DATE_LIMIT:
+            p.error('--through must be a month from %s to %s'
+                    % (DATE_MIN.strftime('%Y-%m'), DATE_LIMIT.strftime('%Y-%m')))
+        if args.append:
+            p.error('--append continues from the manifest\'s month; drop --through')
+    if args.load and args.workers > 1:
+        p.error('--load generates in a single process; drop --workers')
+    if args.load and (args.manifest or args.append or args.through):
+        p.error('--manifest / --append / --through write files; drop --load')
+    if args.append and (args.workers > 1 or args.backend != 'python' or args.partitioned):
+        p.error('--append runs in a single process with the python backend, without --partitioned')
+    return args
 
 def main():
     args = parse_args()
-    print('Generator starting with employees=%d, outdir=%s' % (args.employees, args.outdir))
-    paths, counts = generate_files(num_employees=args.employees, out_dir=args.outdir, write_sequences=(not args.no_sequences))
+    stats = {}
+    org_policy = OrgPolicy(args.max_depth, args.max_fanout, args.same_dept_managers)
+    if args.through:
+        set_date_max(args.through)
+    if args.load:
+        from personnel_loader import load_database
+        print('Generator starting with employees=%d, loading into the database' % args.employees)
+        counts = load_database(args.load, num_employees=args.employees, seed=args.seed, org_policy=org_policy,
+                               backend=args.backend, pool_size=args.load_connections, stats=stats,
+                               partitioned=args.partitioned)
+        print('Row counts: %s' % json.dumps(counts, indent=2))
+        print('Done. Data, constraints, triggers and sequences are in place.')
+        return
+    if args.append:
+        print('Generator appending employees=%d to %s, outdir=%s' % (args.employees, args.append, args.outdir))
+    else:
+        print('Generator starting with employees=%d, outdir=%s' % (args.employees, args.outdir))
+    metrics = RunMetrics(expected_rows(args.employees), print_progress if args.progress else None)
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+    if args.append:
+        from personnel_delta import generate_delta
+        paths, counts = generate_delta(args.append, args.employees, args.outdir, seed=args.seed, fmt=args.fmt,
+                                       compress=args.compress, org_policy=org_policy, stats=stats, metrics=metrics)
+    else:
+        paths, counts = generate_files(num_employees=args.employees, out_dir=args.outdir, write_sequences=(not args.no_sequences), seed=args.seed,
+                                      fmt=args.fmt, compress=args.compress, workers=args.workers,
+                                      org_policy=org_policy,
+                                      backend=args.backend, stats=stats, metrics=metrics, partitioned=args.partitioned,
+                                      manifest=args.manifest)
+    if profiler is not None:
+        profiler.disable()
+    metrics.finish()
     print('Files written:')
     for k, v in paths.items():
         print(' - %s: %s' % (k, v))
     print('Row counts: %s' % json.dumps(counts, indent=2))
+    print('Employee store: %d bytes (%d bytes per employee)'
+          % (stats['employee_store_bytes'], stats['employee_store_bytes_per_employee']))
+    print('Stages:')
+    for line in metrics.summary_lines():
+        print('  ' + line)
+    if profiler is not None:
+        written = write_profile(profiler, metrics, args.outdir,
+                                {'employees': args.employees, 'workers': args.workers, 'format': args.fmt,
+                                 'compress': args.compress, 'backend': args.backend, 'counts': counts, **stats})
+        print('Profile: %s, %s; metrics: %s' % (written['profile'], written['profile_text'], written['metrics']))
     print('Done. You can import the SQL files into PostgreSQL.')
 
 if __name__ == '__main__':
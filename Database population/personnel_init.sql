@@ -1,6 +1,7 @@
 DROP TABLE IF EXISTS oncall_shift CASCADE;
 DROP TABLE IF EXISTS employee_license CASCADE;
 DROP TABLE IF EXISTS payroll CASCADE;
+DROP TABLE IF EXISTS employee_org_path CASCADE;
 DROP TABLE IF EXISTS employee CASCADE;
 DROP TABLE IF EXISTS position CASCADE;
 DROP TABLE IF EXISTS department CASCADE;
@@ -39,6 +40,14 @@ CREATE TABLE employee (
   created_at TIMESTAMP
 );
 
+-- manager chain from the root down to the employee (written by the generator,
+-- kept current by ../org_hierarchy.sql)
+CREATE TABLE employee_org_path (
+  employee_id INT PRIMARY KEY REFERENCES employee(employee_id) ON DELETE CASCADE,
+  depth INT NOT NULL,
+  path INT[] NOT NULL
+);
+
 CREATE TABLE payroll (
   payroll_id SERIAL PRIMARY KEY,
   employee_id INT REFERENCES employee(employee_id) ON DELETE CASCADE,
@@ -52,6 +61,7 @@ CREATE TABLE employee_license (
   license_id SERIAL PRIMARY KEY,
   employee_id INT REFERENCES employee(employee_id) ON DELETE CASCADE,
   license_name VARCHAR(200),
+  license_level INT,
   issued_date DATE,
   expiry_date DATE,
   notes TEXT,
@@ -0,0 +1,107 @@
+-- personnel_init_partitioned.sql
+-- personnel_init.sql with payroll and oncall_shift partitioned; the partition
+-- tables match the per-partition files of personnel_generator.py --partitioned.
+
+DROP TABLE IF EXISTS oncall_shift CASCADE;
+DROP TABLE IF EXISTS employee_license CASCADE;
+DROP TABLE IF EXISTS payroll CASCADE;
+DROP TABLE IF EXISTS employee_org_path CASCADE;
+DROP TABLE IF EXISTS employee CASCADE;
+DROP TABLE IF EXISTS position CASCADE;
+DROP TABLE IF EXISTS department CASCADE;
+
+CREATE TABLE department (
+  department_id SERIAL PRIMARY KEY,
+  name VARCHAR(200),
+  description TEXT,
+  created_at TIMESTAMP
+);
+
+CREATE TABLE position (
+  position_id SERIAL PRIMARY KEY,
+  title VARCHAR(200),
+  department_id INT REFERENCES department(department_id) ON DELETE SET NULL,
+  description TEXT,
+  created_at TIMESTAMP
+);
+
+CREATE TABLE employee (
+  employee_id SERIAL PRIMARY KEY,
+  first_name VARCHAR(100),
+  last_name VARCHAR(100),
+  email VARCHAR(255),
+  phone VARCHAR(50),
+  address VARCHAR(255),
+  birth_date DATE,
+  hire_date DATE,
+  termination_date DATE,
+  active BOOLEAN DEFAULT true,
+  department_id INT REFERENCES department(department_id),
+  position_id INT REFERENCES position(position_id),
+  manager_id INT REFERENCES employee(employee_id),
+  emergency_contacts JSONB,
+  notes TEXT,
+  created_at TIMESTAMP
+);
+
+-- manager chain from the root down to the employee (written by the generator,
+-- kept current by ../org_hierarchy.sql)
+CREATE TABLE employee_org_path (
+  employee_id INT PRIMARY KEY REFERENCES employee(employee_id) ON DELETE CASCADE,
+  depth INT NOT NULL,
+  path INT[] NOT NULL
+);
+
+-- payroll: range-partitioned by pay_date, one partition per year the generator
+-- produces (DATE_MIN..DATE_MAX); later dates go to payroll_default.
+-- The partition key must be part of the primary key.
+CREATE TABLE payroll (
+  payroll_id SERIAL,
+  employee_id INT REFERENCES employee(employee_id) ON DELETE CASCADE,
+  amount NUMERIC(12,2),
+  pay_date DATE,
+  notes TEXT,
+  created_at TIMESTAMP,
+  PRIMARY KEY (payroll_id, pay_date)
+) PARTITION BY RANGE (pay_date);
+CREATE TABLE payroll_y2020 PARTITION OF payroll FOR VALUES FROM ('2020-01-01') TO ('2021-01-01');
+CREATE TABLE payroll_y2021 PARTITION OF payroll FOR VALUES FROM ('2021-01-01') TO ('2022-01-01');
+CREATE TABLE payroll_y2022 PARTITION OF payroll FOR VALUES FROM ('2022-01-01') TO ('2023-01-01');
+CREATE TABLE payroll_y2023 PARTITION OF payroll FOR VALUES FROM ('2023-01-01') TO ('2024-01-01');
+CREATE TABLE payroll_y2024 PARTITION OF payroll FOR VALUES FROM ('2024-01-01') TO ('2025-01-01');
+CREATE TABLE payroll_y2025 PARTITION OF payroll FOR VALUES FROM ('2025-01-01') TO ('2026-01-01');
+CREATE TABLE payroll_y2026 PARTITION OF payroll FOR VALUES FROM ('2026-01-01') TO ('2027-01-01');
+CREATE TABLE payroll_y2027 PARTITION OF payroll FOR VALUES FROM ('2027-01-01') TO ('2028-01-01');
+CREATE TABLE payroll_y2028 PARTITION OF payroll FOR VALUES FROM ('2028-01-01') TO ('2029-01-01');
+CREATE TABLE payroll_y2029 PARTITION OF payroll FOR VALUES FROM ('2029-01-01') TO ('2030-01-01');
+CREATE TABLE payroll_default PARTITION OF payroll DEFAULT;
+
+CREATE TABLE employee_license (
+  license_id SERIAL PRIMARY KEY,
+  employee_id INT REFERENCES employee(employee_id) ON DELETE CASCADE,
+  license_name VARCHAR(200),
+  license_level INT,
+  issued_date DATE,
+  expiry_date DATE,
+  notes TEXT,
+  created_at TIMESTAMP
+);
+
+-- oncall_shift: list-partitioned by day_of_week (1=Mon..7=Sun)
+CREATE TABLE oncall_shift (
+  shift_id SERIAL,
+  employee_id INT REFERENCES employee(employee_id) ON DELETE CASCADE,
+  day_of_week INT,
+  start_time TIME,
+  end_time TIME,
+  escalation_order INT,
+  created_at TIMESTAMP,
+  PRIMARY KEY (shift_id, day_of_week)
+) PARTITION BY LIST (day_of_week);
+CREATE TABLE oncall_shift_d1 PARTITION OF oncall_shift FOR VALUES IN (1);
+CREATE TABLE oncall_shift_d2 PARTITION OF oncall_shift FOR VALUES IN (2);
+CREATE TABLE oncall_shift_d3 PARTITION OF oncall_shift FOR VALUES IN (3);
+CREATE TABLE oncall_shift_d4 PARTITION OF oncall_shift FOR VALUES IN (4);
+CREATE TABLE oncall_shift_d5 PARTITION OF oncall_shift FOR VALUES IN (5);
+CREATE TABLE oncall_shift_d6 PARTITION OF oncall_shift FOR VALUES IN (6);
+CREATE TABLE oncall_shift_d7 PARTITION OF oncall_shift FOR VALUES IN (7);
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# personnel_loader.py
+# Direct bulk load of the generated personnel data into PostgreSQL
+# (personnel_generator.py --load DSN), instead of writing SQL files for psql.
+#
+# Order of work:
+#   1. run personnel_init.sql (fresh tables) and drop their PK / UNIQUE / FK
+#      constraints, remembering the definitions
+#   2. COPY department, position and employee on the main connection
+#   3. COPY employee_org_path, payroll, employee_license and oncall_shift in
+#      parallel, one pooled connection per table; the main thread keeps generating
+#      (so the output for a given seed is the same as the files) and hands COPY
+#      chunks over bounded queues
+#   4. restore the PK / UNIQUE constraints (in parallel), then the FKs, run
+#      POST_LOAD_SCRIPTS (Stage 2 Constraints.sql: checks, unique, triggers, with
+#      the triggers swapped for StatementTriggers.sql's; org_hierarchy.sql,
+#      Indexes.sql, payroll_rollup.sql), set the sequences and ANALYZE
+#
+# Needs psycopg (3) or psycopg2. To try it against a throwaway local server:
+#   initdb -D /tmp/pgtest && pg_ctl -D /tmp/pgtest -o "-p 5499" -l /tmp/pgtest.log start
+#   createdb -p 5499 personnel_test
+#   python personnel_generator.py -n 10000 --seed 1 --load "dbname=personnel_test port=5499"
+#   pg_ctl -D /tmp/pgtest stop && rm -rf /tmp/pgtest
+
+import os
+import sys
+import random
+import threading
+import queue
+import concurrent.futures
+
+import personnel_generator as gen
+
+try:
+    import psycopg           # preferred driver
+except ImportError:
+    psycopg = None
+try:
+    import psycopg2          # fallback driver
+except ImportError:
+    psycopg2 = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+INIT_SCRIPT = os.path.join(HERE, 'personnel_init.sql')
+PARTITIONED_INIT_SCRIPT = os.path.join(HERE, 'personnel_init_partitioned.sql')   # --partitioned
+# run in order once all data and PK / FK constraints are in place
+POST_LOAD_SCRIPTS = [
+    os.path.join(HERE, '..', 'Stage 2 Constraints', 'Constraints.sql'),
+    os.path.join(HERE, '..', 'Stage 2 Constraints', 'StatementTriggers.sql'),
+    os.path.join(HERE, '..', 'org_hierarchy.sql'),
+    os.path.join(HERE, '..', 'Stage 2 Constraints', 'Indexes.sql'),
+    os.path.join(HERE, '..', 'payroll_rollup.sql'),
+]
+
+DEFAULT_POOL_SIZE = 3    # connections for the parallel child-table COPYs
+QUEUE_CHUNKS = 8         # COPY chunks buffered per child table
+
+PARENT_TABLES = ('department', 'position', 'employee')
+
+
+def require_driver():
+    if psycopg is None and psycopg2 is None:
+        sys.exit("--load requires the 'psycopg' package (pip install psycopg) or psycopg2")
+
+def connect(dsn):
+    """Autocommit connection: every COPY / DDL statement commits on its own."""
+    if psycopg is not None:
+        return psycopg.connect(dsn, autocommit=True)
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    return conn
+
+def execute(conn, sql, params=None):
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, params)
+        return cur.fetchall() if cur.description is not None else None
+    finally:
+        cur.close()
+
+def run_script(conn, path):
+    with open(path, 'r', encoding='utf-8') as f:
+        execute(conn, f.read())
+
+
+class _ChunkReader:
+    """File-like view of an iterator of text chunks, for psycopg2's copy_expert."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buf = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buf) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buf += chunk
+        if size < 0:
+            data, self._buf = self._buf, ''
+        else:
+            data, self._buf = self._buf[:size], self._buf[size:]
+        return data
+
+    readline = read
+
+def copy_chunks(conn, table, cols, chunks):
+    """COPY table FROM STDIN, feeding it the given COPY-text chunks."""
+    sql = 'COPY %s (%s) FROM STDIN' % (table, ', '.join(cols))
+    if psycopg is not None:
+        with conn.cursor() as cur:
+            with cur.copy(sql) as copy:
+                for chunk in chunks:
+                    copy.write(chunk)
+    else:
+        cur = conn.cursor()
+        try:
+            cur.copy_expert(sql, _ChunkReader(chunks))
+        finally:
+            cur.close()
+
+def copy_text_chunks(rows, counter):
+    """CHUNK_SIZE rows at a time as COPY text; counter[0] is the number of rows produced."""
+    for block in gen.iter_chunks(rows):
+        counter[0] += len(block)
+        yield gen.format_copy_chunk(None, None, block)
+
+
+class TableLoader(threading.Thread):
+    """
+    COPYs one table from a bounded queue of text chunks on a connection taken from
+    `pool` (a queue.Queue of connections). The producer blocks when the queue is
+    full; put(None) ends the COPY. After a failure the queue is still drained so
+    the producer never blocks, and join() re-raises the error.
+    """
+
+    def __init__(self, pool, table, cols):
+        super().__init__(name='load-%s' % table, daemon=True)
+        self.pool = pool
+        self.table = table
+        self.cols = cols
+        self.chunks = queue.Queue(maxsize=QUEUE_CHUNKS)
+        self.error = None
+
+    def run(self):
+        conn = self.pool.get()
+        try:
+            copy_chunks(conn, self.table, self.cols, iter(self.chunks.get, None))
+        except BaseException as e:
+            self.error = e
+            while self.chunks.get() is not None:
+                pass
+        finally:
+            self.pool.put(conn)
+
+    def join(self, timeout=None):
+        super().join(timeout)
+        if self.error is not None:
+            raise RuntimeError('COPY into %s failed: %s' % (self.table, self.error)) from self.error
+
+
+def table_constraints(conn, tables):
+    """(table, name, type, definition) for the PK / UNIQUE / FK constraints on `tables`."""
+    return execute(conn,
+                   "SELECT c.conrelid::regclass::text, c.conname, c.contype, pg_get_constraintdef(c.oid) "
+                   "FROM pg_constraint c "
+                   "WHERE c.conrelid = ANY(%s::regclass[]) AND c.contype IN ('p', 'u', 'f') "
+                   "ORDER BY c.conrelid, c.conname",
+                   (list(tables),))
+
+def drop_constraints(conn, constraints):
+    # FKs first: they depend on the primary keys
+    for table, name, contype, _ in sorted(constraints, key=lambda c: c[2] != 'f'):
+        execute(conn, 'ALTER TABLE %s DROP CONSTRAINT %s' % (table, name))
+
+def restore_constraints(dsn, conn, constraints, pool_size):
+    """Re-add PK / UNIQUE constraints (one table per connection), then the FKs."""
+    keys = {}
+    for table, name, contype, definition in constraints:
+        if contype != 'f':
+            keys.setdefault(table, []).append('ADD CONSTRAINT %s %s' % (name, definition))
+
+    def add_keys(table):
+        c = connect(dsn)
+        try:
+            execute(c, 'ALTER TABLE %s %s' % (table, ', '.join(keys[table])))
+        finally:
+            c.close()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, pool_size)) as ex:
+        for _ in ex.map(add_keys, keys):
+            pass
+    for table, name, contype, definition in constraints:
+        if contype == 'f':
+            execute(conn, 'ALTER TABLE %s ADD CONSTRAINT %s %s' % (table, name, definition))
+
+
+def load_database(dsn, num_employees=gen.DEFAULT_NUM_EMPLOYEES, seed=None, org_policy=gen.DEFAULT_ORG_POLICY,
+                  backend='python', pool_size=DEFAULT_POOL_SIZE, post_load_scripts=None, stats=None,
+                  partitioned=False):
+    """
+    Generate the data and COPY it into the database at `dsn` (tables are recreated by
+    personnel_init.sql, or personnel_init_partitioned.sql if `partitioned`; COPY into
+    the partitioned parents routes the rows). The rows are the same as
+    generate_files(workers=1) would write for the same seed and backend. Returns the
+    row counts.
+    """
+    require_driver()
+    if seed is not None:
+        random.seed(seed)
+    if backend == 'numpy':
+        gen.require_numpy()
+    if post_load_scripts is None:
+        post_load_scripts = POST_LOAD_SCRIPTS
+    employees = gen.EmployeeStore()
+    rng = gen.np_rng() if backend == 'numpy' else None
+    sources = gen.table_sources(num_employees, employees, org_policy, rng)
+    all_tables = [s[0] for s in sources]
+
+    conn = connect(dsn)
+    pool = queue.Queue()
+    try:
+        run_script(conn, PARTITIONED_INIT_SCRIPT if partitioned else INIT_SCRIPT)
+        constraints = table_constraints(conn, all_tables)
+        drop_constraints(conn, constraints)
+
+        counts = {}
+        loaders = []
+        for _ in range(max(1, pool_size)):
+            pool.put(connect(dsn))
+        for table, count_key, label, cols, rows in sources:
+            n = [0]
+            chunks = copy_text_chunks(rows, n)
+            if table in PARENT_TABLES:
+                copy_chunks(conn, table, cols, chunks)
+            else:
+                # generated here, in order; COPYed by a pooled connection meanwhile
+                loader = TableLoader(pool, table, cols)
+                loader.start()
+                loaders.append(loader)
+                try:
+                    for chunk in chunks:
+                        loader.chunks.put(chunk)
+                finally:
+                    loader.chunks.put(None)
+            counts[count_key] = n[0]
+        for loader in loaders:
+            loader.join()
+
+        restore_constraints(dsn, conn, constraints, pool_size)
+        for path in post_load_scripts:
+            run_script(conn, path)
+        for stmt in gen.sequence_statements():
+            execute(conn, stmt)
+        execute(conn, 'ANALYZE ' + ', '.join(all_tables))
+        if stats is not None:
+            stats['employee_store_bytes'] = employees.nbytes()
+            stats['employee_store_bytes_per_employee'] = gen.EmployeeStore.bytes_per_employee()
+        return counts
+    finally:
+        while not pool.empty():
+            pool.get().close()
+        conn.close()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# personnel_query_benchmark.py
+# Runs the project's SQL workload against generated data and reports latencies.
+#
+#   1. generate a dataset of the chosen scale and load it (personnel_loader, which
+#      also applies Constraints.sql and Indexes.sql), then create the Stage 3 views
+#      (skip with --skip-load to reuse the data already in the database)
+#   2. split Stage 2 Queries.sql, ParamQueries.sql, RollupQueries.sql, HierarchyQueries.sql
+#      and Stage3 SELECT Queries.sql into named statements (Q1..Q15, Q2R / Q11R, v1..v4)
+#   3. run each one --warmup + --runs times and EXPLAIN (ANALYZE, BUFFERS) it once
+#   4. write a JSON report: latency percentiles (ms), row counts, plans and errors
+#
+# Every run is wrapped in BEGIN / ROLLBACK, so the UPDATE / DELETE queries (Q5-Q8)
+# see the same data each time. ParamQueries.sql statements are PREPAREd once and run
+# with its EXECUTE arguments (PARAM_DEFAULTS for the ones it has none for).
+#
+#   python personnel_query_benchmark.py --dsn "dbname=personnel_test port=5499" -n 100000 --runs 10 --out q.json
+
+import os
+import re
+import json
+import math
+import time
+import argparse
+import datetime
+
+import personnel_generator as gen
+import personnel_loader as loader
+
+ROOT = os.path.join(loader.HERE, '..')
+QUERY_FILES = {
+    'queries': os.path.join(ROOT, 'Stage 2 queries + results', 'Queries.sql'),
+    'params': os.path.join(ROOT, 'Stage 2 queries + results', 'ParamQueries.sql'),
+    'rollup': os.path.join(ROOT, 'Stage 2 queries + results', 'RollupQueries.sql'),
+    'hierarchy': os.path.join(ROOT, 'Stage 2 queries + results', 'HierarchyQueries.sql'),
+    'views': os.path.join(ROOT, 'Views SELECT Queries', 'Stage3 SELECT Queries.sql'),
+}
+VIEWS_SCRIPT = os.path.join(ROOT, 'views.sql')
+
+# EXECUTE arguments for prepared statements that ParamQueries.sql never executes
+PARAM_DEFAULTS = {
+    'q11': '2024',
+    'q12': '1, 110000000',
+}
+PERCENTILES = [50, 90, 95, 99]
+
+
+def split_queries(text):
+    """Queries.sql / RollupQueries.sql: '--Qn' marker lines start each query; BEGIN; / COMMIT; lines are dropped."""
+    queries, name, lines = [], None, []
+    for line in text.splitlines():
+        m = re.match(r'\s*--\s*(Q\d+R?)\s*$', line)
+        if m:
+            if name:
+                queries.append((name, '\n'.join(lines)))
+            name, lines = m.group(1), []
+        elif line.strip().upper() not in ('BEGIN;', 'COMMIT;'):
+            lines.append(line)
+    if name:
+        queries.append((name, '\n'.join(lines)))
+    return [(n, sql.strip().rstrip(';').strip()) for n, sql in queries]
+
+def split_param_queries(text):
+    """
+    ParamQueries.sql: (name, PREPARE statement, EXECUTE arguments) per prepared query.
+    EXECUTE lines there may lack the trailing semicolon.
+    """
+    prepares = re.findall(r'(PREPARE\s+(\w+)\s*\(.*?\)\s+AS\s+.*?);', text, re.S | re.I)
+    executes = dict((n.lower(), args) for n, args in re.findall(r'EXECUTE\s+(\w+)\s*\((.*?)\)', text, re.I))
+    out = []
+    for stmt, name in prepares:
+        name = name.lower()
+        args = executes.get(name, PARAM_DEFAULTS.get(name))
+        out.append((name.upper(), stmt, args))
+    return out
+
+def split_view_queries(text):
+    """Stage3 SELECT Queries.sql: one query after each '\\o <file>' line, named vN from the file name."""
+    queries, name, lines = [], None, []
+    for line in text.splitlines():
+        m = re.match(r'\s*\\o\b\s*(.*)$', line)
+        if m:
+            if name:
+                queries.append((name, '\n'.join(lines)))
+            target = re.search(r'(v\d+)output', m.group(1))
+            name, lines = (target.group(1) if target else None), []
+        elif name:
+            lines.append(line)
+    if name:
+        queries.append((name, '\n'.join(lines)))
+    return [(n, sql.strip().rstrip(';').strip()) for n, sql in queries]
+
+def workload():
+    """(name, file key, sql to run, PREPARE statement or None) for every query."""
+    def read(key):
+        with open(QUERY_FILES[key], 'r', encoding='utf-8') as f:
+            return f.read()
+    items = [(name, 'queries', sql, None) for name, sql in split_queries(read('queries'))]
+    for name, prepare, args in split_param_queries(read('params')):
+        sql = 'EXECUTE %s(%s)' % (name.lower(), args) if args is not None else None
+        items.append((name, 'params', sql, prepare))
+    items += [(name, 'rollup', sql, None) for name, sql in split_queries(read('rollup'))]
+    items += [(name, 'hierarchy', sql, None) for name, sql in split_queries(read('hierarchy'))]
+    items += [(name, 'views', sql, None) for name, sql in split_view_queries(read('views'))]
+    return items
+
+
+def run_once(conn, sql):
+    """Run `sql` inside BEGIN / ROLLBACK; returns (seconds, rows returned or affected)."""
+    cur = conn.cursor()
+    try:
+        cur.execute('BEGIN')
+        start = time.perf_counter()
+        cur.execute(sql)
+        rows = len(cur.fetchall()) if cur.description is not None else cur.rowcount
+        seconds = time.perf_counter() - start
+        return seconds, rows
+    finally:
+        cur.execute('ROLLBACK')
+        cur.close()
+
+def explain(conn, sql):
+    cur = conn.cursor()
+    try:
+        cur.execute('BEGIN')
+        cur.execute('EXPLAIN (ANALYZE, BUFFERS) ' + sql)
+        return '\n'.join(row[0] for row in cur.fetchall())
+    finally:
+        cur.execute('ROLLBACK')
+        cur.close()
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+def latency_summary(seconds):
+    ms = sorted(s * 1000.0 for s in seconds)
+    out = {'runs': len(ms), 'min': round(ms[0], 3), 'max': round(ms[-1], 3), 'mean': round(sum(ms) / len(ms), 3)}
+    for pct in PERCENTILES:
+        out['p%d' % pct] = round(percentile(ms, pct), 3)
+    return out
+
+def benchmark_query(conn, sql, runs, warmup):
+    result = {'sql': sql}
+    try:
+        for _ in range(warmup):
+            run_once(conn, sql)
+        timings, rows = [], None
+        for _ in range(runs):
+            seconds, rows = run_once(conn, sql)
+            timings.append(seconds)
+        result['rows'] = rows
+        result['latency_ms'] = latency_summary(timings)
+        result['explain'] = explain(conn, sql)
+    except Exception as e:      # keep going: one broken query should not end the report
+        result['error'] = str(e).strip()
+    return result
+
+def run_workload(dsn, runs=5, warmup=1, only=None):
+    conn = loader.connect(dsn)
+    if hasattr(conn, 'prepare_threshold'):
+        conn.prepare_threshold = None   # psycopg 3: no automatic server-side prepares between runs
+    try:
+        report = {}
+        for name, key, sql, prepare in workload():
+            if only and name not in only:
+                continue
+            entry = {'file': os.path.relpath(QUERY_FILES[key], ROOT)}
+            try:
+                if prepare:
+                    loader.execute(conn, 'DEALLOCATE ALL')
+                    loader.execute(conn, prepare)
+            except Exception as e:
+                entry['error'] = str(e).strip()
+            if 'error' not in entry:
+                if sql is None:
+                    entry['error'] = 'no EXECUTE arguments in the file or PARAM_DEFAULTS'
+                else:
+                    entry.update(benchmark_query(conn, sql, runs, warmup))
+            report[name] = entry
+            if 'error' in entry:
+                print('  %-4s ERROR %s' % (name, entry['error'].splitlines()[0]))
+            else:
+                lat = entry['latency_ms']
+                print('  %-4s %8s rows  p50 %9.2f ms  p95 %9.2f ms' % (name, entry['rows'], lat['p50'], lat['p95']))
+        version = loader.execute(conn, 'SHOW server_version')[0][0]
+        return report, version
+    finally:
+        conn.close()
+
+def parse_args():
+    p = argparse.ArgumentParser(description='Benchmark the Stage 2 / Stage 3 queries on generated data.')
+    p.add_argument('--dsn', required=True, help='PostgreSQL connection string (the tables are recreated unless --skip-load).')
+    p.add_argument('--employees', '-n', type=int, default=gen.DEFAULT_NUM_EMPLOYEES, help='Dataset scale (default %(default)s).')
+    p.add_argument('--seed', type=int, default=1, help='Generator seed (default %(default)s).')
+    p.add_argument('--skip-load', action='store_true', help='Benchmark the data already in the database.')
+    p.add_argument('--runs', type=int, default=5, help='Timed runs per query (default %(default)s).')
+    p.add_argument('--warmup', type=int, default=1, help='Untimed runs per query first (default %(default)s).')
+    p.add_argument('--only', nargs='+', default=None, help='Only these queries, e.g. Q1 Q9 v3.')
+    p.add_argument('--out', default='query_benchmark.json', help='JSON report path (default %(default)s).')
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    loader.require_driver()
+    load_seconds = None
+    if not args.skip_load:
+        print('Loading %d employees (seed %d)...' % (args.employees, args.seed))
+        start = time.perf_counter()
+        counts = loader.load_database(args.dsn, num_employees=args.employees, seed=args.seed,
+                                      post_load_scripts=loader.POST_LOAD_SCRIPTS + [VIEWS_SCRIPT])
+        load_seconds = round(time.perf_counter() - start, 3)
+        print('Loaded in %.1f s: %s' % (load_seconds, json.dumps(counts)))
+    print('Running queries (%d warmup + %d timed runs each):' % (args.warmup, args.runs))
+    queries, version = run_workload(args.dsn, args.runs, args.warmup, args.only)
+    report = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'server_version': version,
+            'employees': None if args.skip_load else args.employees,
+            'seed': None if args.skip_load else args.seed,
+            'load_seconds': load_seconds,
+            'runs': args.runs,
+            'warmup': args.warmup,
+        },
+        'queries': queries,
+    }
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print('Report written to %s' % args.out)
+
+if __name__ == '__main__':
+    main()
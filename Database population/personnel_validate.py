@@ -0,0 +1,623 @@
+#!/usr/bin/env python3
+# personnel_validate.py
+# Streaming check of generated output directories before they are loaded:
+#
+#   python personnel_validate.py out -j 8
+#   python personnel_validate.py base delta1 delta2     # a run and its --append deltas, in load order
+#
+# Reads department / position / employee / employee_org_path / payroll /
+# employee_license / oncall_shift files (INSERT or COPY format, plain, .gz or .zst,
+# whole or --partitioned) and reports every row that the database would reject or
+# that breaks the generator's guarantees, with file and line number:
+#   primary keys and employee_email_unique, NOT NULL columns and the CHECKs of
+#   Stage 2 Constraints/Constraints.sql, foreign keys (department, position,
+#   manager, employee), acyclic manager chains, pay_date on or after hire_date,
+#   the license rank rule, and per employee and day non-overlapping shifts with
+#   escalation_order 1..n in start order.
+# Exit status is 1 if anything is reported.
+#
+# Uncompressed files are split into CHUNK_BYTES ranges on line boundaries and
+# scanned by a process pool; compressed files are one task each. Memory stays
+# bounded by a few small arrays per employee row (id, manager, hire date, line
+# number, email hash) and one bitmap of the ids per child table; rows themselves
+# are never kept. Uniqueness is checked on hashes / ids in the parent, and a second
+# pass over the files only runs to find the lines of the duplicates it found.
+# A shift group (one employee and day) is the run of consecutive rows with that
+# key, which is how the generator writes them.
+
+import os
+import re
+import io
+import sys
+import gzip
+import time
+import array
+import bisect
+import hashlib
+import argparse
+import datetime
+import collections
+import multiprocessing
+
+import personnel_generator as gen
+
+CHUNK_BYTES = 32 << 20       # bytes of an uncompressed file per task
+MAX_REPORT = 20              # violations listed per rule (all are counted)
+BUCKETS = 64                 # email hash buckets (one set at a time for the uniqueness check)
+NULL_ID = -1                 # manager_id NULL in the employee arrays
+
+# load order; employee must come after department / position and before the rest
+TABLES = ['department', 'position', 'employee', 'employee_org_path', 'payroll', 'employee_license', 'oncall_shift']
+CHILD_TABLES = TABLES[3:]
+ID_COLUMNS = {'department': 'department_id', 'position': 'position_id', 'employee': 'employee_id',
+              'employee_org_path': 'employee_id', 'payroll': 'payroll_id',
+              'employee_license': 'license_id', 'oncall_shift': 'shift_id'}
+NOT_NULL = {    # Constraints.sql SET NOT NULL
+    'department': ['name'],
+    'position': ['title'],
+    'employee': ['first_name', 'last_name', 'email', 'hire_date'],
+    'payroll': ['employee_id', 'amount', 'pay_date'],
+    'oncall_shift': ['day_of_week', 'start_time', 'end_time', 'escalation_order'],
+}
+LICENSE_RANKS = {'junior': 1, 'intermediate': 2, 'senior': 3}   # first word of license_name
+
+Task = collections.namedtuple('Task', 'table path fmt cols start end mode')
+Violation = collections.namedtuple('Violation', 'rule path line detail')
+
+
+# --------------------------- Reading ---------------------------
+
+def open_input(path):
+    """Binary reader for a plain, .gz or .zst output file."""
+    if path.endswith(gen.COMPRESSIONS['gzip']):
+        return gzip.open(path, 'rb')
+    if path.endswith(gen.COMPRESSIONS['zstd']):
+        return io.BufferedReader(gen.require_zstandard().ZstdDecompressor().stream_reader(open(path, 'rb')))
+    return open(path, 'rb')
+
+def table_files(dirs, table):
+    """Existing files of `table` (whole and per partition) in the directories, in load order."""
+    names = [table] + gen.PARTITIONS.get(table, [])
+    found = []
+    for d in dirs:
+        for name in names:
+            for ext in gen.COMPRESSIONS.values():
+                path = os.path.join(d, name + '.sql' + ext)
+                if os.path.exists(path):
+                    found.append(path)
+    return found
+
+_HEADER = re.compile(r'^(?:INSERT INTO|COPY) \S+ \(([^)]*)\)')
+
+def sniff(path):
+    """(format, columns) from the first INSERT / COPY line of a file, (None, None) if it has no rows."""
+    with open_input(path) as f:
+        for raw in f:
+            line = raw.decode('utf-8')
+            m = _HEADER.match(line)
+            if m:
+                return ('copy' if line.startswith('COPY') else 'insert'), [c.strip() for c in m.group(1).split(',')]
+            if line.startswith('('):
+                break
+    return None, None
+
+def plan_tasks(path, table, mode='check'):
+    fmt, cols = sniff(path)
+    if fmt is None:
+        return []
+    if path.endswith(tuple(ext for ext in gen.COMPRESSIONS.values() if ext)):
+        return [Task(table, path, fmt, cols, 0, None, mode)]
+    size = os.path.getsize(path)
+    return [Task(table, path, fmt, cols, lo, min(lo + CHUNK_BYTES, size), mode)
+            for lo in range(0, max(size, 1), CHUNK_BYTES)]
+
+_SQL_VALUE = re.compile(r"'((?:[^']|'')*)'|([^,\s]+)")
+_COPY_ESCAPE = re.compile(r'\\(.)')
+_COPY_CHARS = {'t': '\t', 'n': '\n', 'r': '\r'}
+
+def parse_insert_row(line):
+    """Field strings (None for NULL) of one `(...),` line of an INSERT statement."""
+    text = line.rstrip(',;')
+    row = []
+    for m in _SQL_VALUE.finditer(text, 1, len(text) - 1):
+        quoted, bare = m.groups()
+        if quoted is not None:
+            row.append(quoted.replace("''", "'"))
+        else:
+            row.append(None if bare == 'NULL' else bare)
+    return row
+
+def parse_copy_row(line):
+    row = line.split('\t')
+    for i, v in enumerate(row):
+        if v == '\\N':
+            row[i] = None
+        elif '\\' in v:
+            row[i] = _COPY_ESCAPE.sub(lambda m: _COPY_CHARS.get(m.group(1), m.group(1)), v)
+    return row
+
+def is_row(line, fmt):
+    if fmt == 'copy':
+        return '\t' in line and not line.startswith('--')
+    return line.startswith('(')
+
+def email_hash(email):
+    return int.from_bytes(hashlib.blake2b(email.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+
+# --------------------------- Worker side ---------------------------
+
+_SHARED = {}    # set before the pool starts: lookup arrays / keys of the current pass
+
+def _init_worker(shared):
+    _SHARED.clear()
+    _SHARED.update(shared)
+
+def employee_hire(eid):
+    """Hire ordinal of employee `eid` (0 if its hire_date is NULL), None if there is no such employee."""
+    keys = _SHARED['keys']
+    i = bisect.bisect_left(keys, eid << 32)
+    if i < len(keys) and keys[i] >> 32 == eid:
+        return _SHARED['hire'][keys[i] & 0xffffffff]
+    return None
+
+def license_rank(name):
+    """(rank, base name) as in Constraints.sql's prevent_lower_license_by_name."""
+    first, _, rest = name.partition(' ')
+    rank = LICENSE_RANKS.get(first.lower(), 0)
+    return rank, (rest if rank else name).strip().lower()
+
+def shift_group_violations(group):
+    """Violations in one employee-day group of (start, end, escalation, line) tuples."""
+    out = []
+    by_start = sorted(group)
+    for prev, cur in zip(by_start, by_start[1:]):
+        if cur[0] < prev[1]:
+            out.append(('shift_overlap', cur[3], '%s-%s overlaps %s-%s (line %d)' % (cur[0], cur[1], prev[0], prev[1], prev[3])))
+    orders = [g[2] for g in by_start]
+    if orders != list(range(1, len(orders) + 1)):
+        out.append(('escalation_sequence', by_start[0][3], 'escalation_order %s in start order, expected 1..%d'
+                    % (orders, len(orders))))
+    return out
+
+class ChunkScan:
+    """Result of scanning one task: line count, violations (local line numbers) and per-table arrays."""
+
+    def __init__(self, task):
+        self.task = task
+        self.lines = 0
+        self.rows = 0
+        self.violations = []
+        self.counts = collections.Counter()
+        self.ids = array.array('q')           # row ids (PK column), in file order
+        self.id_lines = array.array('i')      # employee only: local line of each row
+        self.managers = array.array('q')
+        self.hire = array.array('i')
+        self.email_buckets = [array.array('q') for _ in range(BUCKETS)]
+        self.names = []                       # department / position: (line, name)
+        self.edges = []                       # oncall_shift: first / last group, checked by the parent
+        self.ranked = {}                      # employee_license: (employee, base) -> highest rank
+        self.found = []                       # find pass: (line, key)
+
+    def add(self, rule, line, detail):
+        self.counts[rule] += 1
+        if self.counts[rule] <= MAX_REPORT:
+            self.violations.append((rule, line, detail))
+
+    def iter_lines(self):
+        task = self.task
+        with open_input(task.path) as f:
+            if task.start:
+                f.seek(task.start - 1)
+                if f.read(1) != b'\n':
+                    f.readline()       # that line belongs to the previous chunk
+            pos = f.tell()
+            while task.end is None or pos < task.end:
+                raw = f.readline()
+                if not raw:
+                    break
+                pos += len(raw)
+                self.lines += 1
+                yield self.lines, raw.decode('utf-8').rstrip('\r\n')
+
+    def iter_rows(self):
+        """(line, {column: value}) per data row; malformed rows are reported as 'parse'."""
+        parse = parse_copy_row if self.task.fmt == 'copy' else parse_insert_row
+        cols = self.task.cols
+        for n, line in self.iter_lines():
+            if not is_row(line, self.task.fmt):
+                continue
+            row = parse(line)
+            if len(row) != len(cols):
+                self.add('parse', n, '%d fields for %d columns' % (len(row), len(cols)))
+                continue
+            self.rows += 1
+            yield n, dict(zip(cols, row))
+
+def scan_chunk(task):
+    scan = ChunkScan(task)
+    checking = task.mode == 'check'
+    handler = CHECK_HANDLERS[task.table] if checking else find_row
+    not_null = NOT_NULL.get(task.table, ()) if checking else ()
+    for n, row in scan.iter_rows():
+        try:
+            for column in not_null:
+                if row[column] is None:
+                    scan.add('not_null', n, '%s.%s is NULL' % (task.table, column))
+            handler(scan, n, row)
+        except (ValueError, TypeError, KeyError) as e:
+            scan.add('parse', n, '%s: %s' % (type(e).__name__, e))
+    finish = FINISH_HANDLERS.get(task.table)
+    if finish is not None and checking:
+        finish(scan)
+    scan.task = None
+    return scan
+
+def check_parent_row(scan, n, row):
+    key = 'name' if scan.task.table == 'department' else 'title'
+    scan.ids.append(int(row[ID_COLUMNS[scan.task.table]]))
+    scan.names.append((n, row[key]))
+    dept = row.get('department_id')
+    departments = _SHARED['departments']
+    if scan.task.table == 'position' and dept is not None and departments is not None and int(dept) not in departments:
+        scan.add('fk_department', n, 'department_id %s does not exist' % dept)
+
+def check_employee_row(scan, n, row):
+    eid = int(row['employee_id'])
+    hire, email = row['hire_date'], row['email']
+    if email is not None and not email.strip():
+        scan.add('chk_email_nonempty', n, 'blank email')
+    if hire is not None:
+        if not gen.hire_before_termination(hire, row['termination_date']):
+            scan.add('chk_hire_before_termination', n, 'hire %s, termination %s' % (hire, row['termination_date']))
+        if row['birth_date'] is not None and not gen.birth_within_age_range(hire, row['birth_date']):
+            scan.add('chk_birth_age', n, 'born %s, hired %s' % (row['birth_date'], hire))
+    for column, ids in (('department_id', 'departments'), ('position_id', 'positions')):
+        value = row[column]
+        if value is not None and _SHARED[ids] is not None and int(value) not in _SHARED[ids]:
+            scan.add('fk_' + column[:-3], n, '%s %s does not exist' % (column, value))
+    manager = row['manager_id']
+    scan.ids.append(eid)
+    scan.id_lines.append(n)
+    scan.managers.append(NULL_ID if manager is None else int(manager))
+    scan.hire.append(datetime.date.fromisoformat(hire).toordinal() if hire is not None else 0)
+    if email is not None:
+        h = email_hash(email)
+        scan.email_buckets[h % BUCKETS].append(h)
+
+def check_employee_ref(scan, n, row):
+    """employee_id FK; returns the employee's hire ordinal (0 unknown), None if the FK is broken."""
+    scan.ids.append(int(row[ID_COLUMNS[scan.task.table]]))
+    eid = row['employee_id']
+    if eid is None:
+        return None
+    hire = employee_hire(int(eid))
+    if hire is None:
+        scan.add('fk_employee', n, 'employee_id %s does not exist' % eid)
+    return hire
+
+def check_payroll_row(scan, n, row):
+    hire = check_employee_ref(scan, n, row)
+    if row['amount'] is not None and float(row['amount']) < 0:
+        scan.add('chk_payroll_amount_nonneg', n, 'amount %s' % row['amount'])
+    if hire and row['pay_date'] is not None and not gen.hire_before_pay(datetime.date.fromordinal(hire), row['pay_date']):
+        scan.add('payroll_pay_date_after_hire', n, 'pay_date %s before hire_date %s of employee %s'
+                 % (row['pay_date'], datetime.date.fromordinal(hire), row['employee_id']))
+
+def check_license_row(scan, n, row):
+    check_employee_ref(scan, n, row)
+    if row['license_name'] is not None and row['employee_id'] is not None:
+        rank, base = license_rank(row['license_name'])
+        if rank:
+            key = (int(row['employee_id']), base)
+            scan.ranked[key] = max(rank, scan.ranked.get(key, 0))
+
+def check_shift_row(scan, n, row):
+    check_employee_ref(scan, n, row)
+    day, order = row['day_of_week'], row['escalation_order']
+    start, end = row['start_time'], row['end_time']
+    if day is not None and not 1 <= int(day) <= 7:
+        scan.add('chk_oncall_day_range', n, 'day_of_week %s' % day)
+    if order is not None and int(order) <= 0:
+        scan.add('chk_escalation_positive', n, 'escalation_order %s' % order)
+    if start is not None and end is not None and not start < end:
+        scan.add('chk_shift_order', n, 'start %s, end %s' % (start, end))
+    if None in (day, order, start, end, row['employee_id']):
+        return
+    key = (int(row['employee_id']), int(day))
+    groups = scan.edges
+    if not groups or groups[-1][0] != key:
+        if len(groups) == 3:      # keep the first group and the last two open
+            for rule, line, detail in shift_group_violations(groups[1][1]):
+                scan.add(rule, line, detail)
+            del groups[1]
+        groups.append((key, []))
+    groups[-1][1].append((start, end, int(order), n))
+
+def finish_shifts(scan):
+    """Check the groups that lie inside the chunk; the first and last are left to the parent."""
+    groups = scan.edges
+    if len(groups) == 3:
+        for rule, line, detail in shift_group_violations(groups[1][1]):
+            scan.add(rule, line, detail)
+        del groups[1]
+
+def check_org_path_row(scan, n, row):
+    check_employee_ref(scan, n, row)
+
+CHECK_HANDLERS = {
+    'department': check_parent_row,
+    'position': check_parent_row,
+    'employee': check_employee_row,
+    'employee_org_path': check_org_path_row,
+    'payroll': check_payroll_row,
+    'employee_license': check_license_row,
+    'oncall_shift': check_shift_row,
+}
+FINISH_HANDLERS = {'oncall_shift': finish_shifts}
+
+def find_row(scan, n, row):
+    """Second pass: report the lines of duplicate keys / lower-ranked licenses."""
+    if scan.task.mode == 'email':
+        if row['email'] is not None and email_hash(row['email']) in _SHARED['find']:
+            scan.found.append((n, row['email']))
+    elif scan.task.mode == 'id':
+        rid = int(row[ID_COLUMNS[scan.task.table]])
+        if rid in _SHARED['find']:
+            scan.found.append((n, rid))
+    elif scan.task.mode == 'rank' and row['license_name'] is not None and row['employee_id'] is not None:
+        rank, base = license_rank(row['license_name'])
+        top = _SHARED['find'].get((int(row['employee_id']), base), 0)
+        if rank < top:
+            scan.found.append((n, '%s (employee %s) next to rank %d' % (row['license_name'], row['employee_id'], top)))
+
+
+# --------------------------- Parent side ---------------------------
+
+def sorted_keys(ids):
+    """
+    employee_id << 32 | row position for every row, sorted, as an array('q'). With
+    numpy the keys are sorted as one int64 array; without it they are split into
+    BUCKETS id ranges and sorted one range at a time, so only one bucket is ever a
+    list of Python ints.
+    """
+    if not ids:
+        return array.array('q')
+    if gen.np is not None:
+        np = gen.np
+        keys = (np.frombuffer(ids, dtype=np.int64) << 32) | np.arange(len(ids), dtype=np.int64)
+        keys.sort()
+        return array.array('q', keys.tobytes())
+    lo = min(ids)
+    width = (max(ids) - lo) // BUCKETS + 1
+    buckets = [array.array('q') for _ in range(BUCKETS)]
+    for pos, eid in enumerate(ids):
+        buckets[(eid - lo) // width].append((eid << 32) | pos)
+    keys = array.array('q')
+    for i in range(BUCKETS):
+        keys.extend(sorted(buckets[i]))
+        buckets[i] = None
+    return keys
+
+
+class Validator:
+    """Runs the passes over a list of output directories and collects the violations."""
+
+    def __init__(self, dirs, jobs=1):
+        self.dirs = dirs
+        self.jobs = max(1, jobs)
+        self.files = {table: table_files(dirs, table) for table in TABLES}
+        self.counts = collections.Counter()
+        self.violations = []
+        self.rows = collections.Counter()
+
+    def add(self, rule, path, line, detail):
+        self.counts[rule] += 1
+        if self.counts[rule] <= MAX_REPORT:
+            self.violations.append(Violation(rule, path, line, detail))
+
+    def run(self, tasks, shared):
+        """Scan `tasks`; yields (task, scan, first line number) in task order."""
+        if self.jobs == 1 or len(tasks) == 1:
+            _init_worker(shared)
+            results = map(scan_chunk, tasks)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(min(self.jobs, len(tasks)), _init_worker, (shared,))
+            results = pool.imap(scan_chunk, tasks)
+        offsets = {}
+        try:
+            for task, scan in zip(tasks, results):
+                first = offsets.get(task.path, 0)
+                offsets[task.path] = first + scan.lines
+                if task.mode == 'check':
+                    self.rows[task.table] += scan.rows
+                for rule, line, detail in scan.violations:
+                    self.add(rule, task.path, first + line, detail)
+                for rule, n in scan.counts.items():
+                    # the scan listed at most MAX_REPORT of them
+                    self.counts[rule] += n - min(n, MAX_REPORT)
+                yield task, scan, first
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    def tasks(self, tables, mode='check'):
+        return [t for table in tables for path in self.files[table] for t in plan_tasks(path, table, mode)]
+
+    def find(self, tables, mode, keys, rule, describe):
+        """Second pass: report every row whose key is in `keys` under `rule`."""
+        for task, scan, first in self.run(self.tasks(tables, mode), {'find': keys}):
+            for line, key in scan.found:
+                self.add(rule, task.path, first + line, describe(key))
+
+    def validate(self):
+        if not self.files['employee']:
+            raise SystemExit('no employee.sql in %s' % ', '.join(self.dirs))
+        departments = self.check_parents('department', None)
+        positions = self.check_parents('position', departments)
+        keys, hire = self.check_employees(departments, positions)
+        self.check_children(keys, hire)
+        return not self.counts
+
+    def check_parents(self, table, departments):
+        """department / position: ids, NOT NULL and UNIQUE name / title. None if the table has no file."""
+        if not self.files[table]:
+            return None
+        ids, seen = set(), {}
+        for task, scan, first in self.run(self.tasks([table]), {'departments': departments}):
+            for rid, (line, name) in zip(scan.ids, scan.names):
+                if rid in ids:
+                    self.add('pk_' + table, task.path, first + line, '%s %d repeated' % (ID_COLUMNS[table], rid))
+                ids.add(rid)
+                if name in seen:
+                    self.add('%s_unique' % ('dept_name' if table == 'department' else 'position_title'),
+                             task.path, first + line, '%r repeats line %d' % (name, seen[name]))
+                seen.setdefault(name, first + line)
+        return ids
+
+    def check_employees(self, departments, positions):
+        """
+        Employee rows: per-row checks in the workers, then uniqueness, manager FK and
+        cycles here. Returns the lookup arrays for the child tables: keys (employee_id
+        << 32 | row position, sorted) and hire ordinals by row position.
+        """
+        ids, managers, hire, lines = array.array('q'), array.array('q'), array.array('i'), array.array('i')
+        where = []    # (first row position, path) per task
+        buckets = [array.array('q') for _ in range(BUCKETS)]
+        for task, scan, first in self.run(self.tasks(['employee']), {'departments': departments, 'positions': positions}):
+            where.append((len(ids), task.path))
+            ids.extend(scan.ids)
+            managers.extend(scan.managers)
+            hire.extend(scan.hire)
+            lines.extend(line + first for line in scan.id_lines)
+            for bucket, part in zip(buckets, scan.email_buckets):
+                bucket.extend(part)
+        starts = [w[0] for w in where]
+        locate = lambda pos: (where[bisect.bisect_right(starts, pos) - 1][1], lines[pos])
+
+        keys = sorted_keys(ids)
+        unique = array.array('q')
+        for k in keys:
+            if unique and unique[-1] >> 32 == k >> 32:
+                self.add('pk_employee', *locate(k & 0xffffffff), 'employee_id %d repeats line %d'
+                         % (k >> 32, lines[unique[-1] & 0xffffffff]))
+            else:
+                unique.append(k)
+        keys = unique
+
+        dup_emails = set()
+        for bucket in buckets:
+            if len(set(bucket)) != len(bucket):
+                seen = set()
+                dup_emails.update(h for h in bucket if h in seen or seen.add(h))
+        if dup_emails:
+            self.find(['employee'], 'email', dup_emails, 'employee_email_unique', lambda email: 'email %s repeated' % email)
+
+        self.check_managers(ids, managers, keys, locate)
+        return keys, hire
+
+    def check_managers(self, ids, managers, keys, locate):
+        """manager_id FK, nobody their own manager, no cycles (one walk up per chain)."""
+        parent = array.array('q', bytes(8 * len(ids)))
+        for pos, manager in enumerate(managers):
+            parent[pos] = NULL_ID
+            if manager == NULL_ID:
+                continue
+            if manager == ids[pos]:
+                self.add('manager_cycle', *locate(pos), 'employee %d is their own manager' % manager)
+                continue
+            i = bisect.bisect_left(keys, manager << 32)
+            if i < len(keys) and keys[i] >> 32 == manager:
+                parent[pos] = keys[i] & 0xffffffff
+            else:
+                self.add('fk_manager', *locate(pos), 'manager_id %d does not exist' % manager)
+        state = array.array('q', bytes(8 * len(ids)))   # 0 new, walk number while on the walk, -1 done
+        for start in range(len(ids)):
+            walk, pos = start + 1, start
+            chain = []
+            while pos != NULL_ID and state[pos] == 0:
+                state[pos] = walk
+                chain.append(pos)
+                pos = parent[pos]
+            if pos != NULL_ID and state[pos] == walk:
+                self.add('manager_cycle', *locate(pos), 'employee %d is in a manager cycle of %d'
+                         % (ids[pos], len(chain) - chain.index(pos)))
+            for p in chain:
+                state[p] = -1
+
+    def check_children(self, keys, hire):
+        seen = collections.defaultdict(bytearray)     # table -> bitmap of the ids read so far
+        dups = collections.defaultdict(set)
+        ranked = {}
+        pending = {}     # path -> employee-day group still open at the end of the file's last chunk
+        for task, scan, first in self.run(self.tasks(CHILD_TABLES), {'keys': keys, 'hire': hire}):
+            bitmap = seen[task.table]
+            for rid in scan.ids:
+                byte, bit = rid >> 3, 1 << (rid & 7)
+                if byte >= len(bitmap):
+                    bitmap.extend(bytes(max(byte + 1 - len(bitmap), len(bitmap) // 2)))
+                if bitmap[byte] & bit:
+                    dups[task.table].add(rid)
+                bitmap[byte] |= bit
+            for key, rank in scan.ranked.items():
+                ranked[key] = max(rank, ranked.get(key, 0))
+            if task.table == 'oncall_shift':
+                self.stitch_shifts(task.path, scan.edges, first, pending)
+        for path, (key, group) in pending.items():
+            self.check_shift_group(path, group)
+
+        seen.clear()
+        for table, ids in dups.items():
+            column = ID_COLUMNS[table]
+            self.find([table], 'id', ids, 'pk_' + table, lambda rid: '%s %d repeated' % (column, rid))
+        if ranked:
+            self.find(['employee_license'], 'rank', ranked, 'license_rank', lambda detail: detail)
+
+    def stitch_shifts(self, path, edges, first, pending):
+        """Join a chunk's edge groups with the group left open by the previous chunk of the file."""
+        edges = [(key, [(s, e, o, line + first) for s, e, o, line in group]) for key, group in edges]
+        if not edges:
+            return
+        if path in pending and pending[path][0] == edges[0][0]:
+            edges[0][1][:0] = pending.pop(path)[1]
+        elif path in pending:
+            self.check_shift_group(path, pending.pop(path)[1])
+        for key, group in edges[:-1]:
+            self.check_shift_group(path, group)
+        pending[path] = edges[-1]
+
+    def check_shift_group(self, path, group):
+        for rule, line, detail in shift_group_violations(group):
+            self.add(rule, path, line, detail)
+
+    def report(self, out=sys.stdout):
+        for rule in sorted(self.counts):
+            out.write('%s: %d violation(s)\n' % (rule, self.counts[rule]))
+            for v in sorted((v for v in self.violations if v.rule == rule), key=lambda v: (v.path, v.line)):
+                out.write('  %s:%d  %s\n' % (v.path, v.line, v.detail))
+
+
+# --------------------------- CLI ---------------------------
+
+def parse_args():
+    p = argparse.ArgumentParser(description='Check generated personnel SQL / COPY files against the schema rules before loading them.')
+    p.add_argument('dirs', nargs='+', help='Output directories in load order (a run, then its --append deltas).')
+    p.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                   help='Worker processes (default: all cores).')
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    validator = Validator(args.dirs, args.jobs)
+    ok = validator.validate()
+    validator.report()
+    print('Checked %d rows (%s) in %.1f s with %d process(es): %s'
+          % (sum(validator.rows.values()), ', '.join('%s %d' % kv for kv in validator.rows.items()),
+             time.perf_counter() - start, validator.jobs, 'OK' if ok else '%d violation(s)' % sum(validator.counts.values())))
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
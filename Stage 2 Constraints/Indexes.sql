@@ -0,0 +1,56 @@
+---------------------------------------------------------------------
+-- Secondary indexes for the Stage 2 queries, the Stage 3 views and the
+-- functions. personnel_init.sql / Constraints.sql only create primary
+-- keys and unique constraints, so these filters used to scan whole tables.
+-- Run after the data is loaded (CREATE INDEX IF NOT EXISTS, so the script
+-- can be re-run). IndexesDrop.sql removes them again; IndexesExplain.sql
+-- shows the plans before / after (measured at 1M employees:
+-- explain_before.txt / explain_after.txt).
+---------------------------------------------------------------------
+
+-- Employee
+-- No index for Q1 / v_active_employees: ~98% of employees are active, so a
+-- partial (last_name, first_name) WHERE active index was never chosen over a
+-- sequential scan and sort.
+-- fn_department_headcount and Q5: active employees of one department
+CREATE INDEX IF NOT EXISTS idx_employee_active_dept
+  ON employee (department_id) WHERE active;
+-- manager self-join: direct reports of a manager, and the FK check when a
+-- manager row is deleted or its id changes
+CREATE INDEX IF NOT EXISTS idx_employee_manager
+  ON employee (manager_id) WHERE manager_id IS NOT NULL;
+
+-- Payroll
+-- Q9, fn_monthly_pay, v_employee_overview.payments_count, FK cascade:
+-- one employee's payments, optionally within a pay_date range
+CREATE INDEX IF NOT EXISTS idx_payroll_employee_pay_date
+  ON payroll (employee_id, pay_date) INCLUDE (amount);
+-- Q11 (one year for all employees) and Q9's date range
+CREATE INDEX IF NOT EXISTS idx_payroll_pay_date
+  ON payroll (pay_date) INCLUDE (employee_id, amount);
+
+-- Employee licenses
+-- Q3, Q10, Q7 and v_current_licenses: ranges on expiry_date
+CREATE INDEX IF NOT EXISTS idx_license_expiry
+  ON employee_license (expiry_date) INCLUDE (employee_id);
+-- prevent_lower_license_by_name trigger, joins to employee, FK cascade
+CREATE INDEX IF NOT EXISTS idx_license_employee
+  ON employee_license (employee_id);
+
+-- On-call shifts
+-- Q4, Q6 (ROW_NUMBER() OVER (PARTITION BY employee_id, day_of_week ORDER BY
+-- start_time)), v_oncall_shifts_valid grouped by employee, FK cascade
+CREATE INDEX IF NOT EXISTS idx_shift_employee_day_start
+  ON oncall_shift (employee_id, day_of_week, start_time);
+-- No index for Q12: a shift overlaps ~20% of the same day's shifts, so the
+-- join's output dominates. With (day_of_week, start_time) the planner did
+-- range scans per outer shift and the query took 4-5x longer (~250 s vs ~55 s).
+-- With shift_id included the scans were index-only, but the query still
+-- took ~143 s.
+
+ANALYZE employee;
+ANALYZE payroll;
+ANALYZE employee_license;
+ANALYZE oncall_shift;
+
+-- End of Indexes.sql
@@ -0,0 +1,19 @@
+---------------------------------------------------------------------
+-- Remove the indexes created by Indexes.sql (for "before" measurements),
+-- and the two earlier versions of it created but no longer do.
+---------------------------------------------------------------------
+
+DROP INDEX IF EXISTS idx_employee_active_name;
+DROP INDEX IF EXISTS idx_employee_active_dept;
+DROP INDEX IF EXISTS idx_employee_manager;
+DROP INDEX IF EXISTS idx_payroll_employee_pay_date;
+DROP INDEX IF EXISTS idx_payroll_pay_date;
+DROP INDEX IF EXISTS idx_license_expiry;
+DROP INDEX IF EXISTS idx_license_employee;
+DROP INDEX IF EXISTS idx_shift_employee_day_start;
+DROP INDEX IF EXISTS idx_shift_day_start;
+
+ANALYZE employee;
+ANALYZE payroll;
+ANALYZE employee_license;
+ANALYZE oncall_shift;
@@ -0,0 +1,195 @@
+---------------------------------------------------------------------
+-- Plans and timings for the queries Indexes.sql targets (psql script).
+-- Compare a run without and with the indexes on the same data, e.g. a
+-- 1M-employee dataset from personnel_generator.py -n 1000000:
+--
+--   psql -d personnel -f IndexesDrop.sql
+--   psql -d personnel -f IndexesExplain.sql -o explain_before.txt
+--   psql -d personnel -f Indexes.sql
+--   psql -d personnel -f IndexesExplain.sql -o explain_after.txt
+--
+-- Only the read side of the queries is explained; the parameterised
+-- queries use the same values as ParamQueries.sql. Each plan is headed by
+-- an "== <query>" line in the output.
+--
+-- explain_before.txt / explain_after.txt next to this script are such a
+-- pair, for personnel_generator.py -n 1000000 --seed 1 --load on
+-- PostgreSQL 16 (1 CPU, shared_buffers=512MB, work_mem=64MB), each the
+-- second of two consecutive runs.
+---------------------------------------------------------------------
+
+\timing on
+
+-- Q1 / v_active_employees: active employees by name
+\qecho '== Q1 / v_active_employees: active employees by name'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT
+  e.employee_id,
+  e.first_name || ' ' || e.last_name AS full_name,
+  d.name          AS department,
+  p.title         AS position,
+  COALESCE(m.first_name || ' ' || m.last_name, '—') AS manager,
+  e.email,
+  e.hire_date
+FROM employee e
+LEFT JOIN department d ON e.department_id = d.department_id
+LEFT JOIN position p   ON e.position_id = p.position_id
+LEFT JOIN employee m   ON e.manager_id = m.employee_id
+WHERE e.active = TRUE
+ORDER BY e.last_name, e.first_name;
+
+-- manager self-join: direct reports of one manager
+\qecho '== manager self-join: direct reports of one manager'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT r.employee_id, r.first_name, r.last_name
+FROM employee m
+JOIN employee r ON r.manager_id = m.employee_id
+WHERE m.employee_id = (SELECT manager_id FROM employee WHERE manager_id IS NOT NULL LIMIT 1);
+
+-- fn_department_headcount body
+\qecho '== fn_department_headcount body'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT COUNT(*)
+FROM employee
+WHERE department_id = 1 AND active = TRUE;
+
+-- Q3: licenses expiring in the next 60 days
+\qecho '== Q3: licenses expiring in the next 60 days'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT
+  el.license_id,
+  el.employee_id,
+  e.first_name || ' ' || e.last_name AS employee,
+  el.license_name,
+  el.expiry_date,
+  (el.expiry_date - CURRENT_DATE) AS days_until_expiry
+FROM employee_license el
+JOIN employee e ON el.employee_id = e.employee_id
+WHERE el.expiry_date IS NOT NULL
+  AND el.expiry_date BETWEEN CURRENT_DATE AND (CURRENT_DATE + INTERVAL '60 days')
+ORDER BY el.expiry_date ASC;
+
+-- Q10 (600 days)
+\qecho '== Q10 (600 days)'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT
+  el.employee_id,
+  e.first_name || ' ' || e.last_name AS employee,
+  COUNT(*) AS expiring_licenses,
+  MIN(el.expiry_date) AS nearest_expiry
+FROM employee_license el
+JOIN employee e ON el.employee_id = e.employee_id
+WHERE el.expiry_date IS NOT NULL
+  AND el.expiry_date BETWEEN CURRENT_DATE AND (CURRENT_DATE + (600 * INTERVAL '1 day'))
+GROUP BY el.employee_id, employee
+ORDER BY nearest_expiry ASC;
+
+-- Q7 (read side): expired licenses of inactive employees
+\qecho '== Q7 (read side): expired licenses of inactive employees'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT el.license_id
+FROM employee_license el
+JOIN employee e ON el.employee_id = e.employee_id
+WHERE e.active = false
+  AND el.expiry_date IS NOT NULL
+  AND el.expiry_date < (CURRENT_DATE - INTERVAL '365 days');
+
+-- v_current_licenses
+\qecho '== v_current_licenses'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM v_current_licenses WHERE employee_id = (SELECT MIN(employee_id) FROM employee_license);
+
+-- fn_monthly_pay body (one employee, one month)
+\qecho '== fn_monthly_pay body (one employee, one month)'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT COALESCE(SUM(amount),0)
+FROM payroll
+WHERE employee_id = (SELECT MIN(employee_id) FROM payroll)
+  AND EXTRACT(YEAR  FROM pay_date) = 2025
+  AND EXTRACT(MONTH FROM pay_date) = 9;
+
+-- Q9
+\qecho '== Q9'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT
+  e.employee_id,
+  e.first_name || ' ' || e.last_name AS full_name,
+  d.name AS department,
+  SUM(p.amount) AS total_paid
+FROM payroll p
+JOIN employee e ON p.employee_id = e.employee_id
+JOIN department d ON e.department_id = d.department_id
+WHERE d.name = 'IT'
+  AND p.pay_date BETWEEN '2021-01-01' AND '2029-06-30'
+GROUP BY e.employee_id, full_name, d.name
+ORDER BY total_paid DESC
+LIMIT 100000;
+
+-- Q11 (2024)
+\qecho '== Q11 (2024)'
+EXPLAIN (ANALYZE, BUFFERS)
+WITH yearly_employee AS (
+  SELECT
+    e.employee_id,
+    e.position_id,
+    SUM(p.amount) AS total_pay
+  FROM payroll p
+  JOIN employee e ON p.employee_id = e.employee_id
+  WHERE p.pay_date BETWEEN TO_DATE('2024-01-01','YYYY-MM-DD')
+                       AND TO_DATE('2024-12-31','YYYY-MM-DD')
+  GROUP BY e.employee_id, e.position_id
+)
+SELECT
+  pos.title AS position,
+  COUNT(ye.employee_id) AS employees_with_pay,
+  ROUND(AVG(ye.total_pay)::numeric,2) AS avg_total_pay,
+  MIN(ye.total_pay) AS min_total_pay,
+  MAX(ye.total_pay) AS max_total_pay,
+  SUM(ye.total_pay) AS sum_total_pay
+FROM yearly_employee ye
+LEFT JOIN position pos ON ye.position_id = pos.position_id
+GROUP BY pos.title
+ORDER BY avg_total_pay DESC NULLS LAST;
+
+-- Q4
+\qecho '== Q4'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT
+  e.employee_id,
+  e.first_name || ' ' || e.last_name AS employee,
+  COUNT(s.shift_id) AS shifts_per_week,
+  SUM(s.end_time - s.start_time) AS total_oncall_duration
+FROM oncall_shift s
+JOIN employee e ON s.employee_id = e.employee_id
+GROUP BY e.employee_id, employee
+ORDER BY total_oncall_duration DESC NULLS LAST;
+
+-- Q6 (read side): escalation order per employee / day
+\qecho '== Q6 (read side): escalation order per employee / day'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT shift_id,
+       ROW_NUMBER() OVER (PARTITION BY employee_id, day_of_week ORDER BY start_time) AS rn
+FROM oncall_shift;
+
+-- Q12 (day 1, first ~0.01% of the employee id range: without the indexes every
+-- s1 row is compared with all of the day's shifts, ~1M at 1M employees)
+\qecho '== Q12 (day 1, first ~0.01% of the employee id range)'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT
+  e1.employee_id AS emp1_id,
+  e2.employee_id AS emp2_id,
+  COUNT(*) AS overlapping_shifts_count
+FROM oncall_shift s1
+JOIN oncall_shift s2
+  ON s1.day_of_week = s2.day_of_week
+  AND s1.shift_id < s2.shift_id
+  AND s1.start_time < s2.end_time
+  AND s2.start_time < s1.end_time
+  AND s1.day_of_week = 1
+  AND s1.employee_id < 100100000
+JOIN employee e1 ON s1.employee_id = e1.employee_id
+JOIN employee e2 ON s2.employee_id = e2.employee_id
+GROUP BY e1.employee_id, e2.employee_id
+ORDER BY overlapping_shifts_count DESC;
+
+\timing off
@@ -0,0 +1,96 @@
+---------------------------------------------------------------------
+-- Partition pruning on the partitioned schema (psql script).
+-- Load a dataset into personnel_init_partitioned.sql's tables, e.g.
+--
+--   python personnel_generator.py -n 1000000 --partitioned --format copy -o out
+--   psql -d personnel -f personnel_init_partitioned.sql
+--   psql -d personnel -f out/department.sql -f out/position.sql -f out/employee.sql
+--   ls out/payroll_y*.sql out/oncall_shift_d*.sql out/employee_license.sql |
+--     xargs -P 8 -I{} psql -d personnel -f {}
+--   psql -d personnel -f out/set_sequences.sql
+--   psql -d personnel -f PartitionsExplain.sql
+--
+-- Each plan should only list the partitions named in the comment
+-- ("Subplans Removed" for the ones pruned at run time).
+---------------------------------------------------------------------
+
+\timing on
+
+-- Q9: pay_date BETWEEN '2021-01-01' AND '2029-06-30' -> payroll_y2021..payroll_y2029
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT
+  e.employee_id,
+  e.first_name || ' ' || e.last_name AS full_name,
+  d.name AS department,
+  SUM(p.amount) AS total_paid
+FROM payroll p
+JOIN employee e ON p.employee_id = e.employee_id
+JOIN department d ON e.department_id = d.department_id
+WHERE d.name = 'IT'
+  AND p.pay_date BETWEEN '2021-01-01' AND '2029-06-30'
+GROUP BY e.employee_id, full_name, d.name
+ORDER BY total_paid DESC
+LIMIT 100000;
+
+-- Q11 (2024): TO_DATE is only STABLE, so the pruning to payroll_y2024 happens at executor start
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT e.position_id, SUM(p.amount) AS total_pay
+FROM payroll p
+JOIN employee e ON p.employee_id = e.employee_id
+WHERE p.pay_date BETWEEN TO_DATE('2024-01-01','YYYY-MM-DD')
+                     AND TO_DATE('2024-12-31','YYYY-MM-DD')
+GROUP BY e.position_id;
+
+-- ParamQueries.sql q11: the same, pruned per EXECUTE (also with a generic plan)
+PREPARE q11_pruning(int) AS
+SELECT COUNT(*), SUM(amount)
+FROM payroll
+WHERE pay_date BETWEEN TO_DATE($1::text || '-01-01','YYYY-MM-DD')
+                   AND TO_DATE($1::text || '-12-31','YYYY-MM-DD');
+EXPLAIN (ANALYZE, BUFFERS) EXECUTE q11_pruning(2024);
+DEALLOCATE q11_pruning;
+
+-- fn_monthly_pay (function/f3 body, pay_date range) -> payroll_y2025
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT COALESCE(SUM(amount),0)
+FROM payroll
+WHERE employee_id = (SELECT MIN(employee_id) FROM employee)
+  AND pay_date >= make_date(2025, 9, 1)
+  AND pay_date <  make_date(2025, 9, 1) + INTERVAL '1 month';
+
+-- Q2 has no pay_date filter, so nothing is pruned; with partitionwise aggregation
+-- each yearly partition is aggregated on its own (see RollupQueries.sql --Q2R for
+-- the cheap version)
+SET enable_partitionwise_aggregate = on;
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT
+  date_trunc('month', pay_date)                AS month,
+  COUNT(*)                                     AS payments_count,
+  SUM(amount)::numeric(18,2)                   AS total_paid,
+  ROUND(AVG(amount)::numeric,2)                AS avg_payment,
+  MIN(amount)                                  AS smallest_payment,
+  MAX(amount)                                  AS largest_payment
+FROM payroll
+GROUP BY date_trunc('month', pay_date)
+ORDER BY month DESC;
+RESET enable_partitionwise_aggregate;
+
+-- Q12 (day 1): day_of_week = 1 -> oncall_shift_d1 on both sides of the self-join
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT
+  s1.employee_id AS emp1_id,
+  s2.employee_id AS emp2_id,
+  COUNT(*) AS overlapping_shifts_count
+FROM oncall_shift s1
+JOIN oncall_shift s2
+  ON s1.day_of_week = s2.day_of_week
+  AND s1.shift_id < s2.shift_id
+  AND s1.start_time < s2.end_time
+  AND s2.start_time < s1.end_time
+WHERE s1.day_of_week = 1
+  AND s2.day_of_week = 1
+  AND s1.employee_id < 110000000
+GROUP BY s1.employee_id, s2.employee_id
+ORDER BY overlapping_shifts_count DESC;
+
+\timing off
@@ -0,0 +1,247 @@
+---------------------------------------------------------------------
+-- Statement-level versions of the Constraints.sql triggers.
+-- Run after Constraints.sql: the FOR EACH ROW triggers are dropped and
+-- replaced by AFTER ... FOR EACH STATEMENT triggers with transition tables
+-- (REFERENCING NEW TABLE), which check a whole INSERT / UPDATE batch with
+-- one set-based query and report every violating row in a single error
+-- (the first bulk_error_rows() rows are listed, plus the total).
+-- The rules are the same as before (see ConstraintsViolations.sql):
+--   payroll.pay_date on or after the employee's hire_date
+--   no manager cycles (and nobody their own manager)
+--   no lower-ranked license when a higher one with the same base name exists
+-- Because the check runs after the whole statement, rows of the same batch
+-- see each other regardless of their order.
+-- A statement trigger only fires for the table the statement names, so on
+-- the partitioned schema (personnel_init_partitioned.sql) the payroll
+-- triggers are also created on every partition of payroll: the
+-- --partitioned files INSERT / COPY straight into payroll_yNNNN. Run the
+-- script again after adding a partition.
+---------------------------------------------------------------------
+
+-- license-name rank and base name (first word junior|intermediate|senior)
+CREATE OR REPLACE FUNCTION license_rank(name TEXT)
+RETURNS INT LANGUAGE sql IMMUTABLE AS $$
+  SELECT CASE lower(split_part(coalesce(name, ''), ' ', 1))
+           WHEN 'junior' THEN 1
+           WHEN 'intermediate' THEN 2
+           WHEN 'senior' THEN 3
+           ELSE 0
+         END;
+$$;
+
+CREATE OR REPLACE FUNCTION license_base(name TEXT)
+RETURNS TEXT LANGUAGE sql IMMUTABLE AS $$
+  SELECT btrim(lower(CASE WHEN license_rank(name) > 0
+                          THEN substr(name, length(split_part(name, ' ', 1)) + 1)
+                          ELSE name
+                     END));
+$$;
+
+-- the rows listed in a bulk error message
+CREATE OR REPLACE FUNCTION bulk_error_rows()
+RETURNS INT LANGUAGE sql IMMUTABLE AS $$ SELECT 20 $$;
+
+
+---------------------------------------------------------------------
+-- Payroll: pay_date on or after hire_date
+---------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION payroll_pay_date_after_hire_bulk()
+RETURNS TRIGGER AS $$
+DECLARE
+  bad_count BIGINT;
+  bad_list TEXT;
+BEGIN
+  WITH bad AS (
+    SELECT n.payroll_id, n.employee_id, n.pay_date, e.hire_date
+    FROM new_rows n
+    LEFT JOIN employee e ON e.employee_id = n.employee_id
+    WHERE e.hire_date IS NULL OR n.pay_date < e.hire_date
+  )
+  SELECT (SELECT COUNT(*) FROM bad),
+         (SELECT string_agg(
+                   CASE WHEN b.hire_date IS NULL
+                        THEN format('payroll %s: employee %s does not exist or has no hire_date', b.payroll_id, b.employee_id)
+                        ELSE format('payroll %s: pay_date %s is before employee %s hire_date %s',
+                                    b.payroll_id, b.pay_date, b.employee_id, b.hire_date)
+                   END, E'\n')
+          FROM (SELECT * FROM bad ORDER BY payroll_id LIMIT bulk_error_rows()) b)
+  INTO bad_count, bad_list;
+
+  IF bad_count > 0 THEN
+    RAISE EXCEPTION '% payroll row(s) dated before the employee''s hire_date', bad_count
+      USING DETAIL = bad_list;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_payroll_pay_date_before_ins_upd ON payroll;
+DROP TRIGGER IF EXISTS trg_payroll_pay_date_bulk_ins ON payroll;
+DROP TRIGGER IF EXISTS trg_payroll_pay_date_bulk_upd ON payroll;
+CREATE TRIGGER trg_payroll_pay_date_bulk_ins
+AFTER INSERT ON payroll
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION payroll_pay_date_after_hire_bulk();
+CREATE TRIGGER trg_payroll_pay_date_bulk_upd
+AFTER UPDATE ON payroll
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION payroll_pay_date_after_hire_bulk();
+
+-- the same triggers on each partition (none without the partitioned schema)
+DO $$
+DECLARE
+  part REGCLASS;
+BEGIN
+  FOR part IN SELECT inhrelid::regclass FROM pg_inherits WHERE inhparent = 'payroll'::regclass LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS trg_payroll_pay_date_bulk_ins ON %s', part);
+    EXECUTE format('DROP TRIGGER IF EXISTS trg_payroll_pay_date_bulk_upd ON %s', part);
+    EXECUTE format('CREATE TRIGGER trg_payroll_pay_date_bulk_ins AFTER INSERT ON %s '
+                   'REFERENCING NEW TABLE AS new_rows '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION payroll_pay_date_after_hire_bulk()', part);
+    EXECUTE format('CREATE TRIGGER trg_payroll_pay_date_bulk_upd AFTER UPDATE ON %s '
+                   'REFERENCING NEW TABLE AS new_rows '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION payroll_pay_date_after_hire_bulk()', part);
+  END LOOP;
+END;
+$$;
+
+
+---------------------------------------------------------------------
+-- Employee: no manager cycles
+-- Walks up the manager chain of every inserted row / row whose manager
+-- changed; a chain that comes back to its start is a cycle. `path` stops
+-- the walk on any other loop.
+---------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION prevent_employee_manager_cycle_bulk()
+RETURNS TRIGGER AS $$
+DECLARE
+  emp_ids INT[];
+  mgr_ids INT[];
+  bad_count BIGINT;
+  bad_list TEXT;
+BEGIN
+  -- (employee, new manager) pairs to check; old_rows only exists for UPDATE
+  IF TG_OP = 'INSERT' THEN
+    SELECT array_agg(employee_id), array_agg(manager_id) INTO emp_ids, mgr_ids
+    FROM new_rows WHERE manager_id IS NOT NULL;
+  ELSE
+    SELECT array_agg(n.employee_id), array_agg(n.manager_id) INTO emp_ids, mgr_ids
+    FROM new_rows n
+    LEFT JOIN old_rows o ON o.employee_id = n.employee_id
+    WHERE n.manager_id IS NOT NULL
+      AND n.manager_id IS DISTINCT FROM o.manager_id;
+  END IF;
+  IF emp_ids IS NULL THEN
+    RETURN NULL;
+  END IF;
+
+  WITH RECURSIVE changes(employee_id, manager_id) AS (
+    SELECT * FROM unnest(emp_ids, mgr_ids)
+  ),
+  chain(start_id, emp_id, mgr_id, path) AS (
+    SELECT c.employee_id, c.manager_id, e.manager_id, ARRAY[c.employee_id, c.manager_id]
+    FROM changes c
+    JOIN employee e ON e.employee_id = c.manager_id
+    WHERE c.manager_id <> c.employee_id
+    UNION ALL
+    SELECT ch.start_id, e.employee_id, e.manager_id, ch.path || e.employee_id
+    FROM chain ch
+    JOIN employee e ON e.employee_id = ch.mgr_id
+    WHERE ch.emp_id <> ch.start_id
+      AND (e.employee_id = ch.start_id OR NOT e.employee_id = ANY (ch.path))
+  ),
+  bad AS (
+    SELECT employee_id, manager_id, 'cannot be their own manager' AS reason
+    FROM changes
+    WHERE manager_id = employee_id
+    UNION ALL
+    SELECT c.employee_id, c.manager_id, 'manager loop: ' || array_to_string(ch.path, ' -> ')
+    FROM chain ch
+    JOIN changes c ON c.employee_id = ch.start_id
+    WHERE ch.emp_id = ch.start_id
+  )
+  SELECT (SELECT COUNT(*) FROM bad),
+         (SELECT string_agg(format('employee %s (manager %s): %s', b.employee_id, b.manager_id, b.reason), E'\n')
+          FROM (SELECT * FROM bad ORDER BY employee_id LIMIT bulk_error_rows()) b)
+  INTO bad_count, bad_list;
+
+  IF bad_count > 0 THEN
+    RAISE EXCEPTION '% employee row(s) would create a manager cycle', bad_count
+      USING DETAIL = bad_list;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_employee_manager_cycle ON employee;
+DROP TRIGGER IF EXISTS trg_employee_manager_cycle_bulk_ins ON employee;
+DROP TRIGGER IF EXISTS trg_employee_manager_cycle_bulk_upd ON employee;
+CREATE TRIGGER trg_employee_manager_cycle_bulk_ins
+AFTER INSERT ON employee
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION prevent_employee_manager_cycle_bulk();
+CREATE TRIGGER trg_employee_manager_cycle_bulk_upd
+AFTER UPDATE ON employee
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION prevent_employee_manager_cycle_bulk();
+
+
+---------------------------------------------------------------------
+-- Employee licenses: no lower rank next to a higher one (same base name)
+---------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION prevent_lower_license_by_name_bulk()
+RETURNS TRIGGER AS $$
+DECLARE
+  bad_count BIGINT;
+  bad_list TEXT;
+BEGIN
+  WITH n AS (
+    SELECT license_id, employee_id, license_name,
+           license_rank(license_name) AS rnk, license_base(license_name) AS base
+    FROM new_rows
+  ),
+  bad AS (
+    SELECT n.license_id, n.employee_id, n.license_name,
+           'a rank must be followed by a base name (e.g. "intermediate programmer")' AS reason
+    FROM n
+    WHERE n.rnk > 0 AND n.base = ''
+    UNION ALL
+    SELECT n.license_id, n.employee_id, n.license_name,
+           format('a higher-level license already exists for "%s"', n.base)
+    FROM n
+    WHERE EXISTS (
+      SELECT 1
+      FROM employee_license el
+      WHERE el.employee_id = n.employee_id
+        AND el.license_id <> n.license_id
+        AND license_rank(el.license_name) > n.rnk
+        AND license_base(el.license_name) = n.base
+    )
+  )
+  SELECT (SELECT COUNT(*) FROM bad),
+         (SELECT string_agg(format('license %s for employee %s "%s": %s',
+                                   b.license_id, b.employee_id, b.license_name, b.reason), E'\n')
+          FROM (SELECT * FROM bad ORDER BY license_id LIMIT bulk_error_rows()) b)
+  INTO bad_count, bad_list;
+
+  IF bad_count > 0 THEN
+    RAISE EXCEPTION '% license row(s) break the license rank rule', bad_count
+      USING DETAIL = bad_list;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_employee_license_prevent_lower_by_name ON employee_license;
+DROP TRIGGER IF EXISTS trg_employee_license_rank_bulk_ins ON employee_license;
+DROP TRIGGER IF EXISTS trg_employee_license_rank_bulk_upd ON employee_license;
+CREATE TRIGGER trg_employee_license_rank_bulk_ins
+AFTER INSERT ON employee_license
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION prevent_lower_license_by_name_bulk();
+CREATE TRIGGER trg_employee_license_rank_bulk_upd
+AFTER UPDATE ON employee_license
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION prevent_lower_license_by_name_bulk();
+
+-- End of StatementTriggers.sql
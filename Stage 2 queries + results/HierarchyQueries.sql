@@ -0,0 +1,44 @@
+-- Org-chart questions answered from org_hierarchy.sql's employee_org_path
+-- (GIN / primary-key lookups) instead of a WITH RECURSIVE walk over employee.
+-- X = the lowest-id root, Y = the lowest-id employee who has a manager.
+
+--Q13
+-- headcount under manager X (direct and indirect reports), by department
+SELECT
+  d.name AS department,
+  COUNT(*) AS employees,
+  COUNT(*) FILTER (WHERE e.active) AS active_employees
+FROM employee_org_path o
+JOIN employee e ON e.employee_id = o.employee_id
+LEFT JOIN department d ON d.department_id = e.department_id
+WHERE o.path @> ARRAY[(SELECT MIN(employee_id) FROM employee WHERE manager_id IS NULL)]
+  AND o.employee_id <> (SELECT MIN(employee_id) FROM employee WHERE manager_id IS NULL)
+GROUP BY d.name
+ORDER BY employees DESC;
+
+--Q14
+-- chain of command of employee Y, from the top down
+SELECT
+  c.level,
+  e.employee_id,
+  e.first_name || ' ' || e.last_name AS employee,
+  p.title AS position
+FROM employee_org_path o
+CROSS JOIN LATERAL unnest(o.path) WITH ORDINALITY AS c(employee_id, level)
+JOIN employee e ON e.employee_id = c.employee_id
+LEFT JOIN position p ON p.position_id = e.position_id
+WHERE o.employee_id = (SELECT MIN(employee_id) FROM employee WHERE manager_id IS NOT NULL)
+ORDER BY c.level;
+
+--Q15
+-- size and depth of every top-level manager's organisation
+SELECT
+  o.path[1] AS root_id,
+  r.first_name || ' ' || r.last_name AS root,
+  COUNT(*) - 1 AS reports,
+  MAX(o.depth) AS levels
+FROM employee_org_path o
+JOIN employee r ON r.employee_id = o.path[1]
+GROUP BY o.path[1], root
+ORDER BY reports DESC
+LIMIT 20;
@@ -0,0 +1,37 @@
+-- Q2 and Q11 answered from payroll_rollup.sql's tables instead of scanning payroll
+
+--Q2R
+SELECT
+  month,
+  payments_count,
+  total_paid                                   AS total_paid,
+  ROUND(total_paid / payments_count, 2)        AS avg_payment,
+  min_amount                                   AS smallest_payment,
+  max_amount                                   AS largest_payment
+FROM payroll_monthly_summary
+ORDER BY month DESC;
+
+--Q11R
+-- year 2024; the month range is sargable on payroll_employee_monthly(month)
+WITH yearly_employee AS (
+  SELECT
+    e.employee_id,
+    e.position_id,
+    SUM(m.total_paid) AS total_pay
+  FROM payroll_employee_monthly m
+  JOIN employee e ON m.employee_id = e.employee_id
+  WHERE m.month >= make_date(2024, 1, 1)
+    AND m.month <  make_date(2025, 1, 1)
+  GROUP BY e.employee_id, e.position_id
+)
+SELECT
+  pos.title AS position,
+  COUNT(ye.employee_id) AS employees_with_pay,
+  ROUND(AVG(ye.total_pay)::numeric,2) AS avg_total_pay,
+  MIN(ye.total_pay) AS min_total_pay,
+  MAX(ye.total_pay) AS max_total_pay,
+  SUM(ye.total_pay) AS sum_total_pay
+FROM yearly_employee ye
+LEFT JOIN position pos ON ye.position_id = pos.position_id
+GROUP BY pos.title
+ORDER BY avg_total_pay DESC NULLS LAST;
@@ -0,0 +1,116 @@
+-- =========================
+--  Org hierarchy paths
+--  employee_org_path : one row per employee, `path` = manager chain from the
+--                      root down to the employee (INT[]), `depth` = its length.
+--  personnel_generator.py writes the rows from its in-memory org chart; the
+--  statement-level triggers below keep them current when employees are added or
+--  manager_id changes (deletes cascade). employee_org_path_rebuild() recomputes
+--  everything from employee.manager_id.
+--  Subtree / chain-of-command queries: Stage 2 queries + results/HierarchyQueries.sql
+-- =========================
+
+CREATE TABLE IF NOT EXISTS employee_org_path (
+  employee_id INT PRIMARY KEY REFERENCES employee(employee_id) ON DELETE CASCADE,
+  depth INT NOT NULL,
+  path INT[] NOT NULL
+);
+-- "everyone under X": path @> ARRAY[X] (an id appears at most once per path)
+CREATE INDEX IF NOT EXISTS idx_employee_org_path_path
+  ON employee_org_path USING GIN (path);
+
+
+/* -------------------------
+   Recompute the paths of `ids` from employee.manager_id. `ids` must include the
+   descendants of every employee in it. The walk starts at the ids whose manager is
+   outside the set (their manager's stored path is current) and goes down the tree.
+   ------------------------- */
+CREATE OR REPLACE FUNCTION employee_org_path_recompute(ids INT[])
+RETURNS VOID AS $$
+  WITH RECURSIVE affected AS (
+    SELECT e.employee_id, e.manager_id
+    FROM employee e
+    JOIN (SELECT DISTINCT unnest(ids) AS employee_id) i ON i.employee_id = e.employee_id
+  ),
+  walk(employee_id, depth, path) AS (
+    SELECT a.employee_id, COALESCE(m.depth, 0) + 1, COALESCE(m.path, '{}'::INT[]) || a.employee_id
+    FROM affected a
+    LEFT JOIN employee_org_path m ON m.employee_id = a.manager_id
+    WHERE NOT EXISTS (SELECT 1 FROM affected p WHERE p.employee_id = a.manager_id)
+    UNION ALL
+    SELECT a.employee_id, w.depth + 1, w.path || a.employee_id
+    FROM walk w
+    JOIN affected a ON a.manager_id = w.employee_id
+  )
+  INSERT INTO employee_org_path (employee_id, depth, path)
+  SELECT employee_id, depth, path FROM walk
+  ON CONFLICT (employee_id) DO UPDATE
+  SET depth = EXCLUDED.depth,
+      path  = EXCLUDED.path;
+$$ LANGUAGE sql;
+
+/* -------------------------
+   Full rebuild (after loads that bypass the triggers)
+   ------------------------- */
+CREATE OR REPLACE FUNCTION employee_org_path_rebuild()
+RETURNS VOID AS $$
+BEGIN
+  TRUNCATE employee_org_path;
+  PERFORM employee_org_path_recompute(ARRAY(SELECT employee_id FROM employee));
+END;
+$$ LANGUAGE plpgsql;
+
+
+/* -------------------------
+   Incremental maintenance, one call per statement
+   INSERT: the new employees (a batch may contain managers and their reports).
+   UPDATE: employees whose manager_id changed, plus everything below them
+   (their old paths contain them: a GIN lookup).
+   The trigger names sort after the manager-cycle triggers, so a cycle is
+   rejected before any path is walked.
+   ------------------------- */
+CREATE OR REPLACE FUNCTION employee_org_path_maintain()
+RETURNS TRIGGER AS $$
+DECLARE
+  moved INT[];
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    SELECT array_agg(employee_id) INTO moved FROM new_rows;
+    IF moved IS NOT NULL THEN
+      PERFORM employee_org_path_recompute(moved);
+    END IF;
+    RETURN NULL;
+  END IF;
+
+  SELECT array_agg(n.employee_id) INTO moved
+  FROM new_rows n
+  JOIN old_rows o ON o.employee_id = n.employee_id
+  WHERE n.manager_id IS DISTINCT FROM o.manager_id;
+  IF moved IS NOT NULL THEN
+    PERFORM employee_org_path_recompute(ARRAY(
+      SELECT unnest(moved)
+      UNION
+      SELECT employee_id FROM employee_org_path WHERE path && moved
+    ));
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_employee_org_path_ins ON employee;
+CREATE TRIGGER trg_employee_org_path_ins
+AFTER INSERT ON employee
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION employee_org_path_maintain();
+
+DROP TRIGGER IF EXISTS trg_employee_org_path_upd ON employee;
+CREATE TRIGGER trg_employee_org_path_upd
+AFTER UPDATE ON employee
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION employee_org_path_maintain();
+
+
+-- paths missing (tables created before the generator wrote them): build them now
+SELECT employee_org_path_rebuild()
+WHERE NOT EXISTS (SELECT 1 FROM employee_org_path)
+  AND EXISTS (SELECT 1 FROM employee);
+ANALYZE employee_org_path;
@@ -0,0 +1,219 @@
+-- =========================
+--  Monthly payroll rollup
+--  payroll_monthly_summary   : one row per month (Q2)
+--  payroll_employee_monthly  : one row per employee and month (fn_monthly_pay, Q11;
+--                              join employee for per-department figures)
+--  Kept current by statement-level triggers on payroll and, because a statement
+--  trigger only fires for the table the statement names, on every partition of
+--  the partitioned schema too (the --partitioned files load straight into
+--  payroll_yNNNN; run the script again after adding a partition).
+--  TRUNCATE payroll empties both tables, truncating one partition rebuilds them.
+--  payroll_rollup_refresh() rebuilds both tables (run after bulk loads that
+--  bypass the triggers, e.g. with triggers disabled).
+--  Queries that read the rollup: Stage 2 queries + results/RollupQueries.sql
+-- =========================
+
+CREATE TABLE IF NOT EXISTS payroll_monthly_summary (
+  month DATE PRIMARY KEY,                 -- first day of the month
+  payments_count BIGINT NOT NULL,
+  total_paid NUMERIC(18,2) NOT NULL,
+  min_amount NUMERIC(12,2),               -- NULL only while being recomputed
+  max_amount NUMERIC(12,2)
+);
+
+CREATE TABLE IF NOT EXISTS payroll_employee_monthly (
+  employee_id INT NOT NULL REFERENCES employee(employee_id) ON DELETE CASCADE,
+  month DATE NOT NULL,
+  payments_count INT NOT NULL,
+  total_paid NUMERIC(18,2) NOT NULL,
+  PRIMARY KEY (employee_id, month)
+);
+-- Q11: all employees of one year
+CREATE INDEX IF NOT EXISTS idx_payroll_employee_monthly_month
+  ON payroll_employee_monthly (month) INCLUDE (employee_id, total_paid);
+
+
+/* -------------------------
+   Full rebuild (batch refresh)
+   ------------------------- */
+CREATE OR REPLACE FUNCTION payroll_rollup_refresh()
+RETURNS VOID AS $$
+BEGIN
+  TRUNCATE payroll_monthly_summary, payroll_employee_monthly;
+
+  INSERT INTO payroll_monthly_summary (month, payments_count, total_paid, min_amount, max_amount)
+  SELECT date_trunc('month', pay_date)::date, COUNT(*), SUM(amount), MIN(amount), MAX(amount)
+  FROM payroll
+  GROUP BY 1;
+
+  INSERT INTO payroll_employee_monthly (employee_id, month, payments_count, total_paid)
+  SELECT employee_id, date_trunc('month', pay_date)::date, COUNT(*), SUM(amount)
+  FROM payroll
+  GROUP BY 1, 2;
+END;
+$$ LANGUAGE plpgsql;
+
+
+/* -------------------------
+   Incremental maintenance
+   One call per statement: the changed rows are aggregated per month first,
+   so a bulk INSERT touches each summary row once. Deleted / updated-away rows
+   are subtracted; if one of them was a month's MIN or MAX, that month's
+   min / max is recomputed from payroll (a pay_date range scan). Emptied rows
+   are removed by key, so a statement only touches the rollup rows of the
+   employees / months it changed.
+   ------------------------- */
+CREATE OR REPLACE FUNCTION payroll_rollup_maintain()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'TRUNCATE' THEN
+    IF TG_RELID = 'payroll'::regclass THEN
+      TRUNCATE payroll_monthly_summary, payroll_employee_monthly;
+    ELSE
+      -- one partition: the other partitions' months stay
+      PERFORM payroll_rollup_refresh();
+    END IF;
+    RETURN NULL;
+  END IF;
+
+  IF TG_OP IN ('DELETE', 'UPDATE') THEN
+    WITH d AS (
+      SELECT date_trunc('month', pay_date)::date AS month,
+             COUNT(*) AS n, SUM(amount) AS total, MIN(amount) AS lo, MAX(amount) AS hi
+      FROM old_rows
+      GROUP BY 1
+    )
+    UPDATE payroll_monthly_summary s
+    SET payments_count = s.payments_count - d.n,
+        total_paid     = s.total_paid - d.total,
+        min_amount     = CASE WHEN d.lo <= s.min_amount THEN NULL ELSE s.min_amount END,
+        max_amount     = CASE WHEN d.hi >= s.max_amount THEN NULL ELSE s.max_amount END
+    FROM d
+    WHERE s.month = d.month;
+
+    WITH d AS (
+      SELECT employee_id, date_trunc('month', pay_date)::date AS month, COUNT(*) AS n, SUM(amount) AS total
+      FROM old_rows
+      GROUP BY 1, 2
+    )
+    UPDATE payroll_employee_monthly s
+    SET payments_count = s.payments_count - d.n,
+        total_paid     = s.total_paid - d.total
+    FROM d
+    WHERE s.employee_id = d.employee_id AND s.month = d.month;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO payroll_monthly_summary AS s (month, payments_count, total_paid, min_amount, max_amount)
+    SELECT date_trunc('month', pay_date)::date, COUNT(*), SUM(amount), MIN(amount), MAX(amount)
+    FROM new_rows
+    GROUP BY 1
+    ON CONFLICT (month) DO UPDATE
+    SET payments_count = s.payments_count + EXCLUDED.payments_count,
+        total_paid     = s.total_paid + EXCLUDED.total_paid,
+        -- a NULL (pending recompute) stays NULL
+        min_amount     = CASE WHEN s.min_amount IS NULL THEN NULL ELSE LEAST(s.min_amount, EXCLUDED.min_amount) END,
+        max_amount     = CASE WHEN s.max_amount IS NULL THEN NULL ELSE GREATEST(s.max_amount, EXCLUDED.max_amount) END;
+
+    INSERT INTO payroll_employee_monthly AS s (employee_id, month, payments_count, total_paid)
+    SELECT employee_id, date_trunc('month', pay_date)::date, COUNT(*), SUM(amount)
+    FROM new_rows
+    GROUP BY 1, 2
+    ON CONFLICT (employee_id, month) DO UPDATE
+    SET payments_count = s.payments_count + EXCLUDED.payments_count,
+        total_paid     = s.total_paid + EXCLUDED.total_paid;
+  END IF;
+
+  IF TG_OP IN ('DELETE', 'UPDATE') THEN
+    -- only the keys old_rows decremented can have dropped to zero
+    DELETE FROM payroll_employee_monthly s
+    USING (SELECT DISTINCT employee_id, date_trunc('month', pay_date)::date AS month FROM old_rows) d
+    WHERE s.employee_id = d.employee_id AND s.month = d.month
+      AND s.payments_count <= 0;
+
+    DELETE FROM payroll_monthly_summary s
+    USING (SELECT DISTINCT date_trunc('month', pay_date)::date AS month FROM old_rows) d
+    WHERE s.month = d.month
+      AND s.payments_count <= 0;
+
+    UPDATE payroll_monthly_summary s
+    SET (min_amount, max_amount) = (
+      SELECT MIN(p.amount), MAX(p.amount)
+      FROM payroll p
+      WHERE p.pay_date >= s.month AND p.pay_date < s.month + INTERVAL '1 month'
+    )
+    FROM (SELECT DISTINCT date_trunc('month', pay_date)::date AS month FROM old_rows) d
+    WHERE s.month = d.month
+      AND (s.min_amount IS NULL OR s.max_amount IS NULL);
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_payroll_rollup_ins ON payroll;
+CREATE TRIGGER trg_payroll_rollup_ins
+AFTER INSERT ON payroll
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION payroll_rollup_maintain();
+
+DROP TRIGGER IF EXISTS trg_payroll_rollup_upd ON payroll;
+CREATE TRIGGER trg_payroll_rollup_upd
+AFTER UPDATE ON payroll
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION payroll_rollup_maintain();
+
+DROP TRIGGER IF EXISTS trg_payroll_rollup_del ON payroll;
+CREATE TRIGGER trg_payroll_rollup_del
+AFTER DELETE ON payroll
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION payroll_rollup_maintain();
+
+DROP TRIGGER IF EXISTS trg_payroll_rollup_truncate ON payroll;
+CREATE TRIGGER trg_payroll_rollup_truncate
+AFTER TRUNCATE ON payroll
+FOR EACH STATEMENT EXECUTE FUNCTION payroll_rollup_maintain();
+
+-- the same triggers on each partition (none without the partitioned schema)
+DO $$
+DECLARE
+  part REGCLASS;
+BEGIN
+  FOR part IN SELECT inhrelid::regclass FROM pg_inherits WHERE inhparent = 'payroll'::regclass LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS trg_payroll_rollup_ins ON %s', part);
+    EXECUTE format('DROP TRIGGER IF EXISTS trg_payroll_rollup_upd ON %s', part);
+    EXECUTE format('DROP TRIGGER IF EXISTS trg_payroll_rollup_del ON %s', part);
+    EXECUTE format('DROP TRIGGER IF EXISTS trg_payroll_rollup_truncate ON %s', part);
+    EXECUTE format('CREATE TRIGGER trg_payroll_rollup_ins AFTER INSERT ON %s '
+                   'REFERENCING NEW TABLE AS new_rows '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION payroll_rollup_maintain()', part);
+    EXECUTE format('CREATE TRIGGER trg_payroll_rollup_upd AFTER UPDATE ON %s '
+                   'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION payroll_rollup_maintain()', part);
+    EXECUTE format('CREATE TRIGGER trg_payroll_rollup_del AFTER DELETE ON %s '
+                   'REFERENCING OLD TABLE AS old_rows '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION payroll_rollup_maintain()', part);
+    EXECUTE format('CREATE TRIGGER trg_payroll_rollup_truncate AFTER TRUNCATE ON %s '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION payroll_rollup_maintain()', part);
+  END LOOP;
+END;
+$$;
+
+
+/* -------------------------
+   fn_monthly_pay from the rollup: a primary-key lookup instead of
+   EXTRACT(YEAR / MONTH FROM pay_date) over the employee's payroll rows
+   ------------------------- */
+CREATE OR REPLACE FUNCTION fn_monthly_pay(emp_id INT, yr INT, mon INT)
+RETURNS NUMERIC LANGUAGE sql STABLE AS $$
+  SELECT COALESCE((
+    SELECT total_paid
+    FROM payroll_employee_monthly
+    WHERE employee_id = emp_id
+      AND month = make_date(yr, mon, 1)
+  ), 0);
+$$;
+
+SELECT payroll_rollup_refresh();
+ANALYZE payroll_monthly_summary;
+ANALYZE payroll_employee_monthly;
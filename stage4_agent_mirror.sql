@@ -0,0 +1,233 @@
+-- =========================
+--  Local mirror of the Advertising team's agents (stage 4)
+--  ads_local.agent          : copy of ads.agent (postgres_fdw foreign table on
+--                             other_team_srv), so v_agent_hr_profile and the
+--                             stage_4 q queries join local rows instead of pulling
+--                             the remote table for every query
+--  ads_local.mirror_state   : watermark (highest agentid pulled) and refresh times
+--  ads_local.mirror_refresh_log : one row per refresh
+--  ads_local.agent_mirror_status : staleness metrics
+--
+--  Refresh:  SELECT * FROM ads_local.refresh_agent();        -- incremental
+--            SELECT * FROM ads_local.refresh_agent(true);    -- full
+--  An incremental refresh pulls only agentid > watermark (the filter is sent to
+--  the remote server). ads.agent has no modification time, so renamed and deleted
+--  agents are picked up by a full refresh: one remote scan, merged into the
+--  mirror. refresh_agent() turns into a full refresh by itself when the last full
+--  one is older than mirror_state.full_refresh_interval (default 1 day).
+--  Schedule it with cron / pg_cron, e.g. every 5 minutes:
+--    psql -d personnel -c "SELECT * FROM ads_local.refresh_agent()"
+--
+--  Run after stage 4's setup (ads schema, main.employee, employee_agent_map).
+--  Test with two local databases: stage4_agent_mirror_test.sql
+-- =========================
+
+CREATE SCHEMA IF NOT EXISTS ads_local;
+
+CREATE TABLE IF NOT EXISTS ads_local.agent (
+  agentid INT PRIMARY KEY,
+  fullname VARCHAR NOT NULL,
+  pulled_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP   -- refresh that last wrote the row
+);
+
+CREATE TABLE IF NOT EXISTS ads_local.mirror_state (
+  table_name TEXT PRIMARY KEY,
+  watermark INT NOT NULL DEFAULT 0,                   -- highest remote id in the mirror
+  last_refresh TIMESTAMP,
+  last_full_refresh TIMESTAMP,
+  full_refresh_interval INTERVAL NOT NULL DEFAULT INTERVAL '1 day'
+);
+INSERT INTO ads_local.mirror_state (table_name) VALUES ('agent')
+ON CONFLICT (table_name) DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS ads_local.mirror_refresh_log (
+  refresh_id SERIAL PRIMARY KEY,
+  table_name TEXT NOT NULL,
+  mode TEXT NOT NULL CHECK (mode IN ('incremental', 'full')),
+  started_at TIMESTAMP NOT NULL,
+  duration INTERVAL NOT NULL,
+  rows_pulled INT NOT NULL,          -- rows that came over the wire
+  rows_inserted INT NOT NULL,
+  rows_updated INT NOT NULL,
+  rows_deleted INT NOT NULL,
+  watermark INT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_mirror_refresh_log_table
+  ON ads_local.mirror_refresh_log (table_name, refresh_id DESC);
+
+
+/* -------------------------
+   Refresh
+   The mirror_state row is locked first, so concurrent refreshes run one
+   after the other. Unchanged rows are not rewritten.
+   ------------------------- */
+CREATE OR REPLACE FUNCTION ads_local.refresh_agent(force_full BOOLEAN DEFAULT false)
+RETURNS TABLE (mode TEXT, rows_pulled INT, rows_inserted INT, rows_updated INT, rows_deleted INT, watermark INT) AS $$
+DECLARE
+  st ads_local.mirror_state%ROWTYPE;
+  started TIMESTAMP := clock_timestamp();
+  n_pulled INT;
+  n_inserted INT;
+  n_updated INT;
+  n_deleted INT := 0;
+  new_mark INT;
+  is_full BOOLEAN;
+BEGIN
+  SELECT * INTO st FROM ads_local.mirror_state s WHERE s.table_name = 'agent' FOR UPDATE;
+  is_full := force_full
+          OR st.last_full_refresh IS NULL
+          OR st.last_full_refresh < started - st.full_refresh_interval;
+
+  IF is_full THEN
+    WITH remote AS MATERIALIZED (
+      SELECT a.agentid, a.fullname FROM ads.agent a
+    ),
+    upserted AS (
+      INSERT INTO ads_local.agent AS l (agentid, fullname, pulled_at)
+      SELECT r.agentid, r.fullname, started FROM remote r
+      ON CONFLICT (agentid) DO UPDATE
+      SET fullname = EXCLUDED.fullname,
+          pulled_at = EXCLUDED.pulled_at
+      WHERE l.fullname IS DISTINCT FROM EXCLUDED.fullname
+      RETURNING (xmax = 0) AS inserted
+    ),
+    deleted AS (
+      DELETE FROM ads_local.agent l
+      WHERE NOT EXISTS (SELECT 1 FROM remote r WHERE r.agentid = l.agentid)
+      RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM remote),
+           COUNT(*) FILTER (WHERE u.inserted),
+           COUNT(*) FILTER (WHERE NOT u.inserted),
+           (SELECT COUNT(*) FROM deleted),
+           (SELECT MAX(r.agentid) FROM remote r)
+    INTO n_pulled, n_inserted, n_updated, n_deleted, new_mark
+    FROM upserted u;
+  ELSE
+    WITH remote AS MATERIALIZED (
+      SELECT a.agentid, a.fullname FROM ads.agent a WHERE a.agentid > st.watermark
+    ),
+    upserted AS (
+      INSERT INTO ads_local.agent AS l (agentid, fullname, pulled_at)
+      SELECT r.agentid, r.fullname, started FROM remote r
+      ON CONFLICT (agentid) DO UPDATE
+      SET fullname = EXCLUDED.fullname,
+          pulled_at = EXCLUDED.pulled_at
+      WHERE l.fullname IS DISTINCT FROM EXCLUDED.fullname
+      RETURNING (xmax = 0) AS inserted
+    )
+    SELECT (SELECT COUNT(*) FROM remote),
+           COUNT(*) FILTER (WHERE u.inserted),
+           COUNT(*) FILTER (WHERE NOT u.inserted),
+           (SELECT MAX(r.agentid) FROM remote r)
+    INTO n_pulled, n_inserted, n_updated, new_mark
+    FROM upserted u;
+    new_mark := GREATEST(new_mark, st.watermark);    -- nothing new: keep the old mark
+  END IF;
+  new_mark := COALESCE(new_mark, 0);                 -- full refresh of an empty table
+
+  UPDATE ads_local.mirror_state s
+  SET watermark = new_mark,
+      last_refresh = started,
+      last_full_refresh = CASE WHEN is_full THEN started ELSE s.last_full_refresh END
+  WHERE s.table_name = 'agent';
+
+  INSERT INTO ads_local.mirror_refresh_log
+    (table_name, mode, started_at, duration, rows_pulled, rows_inserted, rows_updated, rows_deleted, watermark)
+  VALUES ('agent', CASE WHEN is_full THEN 'full' ELSE 'incremental' END, started, clock_timestamp() - started,
+          n_pulled, n_inserted, n_updated, n_deleted, new_mark);
+
+  RETURN QUERY SELECT CASE WHEN is_full THEN 'full' ELSE 'incremental' END,
+                      n_pulled, n_inserted, n_updated, n_deleted, new_mark;
+END;
+$$ LANGUAGE plpgsql;
+
+
+/* -------------------------
+   Staleness metrics
+   agent_mirror_status : local only (cheap, safe to poll)
+   agent_mirror_lag()  : also asks the remote server how far behind the mirror is
+                         (two aggregates, computed remotely)
+   ------------------------- */
+CREATE OR REPLACE VIEW ads_local.agent_mirror_status AS
+SELECT
+  s.table_name,
+  s.watermark,
+  (SELECT COUNT(*) FROM ads_local.agent)                  AS local_rows,
+  s.last_refresh,
+  LOCALTIMESTAMP - s.last_refresh                         AS staleness,
+  s.last_full_refresh,
+  LOCALTIMESTAMP - s.last_full_refresh                    AS since_full_refresh,
+  s.full_refresh_interval,
+  l.mode                                                  AS last_mode,
+  l.duration                                              AS last_duration,
+  l.rows_pulled                                           AS last_rows_pulled,
+  (SELECT COUNT(*) FROM ads_local.mirror_refresh_log g
+   WHERE g.table_name = s.table_name)                     AS refreshes,
+  (SELECT AVG(g.duration) FROM ads_local.mirror_refresh_log g
+   WHERE g.table_name = s.table_name AND g.mode = 'incremental') AS avg_incremental_duration
+FROM ads_local.mirror_state s
+LEFT JOIN LATERAL (
+  SELECT * FROM ads_local.mirror_refresh_log g
+  WHERE g.table_name = s.table_name
+  ORDER BY g.refresh_id DESC
+  LIMIT 1
+) l ON true
+WHERE s.table_name = 'agent';
+
+CREATE OR REPLACE FUNCTION ads_local.agent_mirror_lag()
+RETURNS TABLE (remote_rows BIGINT, local_rows BIGINT, pending_new BIGINT, remote_max_id INT, watermark INT) AS $$
+  SELECT r.remote_rows,
+         (SELECT COUNT(*) FROM ads_local.agent),
+         r.pending_new,
+         r.remote_max_id,
+         s.watermark
+  FROM ads_local.mirror_state s
+  CROSS JOIN LATERAL (
+    SELECT COUNT(*) AS remote_rows,
+           COUNT(*) FILTER (WHERE a.agentid > s.watermark) AS pending_new,
+           MAX(a.agentid) AS remote_max_id
+    FROM ads.agent a
+  ) r
+  WHERE s.table_name = 'agent';
+$$ LANGUAGE sql STABLE;
+
+
+/* -------------------------
+   Views
+   v_agent_hr_profile reads the mirror (same columns as stage_4 view's version);
+   v_agent_hr_profile_live keeps the direct foreign-table join for comparison.
+   ------------------------- */
+CREATE OR REPLACE VIEW public.v_agent_hr_profile AS
+SELECT
+  a.agentid              AS agent_id,
+  a.fullname             AS agent_name,
+  e.employee_id,
+  e.department_id,
+  e.manager_id,
+  e.position_id
+FROM ads_local.agent a
+JOIN public.employee_agent_map m ON m.agent_id   = a.agentid
+JOIN main.employee          e ON e.employee_id = m.employee_id;
+
+CREATE OR REPLACE VIEW public.v_agent_hr_profile_live AS
+SELECT
+  a.agentid              AS agent_id,
+  a.fullname             AS agent_name,
+  e.employee_id,
+  e.department_id,
+  e.manager_id,
+  e.position_id
+FROM ads.agent a
+JOIN public.employee_agent_map m ON m.agent_id   = a.agentid
+JOIN main.employee          e ON e.employee_id = m.employee_id;
+
+-- Q1 groups the mapping by agent
+CREATE INDEX IF NOT EXISTS idx_employee_agent_map_agent
+  ON public.employee_agent_map (agent_id, employee_id);
+
+
+-- first fill (no-op when the mirror was filled before)
+SELECT ads_local.refresh_agent(true)
+WHERE NOT EXISTS (SELECT 1 FROM ads_local.agent);
+ANALYZE ads_local.agent;
@@ -0,0 +1,123 @@
+-- =====================================================================
+-- stage4_agent_mirror.sql against two local databases (psql script).
+-- A throwaway "remote" database plays the Advertising team's server:
+--
+--   createdb ads_remote
+--   createdb personnel_fdw
+--   psql -d personnel_fdw -c "CREATE EXTENSION IF NOT EXISTS postgres_fdw"
+--   psql -d personnel_fdw -c "CREATE SERVER other_team_srv FOREIGN DATA WRAPPER postgres_fdw
+--                             OPTIONS (dbname 'ads_remote', host 'localhost', port '5432')"
+--   psql -d personnel_fdw -c "CREATE USER MAPPING FOR CURRENT_USER SERVER other_team_srv
+--                             OPTIONS (user '<you>', password '<password>')"
+--   psql -d personnel_fdw -v remote=ads_remote -v local=personnel_fdw -f stage4_agent_mirror_test.sql
+--
+-- Creates (only if missing) ads.agent, main.employee and public.employee_agent_map
+-- in the local database and recreates public.agent in the remote one. Every step
+-- checks its result with ASSERT, so the script stops at the first failure.
+-- =====================================================================
+
+\set ON_ERROR_STOP on
+
+-- remote side: 1000 agents
+\connect :remote
+DROP TABLE IF EXISTS public.agent;
+CREATE TABLE public.agent (agentid INT PRIMARY KEY, fullname VARCHAR NOT NULL);
+INSERT INTO public.agent SELECT g, 'Agent ' || g FROM generate_series(1, 1000) g;
+
+-- local side: the stage 4 objects the mirror script needs
+\connect :local
+CREATE SCHEMA IF NOT EXISTS ads;
+CREATE SCHEMA IF NOT EXISTS main;
+CREATE FOREIGN TABLE IF NOT EXISTS ads.agent (
+  agentid integer NOT NULL,
+  fullname character varying NOT NULL
+) SERVER other_team_srv OPTIONS (schema_name 'public', table_name 'agent');
+CREATE TABLE IF NOT EXISTS main.employee (
+  employee_id INT PRIMARY KEY,
+  department_id INT,
+  manager_id INT,
+  position_id INT
+);
+CREATE TABLE IF NOT EXISTS public.employee_agent_map (
+  employee_id integer NOT NULL,
+  agent_id integer NOT NULL,
+  mapped_at timestamp without time zone DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+INSERT INTO main.employee
+SELECT g, g % 12 + 1, NULL, g % 30 + 1 FROM generate_series(1, 5000) g
+WHERE NOT EXISTS (SELECT 1 FROM main.employee);
+INSERT INTO public.employee_agent_map (employee_id, agent_id)
+SELECT g, g % 1200 + 1 FROM generate_series(1, 5000) g     -- some agents do not exist yet
+WHERE NOT EXISTS (SELECT 1 FROM public.employee_agent_map);
+
+DROP SCHEMA IF EXISTS ads_local CASCADE;
+\ir stage4_agent_mirror.sql
+
+-- 1) the script's first fill is a full refresh
+DO $$
+DECLARE st RECORD;
+BEGIN
+  SELECT * INTO st FROM ads_local.agent_mirror_status;
+  ASSERT st.local_rows = 1000 AND st.watermark = 1000 AND st.last_mode = 'full', format('first fill: %s', st);
+  ASSERT (SELECT COUNT(*) FROM public.v_agent_hr_profile) = (SELECT COUNT(*) FROM public.v_agent_hr_profile_live),
+    'mirror view and live view differ after the first fill';
+END $$;
+
+-- 2) new, renamed and deleted agents on the remote side
+\connect :remote
+INSERT INTO public.agent SELECT g, 'Agent ' || g FROM generate_series(1001, 1200) g;
+UPDATE public.agent SET fullname = 'Renamed ' || agentid WHERE agentid <= 10;
+DELETE FROM public.agent WHERE agentid BETWEEN 11 AND 15;
+
+\connect :local
+SELECT * FROM ads_local.agent_mirror_lag();
+DO $$
+DECLARE d RECORD;
+BEGIN
+  SELECT * INTO d FROM ads_local.agent_mirror_lag();
+  ASSERT d.pending_new = 200 AND d.remote_rows = 1195 AND d.local_rows = 1000, format('lag: %s', d);
+END $$;
+
+-- 3) incremental: only the 200 new agents come over
+SELECT * FROM ads_local.refresh_agent();
+DO $$
+DECLARE st RECORD;
+BEGIN
+  SELECT * INTO st FROM ads_local.agent_mirror_status;
+  ASSERT st.last_mode = 'incremental' AND st.last_rows_pulled = 200 AND st.watermark = 1200
+     AND st.local_rows = 1200, format('incremental: %s', st);
+  ASSERT (SELECT fullname FROM ads_local.agent WHERE agentid = 1) = 'Agent 1', 'incremental refresh rewrote an old row';
+END $$;
+
+-- 4) nothing new: an incremental refresh pulls no rows
+SELECT * FROM ads_local.refresh_agent();
+DO $$
+BEGIN
+  ASSERT (SELECT last_rows_pulled FROM ads_local.agent_mirror_status) = 0, 'second incremental refresh pulled rows';
+END $$;
+
+-- 5) full: renames and deletes arrive, the views agree again
+SELECT * FROM ads_local.refresh_agent(true);
+DO $$
+DECLARE r RECORD;
+BEGIN
+  SELECT * INTO r FROM ads_local.mirror_refresh_log ORDER BY refresh_id DESC LIMIT 1;
+  ASSERT r.mode = 'full' AND r.rows_pulled = 1195 AND r.rows_inserted = 0 AND r.rows_updated = 10
+     AND r.rows_deleted = 5, format('full: %s', r);
+  ASSERT NOT EXISTS (
+    (SELECT * FROM public.v_agent_hr_profile EXCEPT SELECT * FROM public.v_agent_hr_profile_live)
+    UNION ALL
+    (SELECT * FROM public.v_agent_hr_profile_live EXCEPT SELECT * FROM public.v_agent_hr_profile)
+  ), 'mirror view and live view differ after a full refresh';
+END $$;
+
+-- 6) an overdue full refresh happens without being asked for
+UPDATE ads_local.mirror_state SET last_full_refresh = LOCALTIMESTAMP - INTERVAL '2 days';
+SELECT * FROM ads_local.refresh_agent();
+DO $$
+BEGIN
+  ASSERT (SELECT last_mode FROM ads_local.agent_mirror_status) = 'full', 'overdue full refresh did not run';
+END $$;
+
+SELECT * FROM ads_local.agent_mirror_status;
+\echo 'stage4_agent_mirror_test: OK'
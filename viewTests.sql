@@ -220,6 +220,101 @@ SELECT 'After delete: base employee_license (should be empty)' AS note, * FROM e
  WHERE employee_id = (SELECT employee_id FROM employee WHERE email='charlie.license@example.com');
 
 
+-- =====================================================================
+-- VIEW 3 (batch): v_current_licenses_insert / _update / _delete
+-- Same rules as the INSTEAD OF trigger, applied to a whole array of view
+-- rows: a batch with any bad row is rejected as a whole (every bad row in
+-- the DETAIL, nothing written); UPDATE / DELETE only touch rows visible in
+-- the view (expiry_date >= CURRENT_DATE).
+-- =====================================================================
+
+-- 1) Insert a valid batch of two licenses
+SELECT 'Inserted (batch) v_current_licenses' AS note, *
+FROM v_current_licenses_insert(ARRAY[
+  ROW(NULL, (SELECT employee_id FROM employee WHERE email='charlie.license@example.com'), NULL,
+      'Senior Pilot', CURRENT_DATE - 30, CURRENT_DATE + 365, NULL)::v_current_licenses,
+  ROW(NULL, (SELECT employee_id FROM employee WHERE email='charlie.license@example.com'), NULL,
+      'Junior Diver', CURRENT_DATE - 10, CURRENT_DATE + 730, NULL)::v_current_licenses
+]);
+
+SELECT 'After batch insert: view (2 rows)' AS src, * FROM v_current_licenses
+ WHERE employee_id = (SELECT employee_id FROM employee WHERE email='charlie.license@example.com');
+
+-- 2) A mixed batch (one valid row, a missing employee, a past expiry_date) is
+--    rejected whole: rows 2 and 3 are listed in the DETAIL
+DO $$
+DECLARE
+  detail TEXT;
+BEGIN
+  PERFORM v_current_licenses_insert(ARRAY[
+    ROW(NULL, (SELECT employee_id FROM employee WHERE email='charlie.license@example.com'), NULL,
+        'Senior Surveyor', CURRENT_DATE, CURRENT_DATE + 365, NULL)::v_current_licenses,
+    ROW(NULL, -99999, NULL, 'Senior Driver', CURRENT_DATE, CURRENT_DATE + 365, NULL)::v_current_licenses,
+    ROW(NULL, (SELECT employee_id FROM employee WHERE email='charlie.license@example.com'), NULL,
+        'Senior Chemist', CURRENT_DATE - 400, CURRENT_DATE - 1, NULL)::v_current_licenses
+  ]);
+  RAISE NOTICE 'UNEXPECTED: mixed batch was accepted';
+EXCEPTION WHEN OTHERS THEN
+  GET STACKED DIAGNOSTICS detail = PG_EXCEPTION_DETAIL;
+  RAISE NOTICE 'EXPECTED ERROR (v_current_licenses_insert: mixed batch): %', SQLERRM;
+  RAISE NOTICE 'DETAIL: %', detail;
+END$$;
+
+-- Nothing of the rejected batch was written (still the 2 licenses of step 1)
+SELECT 'After rejected batch: base (2 rows)' AS src, * FROM employee_license
+ WHERE employee_id = (SELECT employee_id FROM employee WHERE email='charlie.license@example.com');
+
+-- 3) Updates: an already-expired license is not in the view, so it is skipped
+INSERT INTO employee_license (employee_id, license_name, issued_date, expiry_date, created_at)
+VALUES ((SELECT employee_id FROM employee WHERE email='charlie.license@example.com'),
+        'Senior Welder', CURRENT_DATE - 400, CURRENT_DATE - 10, now());
+
+SELECT 'Updated (batch): expired license skipped (0 rows)' AS note, *
+FROM v_current_licenses_update(ARRAY(
+  SELECT ROW(license_id, employee_id, NULL, license_name, issued_date, CURRENT_DATE + 365, created_at)::v_current_licenses
+  FROM employee_license
+  WHERE license_name = 'Senior Welder'
+    AND employee_id = (SELECT employee_id FROM employee WHERE email='charlie.license@example.com')));
+
+SELECT 'After skipped update: base (expiry unchanged)' AS src, * FROM employee_license
+ WHERE license_name = 'Senior Welder'
+   AND employee_id = (SELECT employee_id FROM employee WHERE email='charlie.license@example.com');
+
+-- ...and an update that would move a current license into the past is rejected
+DO $$
+DECLARE
+  detail TEXT;
+BEGIN
+  PERFORM v_current_licenses_update(ARRAY(
+    SELECT ROW(license_id, employee_id, employee, license_name, issued_date, CURRENT_DATE - 1, created_at)::v_current_licenses
+    FROM v_current_licenses
+    WHERE employee_id = (SELECT employee_id FROM employee WHERE email='charlie.license@example.com')));
+  RAISE NOTICE 'UNEXPECTED: update to a past expiry_date was accepted';
+EXCEPTION WHEN OTHERS THEN
+  GET STACKED DIAGNOSTICS detail = PG_EXCEPTION_DETAIL;
+  RAISE NOTICE 'EXPECTED ERROR (v_current_licenses_update: past expiry_date): %', SQLERRM;
+  RAISE NOTICE 'DETAIL: %', detail;
+END$$;
+
+SELECT 'After rejected update: view (expiry unchanged)' AS src, * FROM v_current_licenses
+ WHERE employee_id = (SELECT employee_id FROM employee WHERE email='charlie.license@example.com');
+
+-- 4) Delete by ids, including the expired license and an id that does not
+--    exist: only the two licenses in the view are deleted and returned
+SELECT 'Deleted (batch) v_current_licenses (2 rows)' AS note, *
+FROM v_current_licenses_delete(ARRAY(
+  SELECT license_id FROM employee_license
+  WHERE employee_id = (SELECT employee_id FROM employee WHERE email='charlie.license@example.com')
+  UNION ALL
+  SELECT -1));
+
+SELECT 'After batch delete: base (only the expired license)' AS src, * FROM employee_license
+ WHERE employee_id = (SELECT employee_id FROM employee WHERE email='charlie.license@example.com');
+
+-- clean up the expired license (not reachable through the view)
+DELETE FROM employee_license
+WHERE employee_id = (SELECT employee_id FROM employee WHERE email='charlie.license@example.com');
+
 -- =====================================================================
 -- VIEW 4: v_employee_overview
 -- This view has an INSTEAD OF trigger that:
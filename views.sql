@@ -114,6 +114,114 @@ CREATE TRIGGER trg_v_current_licenses_iud
 INSTEAD OF INSERT OR UPDATE OR DELETE ON v_current_licenses
 FOR EACH ROW EXECUTE FUNCTION trg_v_current_licenses_iud();
 
+/* -------------------------
+   v3 batch write path
+   - the INSTEAD OF trigger above costs three queries per row; these take a
+     whole batch as an array of view rows (or license ids) and apply it with
+     one validation query and one INSERT / UPDATE / DELETE statement.
+   - same rules: expiry_date >= CURRENT_DATE, employee must exist; a batch with
+     any bad row is rejected as a whole, listing every bad row.
+   - UPDATE / DELETE only touch rows currently visible in the view (like an
+     UPDATE / DELETE on the view); each returns the view rows it wrote.
+   e.g.
+     SELECT * FROM v_current_licenses_insert(ARRAY[
+       ROW(NULL, 101, NULL, 'senior guide', CURRENT_DATE, CURRENT_DATE + 365, NULL)::v_current_licenses]);
+     SELECT * FROM v_current_licenses_update(ARRAY(
+       SELECT ROW(license_id, employee_id, employee, license_name, issued_date,
+                  expiry_date + 365, created_at)::v_current_licenses
+       FROM v_current_licenses WHERE expiry_date < CURRENT_DATE + 30));
+     SELECT * FROM v_current_licenses_delete(ARRAY[1, 2, 3]);
+   ------------------------- */
+CREATE OR REPLACE FUNCTION v_current_licenses_check(batch v_current_licenses[], action TEXT)
+RETURNS VOID AS $$
+DECLARE
+  bad_count BIGINT;
+  bad TEXT;
+BEGIN
+  SELECT COUNT(*), string_agg(
+           format('row %s (employee %s, license %s): %s', r.ordinality, r.employee_id, r.license_id,
+                  CASE WHEN r.expiry_date IS NULL OR r.expiry_date < CURRENT_DATE
+                       THEN 'expiry_date must be >= CURRENT_DATE'
+                       ELSE 'employee not found'
+                  END),
+           E'\n' ORDER BY r.ordinality)
+  INTO bad_count, bad
+  FROM unnest(batch) WITH ORDINALITY AS r
+  LEFT JOIN employee e ON e.employee_id = r.employee_id
+  WHERE r.expiry_date IS NULL OR r.expiry_date < CURRENT_DATE OR e.employee_id IS NULL;
+
+  IF bad_count > 0 THEN
+    RAISE EXCEPTION 'Cannot %: % row(s) of the batch break the v_current_licenses rules', action, bad_count
+      USING DETAIL = bad;
+  END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION v_current_licenses_insert(batch v_current_licenses[])
+RETURNS SETOF v_current_licenses AS $$
+BEGIN
+  PERFORM v_current_licenses_check(batch, 'insert');
+  RETURN QUERY
+  WITH ins AS (
+    INSERT INTO employee_license (employee_id, license_name, issued_date, expiry_date, created_at)
+    SELECT r.employee_id, r.license_name, r.issued_date, r.expiry_date, COALESCE(r.created_at, now())
+    FROM unnest(batch) WITH ORDINALITY AS r
+    ORDER BY r.ordinality
+    RETURNING *
+  )
+  SELECT ins.license_id, ins.employee_id, (e.first_name || ' ' || e.last_name),
+         ins.license_name, ins.issued_date, ins.expiry_date, ins.created_at
+  FROM ins
+  JOIN employee e ON e.employee_id = ins.employee_id
+  ORDER BY ins.license_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- rows are matched by license_id; if an id appears twice the later row wins
+CREATE OR REPLACE FUNCTION v_current_licenses_update(batch v_current_licenses[])
+RETURNS SETOF v_current_licenses AS $$
+BEGIN
+  PERFORM v_current_licenses_check(batch, 'update');
+  RETURN QUERY
+  WITH src AS (
+    SELECT DISTINCT ON (r.license_id) r.*
+    FROM unnest(batch) WITH ORDINALITY AS r
+    ORDER BY r.license_id, r.ordinality DESC
+  ),
+  upd AS (
+    UPDATE employee_license el
+      SET employee_id = src.employee_id,
+          license_name = src.license_name,
+          issued_date = src.issued_date,
+          expiry_date = src.expiry_date,
+          created_at = COALESCE(src.created_at, el.created_at)
+    FROM src
+    WHERE el.license_id = src.license_id
+      AND el.expiry_date >= CURRENT_DATE
+    RETURNING el.*
+  )
+  SELECT upd.license_id, upd.employee_id, (e.first_name || ' ' || e.last_name),
+         upd.license_name, upd.issued_date, upd.expiry_date, upd.created_at
+  FROM upd
+  JOIN employee e ON e.employee_id = upd.employee_id
+  ORDER BY upd.license_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION v_current_licenses_delete(license_ids INT[])
+RETURNS SETOF v_current_licenses AS $$
+  WITH del AS (
+    DELETE FROM employee_license el
+    USING employee e
+    WHERE el.license_id = ANY (license_ids)
+      AND el.expiry_date >= CURRENT_DATE
+      AND e.employee_id = el.employee_id
+    RETURNING el.license_id, el.employee_id, (e.first_name || ' ' || e.last_name) AS employee,
+              el.license_name, el.issued_date, el.expiry_date, el.created_at
+  )
+  SELECT * FROM del ORDER BY license_id;
+$$ LANGUAGE sql;
+
 
 /* -------------------------
    v4: employee overview